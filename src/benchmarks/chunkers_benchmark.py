@@ -0,0 +1,75 @@
+# Measuring the throughput of every chunker in chunks per second and megabytes per second
+# The text is synthetic pages of paragraphs , the pages are fed one by one like the file processing does
+# Run it from the src directory : python -m benchmarks.chunkers_benchmark --pages 2000 --chunk-size 500 --overlap-size 50
+from stores.chunkers import ChunkerProviderFactory , ChunkerEnums
+from types import SimpleNamespace
+import argparse
+import random
+import time
+
+WORDS = ("the retrieval of documents depends on the quality of the chunks and their overlap , "
+         "a good chunk keeps a whole idea together while fitting the embedding model context").split()
+
+
+# Creating a page of paragraphs of sentences of random words
+def create_page(rng : random.Random , page_size : int):
+
+    paragraphs , size = [] , 0
+    while size < page_size:
+        sentences = [ " ".join(rng.choice(WORDS) for _ in range(rng.randint(5 , 25))).capitalize() + "."
+                      for _ in range(rng.randint(1 , 6)) ]
+        paragraph = " ".join(sentences)
+        paragraphs.append(paragraph)
+        size += len(paragraph) + 2
+
+    return "\n\n".join(paragraphs)
+
+
+# Feeding all pages to a chunker and timing it
+def run_chunker(factory : ChunkerProviderFactory , provider : str , pages : list , chunk_size : int , overlap_size : int):
+
+    started_at = time.perf_counter()
+
+    chunker = factory.create(provider = provider , chunk_size = chunk_size , overlap_size = overlap_size)
+    chunks_count = 0
+    for page_no , page in enumerate(pages):
+        chunks_count += len(chunker.feed(text = page , metadata = {"page" : page_no}))
+    chunks_count += len(chunker.flush())
+
+    return chunks_count , time.perf_counter() - started_at
+
+
+def main():
+
+    parser = argparse.ArgumentParser(description = "Chunkers throughput benchmark")
+    parser.add_argument("--pages" , type = int , default = 1000)
+    parser.add_argument("--page-size" , type = int , default = 3000)
+    parser.add_argument("--chunk-size" , type = int , default = 500)
+    parser.add_argument("--overlap-size" , type = int , default = 50)
+    parser.add_argument("--buffer-size" , type = int , default = 65536)
+    parser.add_argument("--chunkers" , nargs = "+" , default = [ chunker.value for chunker in ChunkerEnums ])
+    parser.add_argument("--seed" , type = int , default = 0)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    pages = [ create_page(rng , args.page_size) for _ in range(args.pages) ]
+    total_mb = sum(len(page.encode("utf-8")) for page in pages) / (1024 * 1024)
+
+    # The same settings the application gives to the factory
+    factory = ChunkerProviderFactory(SimpleNamespace(
+        CHUNKER_BUFFER_SIZE = args.buffer_size,
+        CHUNKER_SENTENCE_LANGUAGE = "english",
+        CHUNKER_TOKEN_ENCODING = "cl100k_base"
+    ))
+
+    print(f"{args.pages} pages , {total_mb:.2f} MB , chunk size {args.chunk_size} , overlap size {args.overlap_size}")
+    print(f"{'chunker':<12}{'chunks':>10}{'seconds':>10}{'chunks/s':>14}{'MB/s':>10}")
+
+    for provider in args.chunkers:
+        chunks_count , elapsed = run_chunker(factory = factory , provider = provider , pages = pages ,
+                                             chunk_size = args.chunk_size , overlap_size = args.overlap_size)
+        print(f"{provider:<12}{chunks_count:>10}{elapsed:>10.3f}{chunks_count / elapsed:>14.0f}{total_mb / elapsed:>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
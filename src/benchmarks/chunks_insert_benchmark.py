@@ -0,0 +1,91 @@
+# Measuring the chunks insert throughput of the ORM unit of work against the core bulk insert
+# It needs the database of the settings , the chunks are inserted into a project and deleted at the end
+# Run it from the src directory : python -m benchmarks.chunks_insert_benchmark --chunks 100000 --project-id 999999
+from helpers.config import get_settings
+from helpers.database import create_db_engine
+from models.ChunkModel import ChunkModel
+from models.ProjectModel import ProjectModel
+from models.db_schemas import DataChunk
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import sessionmaker
+import argparse
+import asyncio
+import time
+
+
+# Creating the rows of the chunks , a page of text with a small metadata like the chunkers make
+def create_rows(project_id : int , chunks_count : int , chunk_size : int):
+    text = ("lorem ipsum dolor sit amet " * (chunk_size // 27 + 1))[:chunk_size]
+    return [
+        {
+            "chunk_text" : text,
+            "chunk_metadata" : {"source" : "benchmark" , "page" : order // 10},
+            "chunk_order" : order,
+            "chunk_project_id" : project_id
+        }
+        for order in range(1 , chunks_count + 1)
+    ]
+
+
+# The previous insert path , ORM objects added to the session in slices
+async def insert_with_orm(db_client , rows : list , batch_size : int):
+
+    async with db_client() as session:
+        async with session.begin():
+            for i in range(0 , len(rows) , batch_size):
+                session.add_all([ DataChunk(**row) for row in rows[i:i + batch_size] ])
+
+    return len(rows)
+
+
+# The core bulk insert path returning the new IDs
+async def insert_with_bulk(chunk_model : ChunkModel , rows : list , batch_size : int):
+    chunk_ids = await chunk_model.bulk_insert_chunks(chunks = rows , batch_size = batch_size)
+    return len(chunk_ids)
+
+
+async def main():
+
+    parser = argparse.ArgumentParser(description = "Chunks insert benchmark")
+    parser.add_argument("--chunks" , type = int , default = 100000)
+    parser.add_argument("--chunk-size" , type = int , default = 500)
+    parser.add_argument("--batch-size" , type = int , default = 1000)
+    parser.add_argument("--project-id" , type = int , default = 999999)
+    parser.add_argument("--modes" , nargs = "+" , default = ["orm" , "bulk"])
+    args = parser.parse_args()
+
+    settings = get_settings()
+    db_engine = create_db_engine(settings)
+    db_client = sessionmaker(db_engine , class_ = AsyncSession , expire_on_commit = False)
+
+    project_model = await ProjectModel.create_instance(db_client = db_client)
+    chunk_model = await ChunkModel.create_instance(db_client = db_client)
+    project = await project_model.get_project_or_create_project(project_id = args.project_id)
+
+    rows = create_rows(project_id = project.project_id , chunks_count = args.chunks , chunk_size = args.chunk_size)
+
+    print(f"{args.chunks} chunks of {args.chunk_size} characters , batch size {args.batch_size}")
+    print(f"{'mode':<8}{'seconds':>10}{'chunks/s':>14}")
+
+    try:
+        for mode in args.modes:
+
+            # Every mode starts from an empty project
+            _ = await chunk_model.delete_chunks_by_project_id(project_id = project.project_id)
+
+            started_at = time.perf_counter()
+            if mode == "orm":
+                inserted = await insert_with_orm(db_client = db_client , rows = rows , batch_size = args.batch_size)
+            else:
+                inserted = await insert_with_bulk(chunk_model = chunk_model , rows = rows , batch_size = args.batch_size)
+            elapsed = time.perf_counter() - started_at
+
+            print(f"{mode:<8}{elapsed:>10.3f}{inserted / elapsed:>14.0f}")
+
+    finally:
+        _ = await chunk_model.delete_chunks_by_project_id(project_id = project.project_id)
+        await db_engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
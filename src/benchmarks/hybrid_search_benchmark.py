@@ -0,0 +1,84 @@
+# Measuring the latency of the vector arm , the lexical arm and the fused hybrid search of an indexed pgvector collection
+# It needs the database of the settings and a project that was already indexed , the queries are random vectors
+# with the given words so nothing is embedded and only the database time is measured
+# Run it from the src directory : python -m benchmarks.hybrid_search_benchmark --project-id 1 --queries 200
+from helpers.config import get_settings
+from helpers.database import create_db_engine
+from stores.vectordb.VectorDBProviderFactory import VectorDBProviderFactory
+from stores.vectordb.VectorDBEnums import VectorDBEnums
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import sessionmaker
+import argparse
+import asyncio
+import random
+import statistics
+import time
+
+
+# Getting a percentile of the latencies in milliseconds
+def percentile(latencies : list , rank : float):
+    latencies = sorted(latencies)
+    return latencies[min(len(latencies) - 1 , int(len(latencies) * rank))] * 1000
+
+
+# Running a search for every query and timing each one
+async def run_queries(search , queries : list):
+
+    latencies = []
+    for vector , text in queries:
+        started_at = time.perf_counter()
+        _ = await search(vector , text)
+        latencies.append(time.perf_counter() - started_at)
+
+    return latencies
+
+
+async def main():
+
+    parser = argparse.ArgumentParser(description = "Hybrid search benchmark")
+    parser.add_argument("--project-id" , type = int , required = True)
+    parser.add_argument("--queries" , type = int , default = 200)
+    parser.add_argument("--limit" , type = int , default = 10)
+    parser.add_argument("--text" , type = str , default = "how is the data stored and indexed")
+    parser.add_argument("--accuracy" , type = str , default = None)
+    args = parser.parse_args()
+
+    settings = get_settings()
+    db_engine = create_db_engine(settings)
+    db_client = sessionmaker(db_engine , class_ = AsyncSession , expire_on_commit = False)
+
+    vectordb_client = VectorDBProviderFactory(config = settings , db_client = db_client).create_provider(
+        provider = VectorDBEnums.PGVECTOR.value)
+    collection_name = f"collection_{vectordb_client.default_vector_size}_{args.project_id}"
+
+    # Every query gets its own random vector and a shuffle of the words , so the plans aren't only cached ones
+    words = args.text.split()
+    queries = []
+    for _ in range(args.queries):
+        vector = [random.uniform(-1 , 1) for _ in range(vectordb_client.default_vector_size)]
+        queries.append((vector , " ".join(random.sample(words , len(words)))))
+
+    cases = [
+        ("vector" , lambda vector , text: vectordb_client.search_by_vector(collection_name = collection_name , vector = vector ,
+                                                                          limit = args.limit , accuracy = args.accuracy)),
+        ("lexical" , lambda vector , text: vectordb_client.search_by_text(collection_name = collection_name , text = text ,
+                                                                         limit = args.limit)),
+        ("hybrid" , lambda vector , text: vectordb_client.search_hybrid(collection_name = collection_name , vector = vector ,
+                                                                       text = text , limit = args.limit , accuracy = args.accuracy)),
+    ]
+
+    print(f"{args.queries} queries on {collection_name} , limit {args.limit}")
+    print(f"{'mode':<10}{'mean ms':>10}{'p50 ms':>10}{'p99 ms':>10}")
+
+    try:
+        for name , search in cases:
+            latencies = await run_queries(search = search , queries = queries)
+            print(f"{name:<10}{statistics.mean(latencies) * 1000:>10.2f}"
+                  f"{percentile(latencies , 0.5):>10.2f}{percentile(latencies , 0.99):>10.2f}")
+
+    finally:
+        await db_engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
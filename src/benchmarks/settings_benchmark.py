@@ -0,0 +1,45 @@
+# Measuring what reading the settings costs , parsing the .env file on every call against the cached settings
+# A request builds a few controllers and settings dependencies , so the settings are read several times per request
+# Run it from the src directory with the .env of the application : python -m benchmarks.settings_benchmark --calls 2000
+from helpers.config import Settings , get_settings , reload_settings
+from controllers import DataController
+import argparse
+import time
+
+
+# Calling a function many times and timing it
+def run_calls(function , calls : int):
+
+    started_at = time.perf_counter()
+    for _ in range(calls):
+        _ = function()
+
+    return time.perf_counter() - started_at
+
+
+def main():
+
+    parser = argparse.ArgumentParser(description = "Settings loading benchmark")
+    parser.add_argument("--calls" , type = int , default = 2000)
+    args = parser.parse_args()
+
+    # The startup parsing , reading and validating the .env file once like the first call does
+    startup_seconds = run_calls(reload_settings , 1)
+
+    cases = [
+        ("parsed" , Settings),
+        ("cached" , get_settings),
+        ("reload" , reload_settings),
+        ("controller" , DataController)
+    ]
+
+    print(f"startup parsing : {startup_seconds * 1000:.3f} ms")
+    print(f"{'case':<12}{'calls':>10}{'seconds':>10}{'us/call':>12}")
+
+    for name , function in cases:
+        elapsed = run_calls(function , args.calls)
+        print(f"{name:<12}{args.calls:>10}{elapsed:>10.3f}{elapsed / args.calls * 1e6:>12.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -9,12 +9,16 @@ class BaseController:
     # Initialization function to store settings
     def __init__(self):
 
-        # Getting the configuration Settings
-        self.app_settings = get_settings()
         self.base_dir=os.path.dirname(os.path.dirname(__file__))
         self.file_dir=os.path.join(self.base_dir,"assets/files")
         self.database_dir = os.path.join(self.base_dir,"assets/database")
     
+    # Getting the configuration Settings , they're cached for the process so reading them is free
+    # and the long lived controllers like the job workers see the settings reloaded on SIGHUP
+    @property
+    def app_settings(self) -> Settings:
+        return get_settings()
+
     # This function is to generate a random string
     def generate_random_string(self, length: int=12):
         return ''.join(random.choices(string.ascii_lowercase + string.digits, k=length))
@@ -3,10 +3,9 @@ from fastapi import UploadFile
 # Importing Base Controller to inherit from
 from .BaseController import BaseController
 
-# Importing Project Controller to use later
-from .ProjectController import ProjectController
 from models import ResponseSignal
-import re , os
+from stores.blobstore import BlobStoreInterface
+import re
 
 
 class DataController(BaseController):
@@ -25,28 +24,28 @@ class DataController(BaseController):
             return False , ResponseSignal.FILE_SIZE_EXCEEDED.value
         return True , ResponseSignal.FILE_VALIDATE_SUCCESS.value
     
-    # Generating a unique file path for every file uploaded
-    def generate_unique_filepath(self, original_file_name : str , project_id : str):
+    # Writing an uploaded file to the blob store block by block , it returns the blob info with its key and its size
+    # The blob store hashes the file while it's streamed so it's never read twice , the key is the sha256 of the content
+    async def write_uploaded_file(self , file : UploadFile , blob_store : BlobStoreInterface):
+
+        async def read_chunks():
+            while chunk := await file.read(self.app_settings.FILE_DEFAULT_CHUNK_SIZE):
+                yield chunk
+
+        return await blob_store.write(chunks = read_chunks())
+
+    # Generating a unique file ID for every file uploaded , the content is stored in the blob store
+    # but the file ID keeps the original extension so the suitable loader is selected when it's parsed
+    def generate_unique_file_id(self , original_file_name : str):
 
         # Generating random key value
         random_key = self.generate_random_string()
-        
-        # For the project which will the file be saved in , we get its path
-        project_path=ProjectController().get_project_path(project_id=project_id)
-        
+
         # Cleaning the file name to get a file name cleaned of any unknown characters
         cleaned_filename=self.get_clean_filename(original_file_name=original_file_name)
-        
-        # Now construct the new file path by adding the project path, the random key and the cleaned file name
-        new_file_path = os.path.join(project_path,random_key+"_"+cleaned_filename)
-        
-        # Making sure that the path doesn't exist m and if it does we generate a random key again and consturct the file name again
-        while os.path.exists(new_file_path):
-            random_key = self.generate_random_string()
-            new_file_path = os.path.join(project_path,random_key+"_"+cleaned_filename)
-        
-        # Returning the file name
-        return new_file_path ,random_key+"_"+cleaned_filename
+
+        # Now construct the file ID by adding the random key and the cleaned file name
+        return random_key+"_"+cleaned_filename
 
     # Making a clean file name for the original file
     def get_clean_filename(self,original_file_name : str):
@@ -0,0 +1,215 @@
+# Importing Base Controller for inheritance
+from .BaseController import BaseController
+
+from models.db_schemas import Project
+from dataclasses import dataclass
+from typing import Callable
+import asyncio
+import logging
+import time
+
+# Marker put into the queues to tell the next stage that there's no more work
+_END_OF_STREAM = object()
+
+# Error raised by a pipeline stage to stop the whole pipeline
+class IndexingPipelineError(Exception):
+    pass
+
+# Throughput counters of a single pipeline stage
+@dataclass
+class StageCounter:
+    name : str
+    items : int = 0
+    batches : int = 0
+    busy_seconds : float = 0.0
+
+    # Number of items processed per second of work done in the stage
+    @property
+    def throughput(self):
+        if self.busy_seconds == 0:
+            return 0.0
+        return self.items / self.busy_seconds
+
+    def to_dict(self):
+        return {
+            "items" : self.items,
+            "batches" : self.batches,
+            "busy_seconds" : round(self.busy_seconds , 3),
+            "items_per_second" : round(self.throughput , 2)
+        }
+
+
+class IndexController(BaseController):
+
+    # Initialiazation function to initiate the super class
+    # The pipeline reads chunks pages from the database , embeds them with a number of concurrent workers
+    # and writes them to the vector database , every stage is connected to the next one with a bounded queue
+    def __init__(self , nlp_controller , chunk_model ,
+                 page_size : int = None ,
+                 embedding_concurrency : int = None ,
+                 queue_size : int = None):
+
+        super().__init__()
+
+        self.nlp_controller = nlp_controller
+        self.chunk_model = chunk_model
+
+        # Setting the pipeline parameters from the settings if they're not given
+        self.page_size = page_size or self.app_settings.INDEXING_PAGE_SIZE
+        self.embedding_concurrency = max(1 , embedding_concurrency or self.app_settings.INDEXING_EMBEDDING_CONCURRENCY)
+        self.queue_size = max(1 , queue_size or self.app_settings.INDEXING_QUEUE_SIZE)
+
+        # Setting a counter for every stage of the pipeline
+        self.stage_counters = {
+            "read" : StageCounter(name = "read"),
+            "embed" : StageCounter(name = "embed"),
+            "write" : StageCounter(name = "write"),
+        }
+
+        self.logger = logging.getLogger('uvicorn.error')
+
+    # This function reads the project chunks page by page and pushes them to the embedding queue
+    # The put call waits when the queue is full , so the reader never runs too far ahead of the embedders
+    # Reading only the chunks of some assets that are missing from the vector database , the others are already indexed
+    async def _read_stage(self , project : Project , embed_queue : asyncio.Queue , asset_ids : list = None ,
+                          missing_only : bool = False):
+
+        counter = self.stage_counters["read"]
+        started_at = time.perf_counter()
+
+        # Streaming the pages with keyset pagination so every page costs the same whatever the project size is
+        async for page_chunks in self.chunk_model.iterate_project_chunks(project_id = project.project_id ,
+                                                                         page_size = self.page_size ,
+                                                                         asset_ids = asset_ids):
+            if missing_only:
+                indexed_chunks_ids = await self.nlp_controller.get_indexed_chunks_ids(
+                    project = project , chunks_ids = [c.chunk_id for c in page_chunks]
+                )
+                page_chunks = [c for c in page_chunks if c.chunk_id not in indexed_chunks_ids]
+
+            counter.busy_seconds += time.perf_counter() - started_at
+
+            if not page_chunks:
+                started_at = time.perf_counter()
+                continue
+
+            counter.items += len(page_chunks)
+            counter.batches += 1
+
+            await embed_queue.put(page_chunks)
+            started_at = time.perf_counter()
+
+        # Telling every embedding worker that there's no more pages
+        for _ in range(self.embedding_concurrency):
+            await embed_queue.put(_END_OF_STREAM)
+
+    # This function embeds the pages coming from the reader and pushes them with their vectors to the write queue
+    async def _embed_stage(self , embed_queue : asyncio.Queue , write_queue : asyncio.Queue):
+
+        counter = self.stage_counters["embed"]
+
+        while True:
+            page_chunks = await embed_queue.get()
+
+            if page_chunks is _END_OF_STREAM:
+                return
+
+            started_at = time.perf_counter()
+            vectors = await self.nlp_controller.embed_chunks(chunks = page_chunks)
+            counter.busy_seconds += time.perf_counter() - started_at
+
+            # If the embedding failed we stop the whole pipeline
+            if not vectors:
+                raise IndexingPipelineError("Error while embedding chunks for vector indexing")
+
+            counter.items += len(page_chunks)
+            counter.batches += 1
+
+            await write_queue.put((page_chunks , vectors))
+
+    # This function writes the embedded pages into the vector database
+    async def _write_stage(self , project : Project , write_queue : asyncio.Queue ,
+                           progress_callback : Callable = None):
+
+        counter = self.stage_counters["write"]
+
+        while True:
+            item = await write_queue.get()
+
+            if item is _END_OF_STREAM:
+                return
+
+            page_chunks , vectors = item
+
+            started_at = time.perf_counter()
+            is_inserted = await self.nlp_controller.insert_into_vector_db(
+                project = project,
+                chunks = page_chunks,
+                chunks_ids = [c.chunk_id for c in page_chunks],
+                vectors = vectors
+            )
+            counter.busy_seconds += time.perf_counter() - started_at
+
+            if not is_inserted:
+                raise IndexingPipelineError("Error while inserting chunks into the vector database")
+
+            counter.items += len(page_chunks)
+            counter.batches += 1
+
+            if progress_callback:
+                progress_callback(len(page_chunks))
+
+    # This function runs all the embedding workers then tells the writer there's no more work
+    async def _embed_workers(self , embed_queue : asyncio.Queue , write_queue : asyncio.Queue):
+
+        await asyncio.gather(*[
+            self._embed_stage(embed_queue = embed_queue , write_queue = write_queue)
+            for _ in range(self.embedding_concurrency)
+        ])
+
+        await write_queue.put(_END_OF_STREAM)
+
+    # This function runs the whole pipeline for a project and returns a success flag and the number of inserted items
+    # The collection is expected to be already created before calling it
+    # Only the chunks of the given assets missing from the collection can be indexed , so a re-processing pushes its chunks alone
+    async def index_project(self , project : Project , progress_callback : Callable = None , asset_ids : list = None ,
+                            missing_only : bool = False):
+
+        embed_queue = asyncio.Queue(maxsize = self.queue_size)
+        write_queue = asyncio.Queue(maxsize = self.queue_size)
+
+        started_at = time.perf_counter()
+
+        tasks = [
+            asyncio.create_task(self._read_stage(project = project , embed_queue = embed_queue ,
+                                                 asset_ids = asset_ids , missing_only = missing_only)),
+            asyncio.create_task(self._embed_workers(embed_queue = embed_queue , write_queue = write_queue)),
+            asyncio.create_task(self._write_stage(project = project , write_queue = write_queue ,
+                                                  progress_callback = progress_callback)),
+        ]
+
+        is_success = True
+        try:
+            # Waiting for the stages one by one as they finish , a failed stage raises and cancels the others
+            # so no stage stays blocked on a queue that will never be drained
+            for finished in asyncio.as_completed(tasks):
+                await finished
+        except Exception as e:
+            self.logger.error(f"Error while running the indexing pipeline : {e}")
+            is_success = False
+        finally:
+            for task in tasks:
+                if not task.done():
+                    task.cancel()
+            await asyncio.gather(*tasks , return_exceptions = True)
+
+        self.logger.info(
+            f"Indexing pipeline for project {project.project_id} finished in "
+            f"{time.perf_counter() - started_at:.2f}s : {self.get_stage_stats()}"
+        )
+
+        return is_success , self.stage_counters["write"].items
+
+    # A function to get the counters of every stage as a dictionary
+    def get_stage_stats(self):
+        return {name : counter.to_dict() for name , counter in self.stage_counters.items()}
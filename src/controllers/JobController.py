@@ -0,0 +1,514 @@
+# Importing Base Controller for inheritance and the controllers the jobs run
+from .BaseController import BaseController
+from .ProcessController import ProcessController , FileParsingError
+from .NLPController import NLPController
+from .IndexController import IndexController
+
+from models import ResponseSignal , JobTypeEnums , JobStatusEnums
+from models.db_schemas import Job , DataChunk
+from models.JobModel import JobModel
+from models.ProjectModel import ProjectModel
+from models.ChunkModel import ChunkModel
+from models.AssetModel import AssetModel
+from dataclasses import dataclass , field
+from datetime import datetime , timezone
+import asyncio
+import logging
+import os
+import socket
+
+
+# Error raised by a job to fail it with a response signal
+class JobError(Exception):
+
+    def __init__(self , signal : str):
+        super().__init__(signal)
+        self.signal = signal
+
+
+# The progress of the running job , the job updates it and it's flushed to the database periodically
+@dataclass
+class JobProgress:
+    processed_items : int = 0
+    total_items : int = None
+
+    def update(self , items : int = 1):
+        self.processed_items += items
+
+
+# The counts of the chunks of a processed file , or of all the files of a job once they're added up
+# The configs of the re-chunked assets are stored once the job has indexed their chunks
+@dataclass
+class ProcessedFile:
+    inserted_chunks : int = 0
+    kept_chunks : int = 0
+    deleted_chunks : int = 0
+    skipped_files : int = 0
+    asset_configs : dict = field(default_factory = dict)
+
+    def add(self , other : "ProcessedFile"):
+        self.inserted_chunks += other.inserted_chunks
+        self.kept_chunks += other.kept_chunks
+        self.deleted_chunks += other.deleted_chunks
+        self.skipped_files += other.skipped_files
+        self.asset_configs.update(other.asset_configs)
+
+
+class JobController(BaseController):
+
+    # Initialiazation function to initiate the super class
+    # The resources are the shared clients , the FastAPI app in the API or a plain object in the worker process
+    def __init__(self , resources , job_model : JobModel , worker_id : str = None):
+
+        super().__init__()
+
+        self.resources = resources
+        self.job_model = job_model
+
+        # Every worker has its own ID so the jobs show which host and process ran them
+        self.worker_id = worker_id or f"{socket.gethostname()}-{os.getpid()}-{self.generate_random_string(6)}"
+
+        self.logger = logging.getLogger('uvicorn.error')
+
+    # Creating the NLP controller of a job from the shared clients
+    def create_nlp_controller(self):
+        return NLPController(
+            vectordb_client = self.resources.vectordb_client,
+            generation_client = self.resources.generation_client,
+            embedding_client = self.resources.embedding_client,
+            template_parser = self.resources.template_parser,
+            answer_cache = self.resources.answer_cache
+        )
+
+    # A function to queue a job of a project
+    async def enqueue_job(self , job_type : str , project_id : int , params : dict , total_items : int = None):
+
+        job = Job(
+            job_type = job_type,
+            job_project_id = project_id,
+            job_params = params,
+            job_total_items = total_items
+        )
+
+        return await self.job_model.create_job(job = job)
+
+    # A function to get the progress of a job with its throughput and the estimated remaining time
+    def get_job_progress(self , job : Job):
+
+        processed_items , total_items = job.job_processed_items or 0 , job.job_total_items
+        throughput , eta_seconds , progress = None , None , None
+
+        if total_items:
+            progress = round(min(processed_items / total_items , 1.0) * 100 , 2)
+
+        # The throughput is measured from the job start to its end or to now if it's still running
+        if job.started_at is not None:
+            ended_at = job.finished_at or datetime.now(timezone.utc)
+            elapsed_seconds = (ended_at - job.started_at).total_seconds()
+            if elapsed_seconds > 0:
+                throughput = round(processed_items / elapsed_seconds , 2)
+
+        if job.job_status == JobStatusEnums.RUNNING.value and throughput and total_items:
+            eta_seconds = round(max(total_items - processed_items , 0) / throughput , 1)
+
+        return {
+            "job_id" : job.job_id,
+            "job_type" : job.job_type,
+            "status" : job.job_status,
+            "project_id" : job.job_project_id,
+            "processed_items" : processed_items,
+            "total_items" : total_items,
+            "progress_percent" : progress,
+            "items_per_second" : throughput,
+            "eta_seconds" : eta_seconds,
+            "attempts" : job.job_attempts,
+            "result" : job.job_result,
+            "error" : job.job_error,
+            "created_at" : job.created_at.isoformat() if job.created_at else None,
+            "started_at" : job.started_at.isoformat() if job.started_at else None,
+            "finished_at" : job.finished_at.isoformat() if job.finished_at else None
+        }
+
+    # The worker loop , it claims the pending jobs one by one until the stop event is set
+    # The current job is finished before stopping , cancelling the worker puts its job back in the queue
+    async def run_worker(self , stop_event : asyncio.Event):
+
+        self.logger.info(f"Job worker {self.worker_id} started")
+
+        while not stop_event.is_set():
+
+            try:
+                job = await self.job_model.claim_next_job(worker_id = self.worker_id)
+
+                # Recovering the jobs of the dead workers while there's nothing to do
+                if job is None:
+                    _ = await self.job_model.requeue_stale_jobs(
+                        stale_after_seconds = self.app_settings.JOB_STALE_AFTER_SECONDS,
+                        max_attempts = self.app_settings.JOB_MAX_ATTEMPTS
+                    )
+            except Exception as e:
+                self.logger.error(f"Job worker {self.worker_id} couldn't claim a job : {e}")
+                job = None
+
+            if job is None:
+                try:
+                    await asyncio.wait_for(stop_event.wait() , timeout = self.app_settings.JOB_POLL_INTERVAL_SECONDS)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            # A failure storing the status of the job mustn't stop the worker , the job is recovered once it's stale
+            try:
+                await self.run_job(job = job)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.logger.error(f"Job worker {self.worker_id} couldn't finish job {job.job_id} : {e}")
+
+        self.logger.info(f"Job worker {self.worker_id} stopped")
+
+    # A function to run a claimed job and store its final status
+    async def run_job(self , job : Job):
+
+        progress = JobProgress(total_items = job.job_total_items)
+
+        # The jobs change the vector collection of the project , its collection version is bumped before and after them
+        # so every process drops the answers cached from the old collection and the ones cached while the job ran
+        await self.bump_collection_version(project_id = job.job_project_id)
+
+        reporter = asyncio.create_task(self.report_progress(job_id = job.job_id , progress = progress))
+
+        try:
+            if job.job_type in (JobTypeEnums.PROCESS_FILE_CHUNKS.value , JobTypeEnums.PROCESS_FILE.value):
+                result = await self.run_process_job(job = job , progress = progress)
+            elif job.job_type == JobTypeEnums.INDEX_PUSH.value:
+                result = await self.run_index_job(job = job , progress = progress)
+            else:
+                raise ValueError(f"Unknown job type : {job.job_type}")
+
+        except asyncio.CancelledError:
+            # The worker is stopping , another worker picks the job up from the start
+            reporter.cancel()
+            await self.job_model.requeue_job(job_id = job.job_id , worker_id = self.worker_id)
+            await self.bump_collection_version(project_id = job.job_project_id)
+            raise
+
+        except JobError as e:
+            reporter.cancel()
+            await self.bump_collection_version(project_id = job.job_project_id)
+            await self.job_model.fail_job(job_id = job.job_id , worker_id = self.worker_id , error = e.signal ,
+                                          processed_items = progress.processed_items , total_items = progress.total_items)
+            return False
+
+        except Exception as e:
+            reporter.cancel()
+            self.logger.exception(f"Job {job.job_id} failed")
+            await self.bump_collection_version(project_id = job.job_project_id)
+            await self.job_model.fail_job(job_id = job.job_id , worker_id = self.worker_id , error = str(e) ,
+                                          processed_items = progress.processed_items , total_items = progress.total_items)
+            return False
+
+        reporter.cancel()
+        await self.bump_collection_version(project_id = job.job_project_id)
+        await self.job_model.finish_job(job_id = job.job_id , worker_id = self.worker_id , result = result ,
+                                        processed_items = progress.processed_items , total_items = progress.total_items)
+        return True
+
+    # Bumping the collection version of the project of a job , a failure is only logged
+    # and the answers cached by the other processes still expire with their time to live
+    async def bump_collection_version(self , project_id : int):
+        try:
+            project_model = await ProjectModel.create_instance(db_client = self.resources.db_client)
+            _ = await project_model.bump_collection_version(project_id = project_id)
+        except Exception as e:
+            self.logger.error(f"Couldn't bump the collection version of project {project_id} : {e}")
+
+    # Flushing the progress of the running job to the database periodically , it's written even if it didn't change
+    # so the job keeps a heartbeat while a long step is running
+    async def report_progress(self , job_id : int , progress : JobProgress):
+
+        while True:
+            await asyncio.sleep(self.app_settings.JOB_PROGRESS_INTERVAL_SECONDS)
+            try:
+                await self.job_model.update_job_progress(job_id = job_id , worker_id = self.worker_id ,
+                                                         processed_items = progress.processed_items ,
+                                                         total_items = progress.total_items)
+            except Exception as e:
+                self.logger.error(f"Couldn't update the progress of job {job_id} : {e}")
+
+    # The file processing job , it chunks the files of the project and stores the chunks in the database
+    # Every file is one item of the progress
+    # An incremental job skips the unchanged files , keeps the unchanged chunks and only embeds the new ones
+    async def run_process_job(self , job : Job , progress : JobProgress):
+
+        params = job.job_params
+        project_file_ids = params["file_ids"]
+        progress.total_items = len(project_file_ids)
+
+        # Creating instances for chunks , assets and projects to be stored in the database
+        chunk_model = await ChunkModel.create_instance(db_client = self.resources.db_client)
+        asset_model = await AssetModel.create_instance(db_client = self.resources.db_client)
+        project_model = await ProjectModel.create_instance(db_client = self.resources.db_client)
+        project = await project_model.get_project_or_create_project(project_id = job.job_project_id)
+
+        process_controller = ProcessController(project_id = job.job_project_id , parser_pool = self.resources.parser_pool ,
+                                               blob_store = self.resources.blob_store)
+        nlp_controller = self.create_nlp_controller()
+
+        # A reset deletes every chunk so there's nothing left to compare with , it's a full re-processing
+        is_incremental = bool(params.get("incremental")) and job.job_type == JobTypeEnums.PROCESS_FILE_CHUNKS.value
+        if params.get("do_reset") == 1:
+            is_incremental = False
+
+        # the do reset flag , If it's one , we will delete the collection associated with this project
+        # And also we will delete the chunks associated with this project before inserting any
+        if params.get("do_reset") == 1:
+            _ = await nlp_controller.reset_vectordb_collection(project = project)
+            _ = await chunk_model.delete_chunks_by_project_id(project_id = project.project_id)
+
+        # Getting the stored config of every asset , it has the content hash of the file it was processed from
+        assets = { asset.asset_id : asset for asset in await asset_model.get_all_project_assets(asset_project_id = project.project_id) }
+
+        chunking = {
+            "chunker" : params.get("chunker") or self.app_settings.PROCESSING_DEFAULT_CHUNKER,
+            "chunk_size" : params.get("chunk_size"),
+            "overlap_size" : params.get("overlap_size")
+        }
+
+        files_stats = ProcessedFile()
+        no_files = 0
+
+        # Processing the files in parallel , as many at once as the parser pool workers
+        file_slots = asyncio.Semaphore(process_controller.parser_pool.workers if process_controller.parser_pool else 1)
+
+        async def process_file(asset_id : int , file_id : str):
+            async with file_slots:
+                try:
+                    if job.job_type == JobTypeEnums.PROCESS_FILE_CHUNKS.value:
+                        return await self.process_file_chunks(process_controller = process_controller , chunk_model = chunk_model ,
+                                                              asset_model = asset_model , nlp_controller = nlp_controller ,
+                                                              project = project , asset = assets.get(asset_id) ,
+                                                              asset_id = asset_id , file_id = file_id ,
+                                                              chunking = chunking , is_incremental = is_incremental)
+
+                    return await self.process_whole_file(process_controller = process_controller , chunk_model = chunk_model ,
+                                                         project = project , asset = assets.get(asset_id) ,
+                                                         asset_id = asset_id , file_id = file_id)
+
+                # If the file can't be parsed at all we will log an error and continue for the other files
+                # A file that failed after some of its chunks were stored fails the whole job
+                except FileParsingError as e:
+                    if e.is_partial:
+                        raise JobError(ResponseSignal.PROCESSING_FAILED.value)
+                    self.logger.error(f"Error while processing file : {file_id}")
+                    return None
+
+        file_tasks = [asyncio.create_task(process_file(asset_id , file_id)) for asset_id , file_id in project_file_ids]
+
+        try:
+            # Now counting every processed file of the project
+            for processed_file in asyncio.as_completed(file_tasks):
+
+                file_stats = await processed_file
+                progress.update()
+
+                if file_stats is None:
+                    continue
+
+                files_stats.add(file_stats)
+                no_files += 1
+
+        finally:
+            for task in file_tasks:
+                task.cancel()
+
+        # Pushing the chunks of the re-chunked files that are missing from the collection , a project that was never indexed
+        # is left to the index push. The kept chunks are checked too , a failed or retried run may have stored them without indexing them
+        indexed_chunks = 0
+        if is_incremental and files_stats.asset_configs and await nlp_controller.is_vector_collection_existed(project = project):
+            indexed_chunks = await self.index_new_chunks(nlp_controller = nlp_controller , chunk_model = chunk_model ,
+                                                         project = project , asset_ids = list(files_stats.asset_configs))
+
+        # Storing the file hashes and the chunking only now , a file marked as processed before its chunks are indexed
+        # would be skipped by the next incremental processing and its chunks would never reach the collection
+        for asset_id , asset_config in files_stats.asset_configs.items():
+            _ = await asset_model.update_asset_config(asset_id = asset_id , asset_config = asset_config)
+
+        return {
+            "signal" : ResponseSignal.PROCESSING_SUCCESS.value,
+            "inserted_chunks" : files_stats.inserted_chunks,
+            "kept_chunks" : files_stats.kept_chunks,
+            "deleted_chunks" : files_stats.deleted_chunks,
+            "indexed_chunks" : indexed_chunks,
+            "processed_file" : no_files,
+            "skipped_files" : files_stats.skipped_files
+        }
+
+    # Chunking a file and storing its chunks , the file is read window by window and the chunks are inserted in batches
+    # so neither the file nor its chunks are ever held whole in memory
+    # An incremental processing skips the file if it didn't change since it was processed with the same chunking ,
+    # otherwise it keeps the stored chunks whose hash is produced again , inserts the new ones and deletes the vanished ones
+    async def process_file_chunks(self , process_controller : ProcessController , chunk_model : ChunkModel ,
+                                  asset_model : AssetModel , nlp_controller : NLPController ,
+                                  project , asset , asset_id : int , file_id : str ,
+                                  chunking : dict , is_incremental : bool = False):
+
+        # The content of the file is stored as a blob named by its hash , the hash is the blob key
+        asset_config = dict(asset.asset_config or {}) if asset is not None else {}
+        blob_key = asset.asset_hash if asset is not None else None
+        file_hash = await process_controller.get_file_hash_async(file_id = file_id , blob_key = blob_key)
+        if file_hash is None:
+            raise FileParsingError(file_id = file_id)
+
+        # The stored chunks of the file grouped by their hash , a hash can be repeated in a file
+        stored_chunks = {}
+        if is_incremental:
+            for chunk_id , chunk_hash , chunk_order in await chunk_model.get_asset_chunk_hashes(asset_id = asset_id):
+                stored_chunks.setdefault(chunk_hash , []).append((chunk_id , chunk_order))
+
+            if stored_chunks and asset_config.get("content_hash") == file_hash and asset_config.get("chunking") == chunking:
+                return ProcessedFile(kept_chunks = sum(len(chunks) for chunks in stored_chunks.values()) , skipped_files = 1)
+
+        # Every file gets its own chunker , the chunk size and the overlap are in tokens for the token chunker
+        chunker = process_controller.create_chunker(chunker_name = chunking["chunker"] , chunk_size = chunking["chunk_size"] ,
+                                                    overlap_size = chunking["overlap_size"])
+        if chunker is None:
+            raise JobError(ResponseSignal.PROCESSING_FAILED.value)
+
+        batch_size = self.app_settings.PROCESSING_INSERT_BATCH_SIZE
+        batch , chunk_order , chunks_orders = [] , 0 , []
+        file_stats = ProcessedFile()
+
+        async for chunk in process_controller.iterate_file_chunks(file_id = file_id , chunker = chunker , blob_key = blob_key):
+
+            chunk_order += 1
+            chunk_hash = process_controller.get_chunk_hash(text = chunk.page_content , metadata = chunk.metadata)
+
+            # Keeping a stored chunk with the same hash , only its order is updated if it moved
+            if stored_chunks.get(chunk_hash):
+                stored_chunk_id , stored_chunk_order = stored_chunks[chunk_hash].pop(0)
+                if stored_chunk_order != chunk_order:
+                    chunks_orders.append({"chunk_id" : stored_chunk_id , "chunk_order" : chunk_order})
+                file_stats.kept_chunks += 1
+                continue
+
+            # Creating the chunk as a row of the chunks table , the bulk insert doesn't need ORM objects
+            batch.append({
+                "chunk_text" : chunk.page_content,
+                "chunk_metadata" : chunk.metadata,
+                "chunk_order" : chunk_order,
+                "chunk_hash" : chunk_hash,
+                "chunk_project_id" : project.project_id,
+                "chunk_asset_id" : asset_id
+            })
+
+            if len(batch) >= batch_size:
+                file_stats.inserted_chunks += await chunk_model.insert_many_chunks(batch)
+                batch = []
+
+        if batch:
+            file_stats.inserted_chunks += await chunk_model.insert_many_chunks(batch)
+
+        # A file without any chunk means the processing failed
+        if chunk_order == 0:
+            raise JobError(ResponseSignal.PROCESSING_FAILED.value)
+
+        # The stored chunks that weren't produced again vanished from the file
+        # Their vectors are deleted first since they reference the chunks
+        vanished_chunks_ids = [ chunk_id for chunks in stored_chunks.values() for chunk_id , _ in chunks ]
+        if vanished_chunks_ids:
+            _ = await nlp_controller.delete_from_vector_db(project = project , chunks_ids = vanished_chunks_ids)
+            file_stats.deleted_chunks = await chunk_model.delete_chunks_by_ids(chunk_ids = vanished_chunks_ids)
+
+        _ = await chunk_model.update_chunks_order(chunks_orders = chunks_orders)
+
+        # The file hash and the chunking it was processed with , the next incremental processing compares with them
+        # They're stored by the job after the chunks are indexed
+        asset_config.update({"content_hash" : file_hash , "chunking" : chunking})
+        file_stats.asset_configs[asset_id] = asset_config
+
+        return file_stats
+
+    # Storing a whole file as a single document chunk , it needs the whole file text so it's loaded at once
+    async def process_whole_file(self , process_controller : ProcessController , chunk_model : ChunkModel ,
+                                 project , asset , asset_id : int , file_id : str):
+
+        blob_key = asset.asset_hash if asset is not None else None
+        file_content = await process_controller.get_file_content_async(file_id = file_id , blob_key = blob_key)
+        if file_content is None:
+            raise FileParsingError(file_id = file_id)
+
+        # Now getting the whole file as a single document
+        file_chunk = process_controller.process_file_content_all(file_content = file_content , file_id = file_id)
+        if file_chunk is None:
+            raise JobError(ResponseSignal.PROCESSING_FAILED.value)
+
+        _ = await chunk_model.insert_chunk(chunk = DataChunk(
+            chunk_text = file_chunk.page_content,
+            chunk_metadata = file_chunk.metadata,
+            chunk_type = 'Document',
+            chunk_order = 0,
+            chunk_hash = process_controller.get_chunk_hash(text = file_chunk.page_content , metadata = file_chunk.metadata),
+            chunk_project_id = project.project_id,
+            chunk_asset_id = asset_id
+        ))
+
+        return ProcessedFile(inserted_chunks = 1)
+
+    # Embedding and pushing the chunks of some assets that are missing from the existing collection of the project
+    # It returns the number of indexed chunks
+    async def index_new_chunks(self , nlp_controller : NLPController , chunk_model : ChunkModel , project , asset_ids : list):
+
+        index_controller = IndexController(nlp_controller = nlp_controller , chunk_model = chunk_model)
+        is_inserted , inserted_items_count = await index_controller.index_project(project = project ,
+                                                                                   asset_ids = asset_ids ,
+                                                                                   missing_only = True)
+
+        if not is_inserted:
+            raise JobError(ResponseSignal.INSERT_INTO_VECTOR_DB_ERROR.value)
+
+        # The vector index is refreshed in the background like after an index push
+        _ = await self.resources.vectordb_client.schedule_index_build(
+            collection_name = nlp_controller.create_collection_name(project_id = project.project_id)
+        )
+
+        return inserted_items_count
+
+    # The indexing job , it pushes the project chunks into the vector database then schedules the index build
+    # Every written chunk is one item of the progress
+    async def run_index_job(self , job : Job , progress : JobProgress):
+
+        params = job.job_params
+
+        chunk_model = await ChunkModel.create_instance(db_client = self.resources.db_client)
+        project_model = await ProjectModel.create_instance(db_client = self.resources.db_client)
+        project = await project_model.get_project_or_create_project(project_id = job.job_project_id)
+
+        nlp_controller = self.create_nlp_controller()
+
+        # Inserting the collection in the vector database , resetting it drops the cached answers of the project
+        _ = await nlp_controller.create_vector_collection(project = project , do_reset = params.get("do_reset"))
+
+        progress.total_items = await chunk_model.get_total_chunks_count(project_id = project.project_id)
+
+        # Running the indexing pipeline and counting every written page
+        index_controller = IndexController(nlp_controller = nlp_controller , chunk_model = chunk_model)
+        is_inserted , inserted_items_count = await index_controller.index_project(
+            project = project,
+            progress_callback = progress.update
+        )
+
+        if not is_inserted:
+            raise JobError(ResponseSignal.INSERT_INTO_VECTOR_DB_ERROR.value)
+
+        # Now the load has finished , the vector index is built in the background with the tuning of this push
+        _ = await self.resources.vectordb_client.schedule_index_build(
+            collection_name = nlp_controller.create_collection_name(project_id = project.project_id),
+            index_params = params.get("index_params")
+        )
+
+        return {
+            "signal" : ResponseSignal.INSERT_INTO_VECTOR_DB_SUCCESS.value,
+            "inserted_items_count" : inserted_items_count,
+            "stages" : index_controller.get_stage_stats()
+        }
@@ -2,15 +2,24 @@
 from .BaseController import BaseController
 
 from models.db_schemas import Project , DataChunk
+from models import ResponseSignal , StreamEventEnums
 from stores.llm.LLMEnum import DocumentTypeEnums
+from stores.vectordb.VectorDBEnums import SearchModeEnums
+from stores.llm.ContextPacker import PackedContext
 from typing import List
 import json
+import logging
+import time
 
 class NLPController(BaseController):
     
     # Initialiazation function to initiate the super class
     # It's made if we need to broader the initialization of the project controller class
-    def __init__(self,vectordb_client , generation_client , embedding_client , template_parser):
+    # The answer cache is optional , the answers aren't cached without it
+    # The reranking stage is optional too , without it the search results go straight into the prompt
+    # The context packer fits the documents in a budget of tokens , without it every retrieved document is sent
+    def __init__(self,vectordb_client , generation_client , embedding_client , template_parser , answer_cache = None ,
+                 reranking_stage = None , context_packer = None):
         
         super().__init__()
 
@@ -19,19 +28,45 @@ class NLPController(BaseController):
         self.generation_client = generation_client
         self.embedding_client = embedding_client
         self.template_parser = template_parser
+        self.answer_cache = answer_cache
+        self.reranking_stage = reranking_stage
+        self.context_packer = context_packer
+
+        self.logger = logging.getLogger('uvicorn.error')
 
     # Creating the collection name of the vectors in the database by combining the vector_size , the project_id
     # and the collection_ standart
     def create_collection_name(self , project_id : str):
         return f"collection_{self.vectordb_client.default_vector_size}_{project_id}".strip()
     
+    # Dropping the cached answers of a project from the cache of this process , they're stale once its collection changes
+    # The other processes drop theirs once the job that changed the collection bumps the collection version of the project
+    def invalidate_answer_cache(self , project : Project):
+        if self.answer_cache is not None:
+            self.answer_cache.invalidate(project_id = project.project_id)
+
     # Reseting the collection of the database by deleteing it if needed
     async def reset_vectordb_collection(self , project : Project):
 
         # We get the collection name we want to delete then delete it by the db client
         collection_name = self.create_collection_name(project_id=project.project_id)
+        self.invalidate_answer_cache(project = project)
         return await self.vectordb_client.delete_collection(collection_name=collection_name)
 
+    # Creating the collection of the project , it's reset first if asked to
+    async def create_vector_collection(self , project : Project , do_reset : bool = False):
+
+        collection_name = self.create_collection_name(project_id = project.project_id)
+
+        if do_reset:
+            self.invalidate_answer_cache(project = project)
+
+        return await self.vectordb_client.create_collection(
+            collection_name = collection_name,
+            embedding_size = self.embedding_client.embedding_size,
+            do_reset = do_reset
+        )
+
     # A function to get the collection info if we wanted
     async def get_vector_collection_info(self , project : Project):
         
@@ -50,57 +85,135 @@ class NLPController(BaseController):
                              chunks_ids : List[int],
                              do_reset : bool = False):
 
-        # Getting the collection name we want to save the chunks in for making the collection and saving the chunks
+        # Getting the vectors for each chunk text
+        vectors = await self.embed_chunks(chunks = chunks)
+
+        # Validating the vectors were returned from the embedding client
+        if not vectors:
+            return False
+
+        # First before inserting the texts we create a collection in the database
+        _ = await self.create_vector_collection(project = project , do_reset = do_reset)
+
+        # Now inserting the chunks with its vectors in the database
+        return await self.insert_into_vector_db(project = project , chunks = chunks , chunks_ids = chunks_ids , vectors = vectors)
+
+    # This function is to get the embedding vectors of a list of chunks
+    async def embed_chunks(self , chunks : List[DataChunk]):
+
+        # Now getting the texts of the chunks
+        texts = [chunk.chunk_text for chunk in chunks]
+
+        # Getting the vectors for each text in the texts list
+        vectors = await self.embedding_client.embed_text_async(text=texts,document_type = DocumentTypeEnums.DOCUMENT.value)
+
+        # Validating the vectors were returned from the embedding client
+        if not vectors or len(vectors) != len(texts):
+            return None
+
+        return vectors
+
+    # This function is to insert already embedded chunks into an existing collection
+    async def insert_into_vector_db(self , project : Project ,
+                                    chunks : List[DataChunk] ,
+                                    chunks_ids : List[int] ,
+                                    vectors : List[List[float]]):
+
+        # Getting the collection name we want to save the chunks in
         collection_name = self.create_collection_name(project_id= project.project_id)
 
         # Now getting the texts of the chunks and the metadatas
         texts = [chunk.chunk_text for chunk in chunks]
 
-        # Assign Metadatas for each chunk
-        metadatas = [chunk.chunk_metadata for chunk in chunks]
+        # Assign Metadatas for each chunk , with the asset of the chunk so the searches can be filtered on it
+        metadatas = [ {**(chunk.chunk_metadata or {}) , "asset_id" : chunk.chunk_asset_id} for chunk in chunks ]
 
-        # Getting the vectors for each text in the texts list
-        vectors = self.embedding_client.embed_text(text=texts,document_type = DocumentTypeEnums.DOCUMENT.value)
+        # Now inserting the chunks with its vectors in the database
+        is_inserted = await self.vectordb_client.insert_many(collection_name = collection_name , texts = texts , metadata = metadatas , vectors = vectors , record_ids = chunks_ids)
 
-        # First before inserting the texts we create a collection in the database
-        _ = await self.vectordb_client.create_collection(collection_name = collection_name , embedding_size = self.embedding_client.embedding_size, do_reset = do_reset)
+        # The collection changed so the cached answers of the project may be stale now
+        self.invalidate_answer_cache(project = project)
 
-        # Now inserting the chunks with its vectors in the database
-        await self.vectordb_client.insert_many(collection_name = collection_name , texts = texts , metadata = metadatas , vectors = vectors , record_ids = chunks_ids)
+        # Returning the inserting status as a flag
+        return bool(is_inserted)
 
-        return True
+    # This function is to delete the records of some chunks from the vector database
+    # It has to run before the chunks themselves are deleted
+    async def delete_from_vector_db(self , project : Project , chunks_ids : List[int]):
 
-    # This function is to search the vector database with the query of the user and return the most related 100 results
-    async def search_vector_db_collection(self , project : Project , text : str , limit : int = 100):
+        if not chunks_ids:
+            return 0
+
+        collection_name = self.create_collection_name(project_id = project.project_id)
+        deleted_count = await self.vectordb_client.delete_by_record_ids(collection_name = collection_name , record_ids = chunks_ids)
+
+        # The collection changed so the cached answers of the project may be stale now
+        self.invalidate_answer_cache(project = project)
+
+        return deleted_count
+
+    # This function is to get the IDs among the given chunks IDs that are already stored in the vector database
+    async def get_indexed_chunks_ids(self , project : Project , chunks_ids : List[int]):
 
-        # Setting the query vectoy = None
-        query_vector = None
+        if not chunks_ids:
+            return set()
+
+        collection_name = self.create_collection_name(project_id = project.project_id)
+        return await self.vectordb_client.get_existing_record_ids(collection_name = collection_name , record_ids = chunks_ids)
+
+    # Checking if the collection of the project exists , a project that was never indexed has none
+    async def is_vector_collection_existed(self , project : Project):
+        collection_name = self.create_collection_name(project_id = project.project_id)
+        return bool(await self.vectordb_client.is_collection_existed(collection_name = collection_name))
+
+    # This function is to search the vector database with the query of the user and return the most related 100 results
+    # The accuracy picks the search profile , fast , balanced or exact
+    # The mode picks the search , by vector , by the words of the query or both fused , the default is from the settings
+    # The query vector can be passed if the query was already embedded
+    # The filters scope the search to some assets , chunks , metadata values or ranges of them
+    async def search_vector_db_collection(self , project : Project , text : str , limit : int = 100 , accuracy : str = None ,
+                                          query_vector : List[float] = None , mode : str = None , filters : dict = None):
 
         # Creating the collection name we want to search in
         collection_name = self.create_collection_name(project_id= project.project_id)
+        mode = mode or self.app_settings.VECTOR_DB_DEFAULT_SEARCH_MODE
+
+        # The lexical search only needs the words of the query , nothing is embedded
+        if mode == SearchModeEnums.LEXICAL.value:
+            results = await self.vectordb_client.search_by_text(
+                collection_name = collection_name,
+                text = text,
+                limit = limit,
+                filters = filters
+            )
+            return results if results else False
 
         # Now getting the vector of the query the user asked for
-        vectors = self.embedding_client.embed_text(text , document_type = DocumentTypeEnums.QUERY.value)
-
-        # Validation of the vectors existence and it's length
-        if not vectors or len(vectors) == 0:
-            return False
-        
-        # Validation if the vectors is already a list and has a length then setting the query vector as vector[0]
-        # Because the embedding vectors consists of list of lists and has only one list in the second dimension
-        if isinstance(vectors,List) and len(vectors) > 0:
-            query_vector = vectors[0]
+        if not query_vector:
+            query_vector = await self.embed_query(text = text)
 
         # Validating the Query Vector existence
         if not query_vector:
             return False
         
-        # Searching the vector database in the collection with the query vector and return the results
-        results = await self.vectordb_client.search_by_vector(
-            collection_name = collection_name,
-            vector = query_vector,
-            limit = limit
-        )
+        # Searching the vector database in the collection with the query vector , and its words in the hybrid mode
+        if mode == SearchModeEnums.HYBRID.value:
+            results = await self.vectordb_client.search_hybrid(
+                collection_name = collection_name,
+                vector = query_vector,
+                text = text,
+                limit = limit,
+                accuracy = accuracy,
+                filters = filters
+            )
+        else:
+            results = await self.vectordb_client.search_by_vector(
+                collection_name = collection_name,
+                vector = query_vector,
+                limit = limit,
+                accuracy = accuracy,
+                filters = filters
+            )
 
         # Validating the results returned
         if not results:
@@ -109,38 +222,98 @@ class NLPController(BaseController):
         # If there are results then return it
         return results
     
-    # This function is to answer the query of the user
-    async def answer_rag_question(self,project : Project , query : str , limit : int = 10):
-        
-        # Setting initial values for answer , full prompt and chat history
-        answer , full_prompt , chat_history = None , None , None
+    # This function is to search the vector database with many queries at once
+    # All the queries are embedded in one call and searched in one round trip , the results come back per query
+    async def search_vector_db_collection_batch(self , project : Project , texts : List[str] , limit : int = 10 ,
+                                                accuracy : str = None , filters : dict = None):
 
-        # Now retrieve the related documents to the user query
-        retrieved_documents = await self.search_vector_db_collection(project= project , text= query , limit = limit)
+        # Creating the collection name we want to search in
+        collection_name = self.create_collection_name(project_id = project.project_id)
 
+        # Embedding all the queries in a single call
+        query_vectors = await self.embedding_client.embed_text_async(texts , document_type = DocumentTypeEnums.QUERY.value)
+        if not query_vectors or len(query_vectors) != len(texts):
+            return False
+
+        results = await self.vectordb_client.search_by_vectors(
+            collection_name = collection_name,
+            vectors = query_vectors,
+            limit = limit,
+            accuracy = accuracy,
+            filters = filters
+        )
+
+        # Validating the results returned
+        if results is False or results is None:
+            return False
+
+        return results
+
+    # This function is to retrieve the documents of the prompt of a query
+    # With a reranking stage the search over-fetches candidates and only the top limit of them are kept after reranking
+    async def retrieve_documents(self , project : Project , query : str , limit : int = 10 , accuracy : str = None ,
+                                 query_vector : List[float] = None , mode : str = None , filters : dict = None):
+
+        candidates_count = limit
+        if self.reranking_stage is not None:
+            candidates_count = self.reranking_stage.get_candidates_count(top_k = limit)
+
+        retrieved_documents = await self.search_vector_db_collection(project = project , text = query , limit = candidates_count ,
+                                                                     accuracy = accuracy , query_vector = query_vector , mode = mode ,
+                                                                     filters = filters)
+
+        if not retrieved_documents or self.reranking_stage is None:
+            return retrieved_documents
+
+        return await self.reranking_stage.rerank(query = query , documents = retrieved_documents , top_k = limit)
+
+    # This function is to get the embedding vector of a query
+    async def embed_query(self , text : str):
+
+        vectors = await self.embedding_client.embed_text_async(text , document_type = DocumentTypeEnums.QUERY.value)
+
+        # Validation of the vectors existence and it's length
+        if not vectors or len(vectors) == 0:
+            return None
+
+        # The embedding vectors consists of list of lists and has only one list in the second dimension
+        if isinstance(vectors,List):
+            return vectors[0]
+
+        return None
+
+    # This function is to build the full prompt and the chat history of a query from its retrieved documents
+    # It returns the packed context too , the documents that made it into the prompt and the tokens it takes
+    def build_rag_prompt(self , query : str , retrieved_documents : list):
 
-        # If there's and error with the retrieved documents return these None Values
-        if not retrieved_documents or len(retrieved_documents) ==0:
-            return answer , full_prompt , chat_history
-        
         # Setting the system promt with the template parser values , Defines assistant behavior
         system_prompt = self.template_parser.get("rag" , "system_prompt")
 
-        # Setting the document prompts with the template parser values , define document shape
-        document_prompts = "\n".join([
-            self.template_parser.get("rag" , "document_prompt",{
-                "doc_num" : idx+1,
-                "chunk_text" : self.generation_client.process_text(doc.text)
-            })
-            for idx , doc in enumerate(retrieved_documents)
-        ])
-
         # Setting the footer prompt with the template parser values , injecting the query of the user
         footer_prompt = self.template_parser.get("rag" , "footer_prompt",{
             "query" : query,
             
         })
 
+        # Setting the document prompts with the template parser values , define document shape
+        render_document = lambda doc_num , text: self.template_parser.get("rag" , "document_prompt",{
+            "doc_num" : doc_num,
+            "chunk_text" : self.generation_client.process_text(text)
+        })
+
+        # Packing the documents in score order within the budget , the system prompt and the footer are taken from it first
+        if self.context_packer is not None:
+            reserved_tokens = self.context_packer.count_tokens(system_prompt) + self.context_packer.count_tokens(footer_prompt) + 2
+            context = self.context_packer.pack(documents = retrieved_documents , render = render_document ,
+                                               reserved_tokens = reserved_tokens)
+        else:
+            context = PackedContext(
+                documents = list(retrieved_documents),
+                prompts = [ render_document(idx+1 , doc.text) for idx , doc in enumerate(retrieved_documents) ]
+            )
+
+        document_prompts = "\n".join(context.prompts)
+
         # Construciton chat history if there's one
         chat_history = [
             self.generation_client.construct_prompt(
@@ -152,15 +325,192 @@ class NLPController(BaseController):
         # Now construct the full prompt to be sent to the llm
         full_prompt = "\n\n".join([ document_prompts , footer_prompt ])
 
+        # Counting what the whole prompt costs , the system prompt is sent with it
+        if self.context_packer is not None:
+            context.prompt_tokens = self.context_packer.count_tokens(system_prompt) + self.context_packer.count_tokens(full_prompt)
+
+        return full_prompt , chat_history , context
+
+    # This function is to answer the query of the user
+    # The answers are cached per project , first by the normalized query then by the query vector similarity
+    # The filtered questions skip the cache , the cache keys don't hold the filters
+    # The accuracy and the mode are resolved to their defaults first so they're part of the cache keys
+    # The cached answers are only served while the collection version they were cached at is the project current one
+    async def answer_rag_question(self,project : Project , query : str , limit : int = 10 , accuracy : str = None ,
+                                  mode : str = None , filters : dict = None):
+        
+        # Setting initial values for answer , full prompt , chat history and the prompt tokens
+        answer , full_prompt , chat_history , prompt_tokens = None , None , None , None
+        answer_cache = self.answer_cache if not filters else None
+        accuracy = accuracy or self.app_settings.VECTOR_DB_DEFAULT_SEARCH_ACCURACY
+        mode = mode or self.app_settings.VECTOR_DB_DEFAULT_SEARCH_MODE
+        version = project.project_collection_version
+
+        # Looking the exact question up in the answer cache before embedding anything
+        if answer_cache is not None:
+            cached = answer_cache.get(project_id = project.project_id , query = query , limit = limit ,
+                                      accuracy = accuracy , mode = mode , version = version)
+            if cached is not None:
+                return cached.answer , cached.full_prompt , cached.chat_history , cached.prompt_tokens
+
+        # Embedding the query once , it's used by the semantic cache tier and the search
+        query_vector = await self.embed_query(text = query)
+        if not query_vector:
+            return answer , full_prompt , chat_history , prompt_tokens
+
+        # Looking a similar enough question up in the semantic tier of the cache
+        if answer_cache is not None:
+            cached = answer_cache.get_semantic(project_id = project.project_id , query_vector = query_vector , limit = limit ,
+                                               accuracy = accuracy , mode = mode , version = version)
+            if cached is not None:
+                return cached.answer , cached.full_prompt , cached.chat_history , cached.prompt_tokens
+
+        # Now retrieve the related documents to the user query
+        retrieved_documents = await self.retrieve_documents(project = project , query = query , limit = limit , accuracy = accuracy ,
+                                                            query_vector = query_vector , mode = mode , filters = filters)
+
+
+        # If there's and error with the retrieved documents return these None Values
+        if not retrieved_documents or len(retrieved_documents) ==0:
+            return answer , full_prompt , chat_history , prompt_tokens
+        
+        # Building the prompt from the retrieved documents , only the packed ones are sent
+        full_prompt , chat_history , context = self.build_rag_prompt(query = query , retrieved_documents = retrieved_documents)
+        prompt_tokens = context.prompt_tokens
+
         # Getting the answer from the LLM to send back to the user
         answer = self.generation_client.generate_text(
             prompt = full_prompt,
             chat_history = chat_history
         )
 
-        # Now to the user send back the answer , the full prompt and the chat history
-        return answer , full_prompt , chat_history
+        # Caching the answer so the same question doesn't go through the retrieval and the generation again
+        if answer and answer_cache is not None:
+            answer_cache.set(project_id = project.project_id , query = query , limit = limit ,
+                             answer = answer , full_prompt = full_prompt , chat_history = chat_history ,
+                             query_vector = query_vector ,
+                             documents = [doc.dict() for doc in context.documents] ,
+                             prompt_tokens = prompt_tokens ,
+                             accuracy = accuracy , mode = mode , version = version)
+
+        # Now to the user send back the answer , the full prompt , the chat history and the tokens of the prompt
+        return answer , full_prompt , chat_history , prompt_tokens
     
+    # This function is to answer the query of the user as a stream of ( event , data ) pairs
+    # A metadata event with the retrieved documents and the retrieval timing leads , then the answer tokens
+    # as soon as the LLM sends them , then a done event , an error event is sent instead if anything fails
+    async def answer_rag_question_stream(self , project : Project , query : str , limit : int = 10 , accuracy : str = None ,
+                                         mode : str = None , filters : dict = None):
+
+        started_at = time.perf_counter()
+        answer_cache = self.answer_cache if not filters else None
+        accuracy = accuracy or self.app_settings.VECTOR_DB_DEFAULT_SEARCH_ACCURACY
+        mode = mode or self.app_settings.VECTOR_DB_DEFAULT_SEARCH_MODE
+        version = project.project_collection_version
+
+        # Looking the question up in the answer cache , the exact tier first then the semantic one
+        cached , query_vector = None , None
+        if answer_cache is not None:
+            cached = answer_cache.get(project_id = project.project_id , query = query , limit = limit ,
+                                      accuracy = accuracy , mode = mode , version = version)
+
+        if cached is None:
+            query_vector = await self.embed_query(text = query)
+            if not query_vector:
+                yield StreamEventEnums.ERROR.value , {"signal" : ResponseSignal.RAG_ANSWER_ERROR.value}
+                return
+
+            if answer_cache is not None:
+                cached = answer_cache.get_semantic(project_id = project.project_id , query_vector = query_vector , limit = limit ,
+                                                   accuracy = accuracy , mode = mode , version = version)
+
+        # A cached answer is sent whole as a single token
+        if cached is not None:
+            yield StreamEventEnums.METADATA.value , {
+                "documents" : cached.documents or [],
+                "cached" : True,
+                "prompt_tokens" : cached.prompt_tokens,
+                "retrieval_ms" : self.elapsed_ms(started_at)
+            }
+            yield StreamEventEnums.TOKEN.value , cached.answer
+            yield StreamEventEnums.DONE.value , {
+                "signal" : ResponseSignal.RAG_ANSWER_SUCCESS.value,
+                "full_prompt" : cached.full_prompt,
+                "chat_history" : cached.chat_history,
+                "prompt_tokens" : cached.prompt_tokens,
+                "time_to_first_token_ms" : self.elapsed_ms(started_at),
+                "total_ms" : self.elapsed_ms(started_at)
+            }
+            return
+
+        # Now retrieve the related documents to the user query and build the prompt from them
+        # Only the packed documents are sent as the sources
+        try:
+            retrieved_documents = await self.retrieve_documents(project = project , query = query , limit = limit , accuracy = accuracy ,
+                                                                query_vector = query_vector , mode = mode , filters = filters)
+            if retrieved_documents:
+                full_prompt , chat_history , context = self.build_rag_prompt(query = query , retrieved_documents = retrieved_documents)
+        except Exception as e:
+            self.logger.error(f"Error while retrieving the documents of a streamed answer : {e}")
+            retrieved_documents = None
+
+        if not retrieved_documents:
+            yield StreamEventEnums.ERROR.value , {"signal" : ResponseSignal.RAG_ANSWER_ERROR.value}
+            return
+
+        # Sending the documents before the generation starts so the client can show the sources right away
+        documents = [doc.dict() for doc in context.documents]
+        yield StreamEventEnums.METADATA.value , {
+            "documents" : documents,
+            "cached" : False,
+            "prompt_tokens" : context.prompt_tokens,
+            "retrieval_ms" : self.elapsed_ms(started_at)
+        }
+
+        # Forwarding the tokens as soon as the LLM sends them
+        # The providers don't catch the errors of a running stream , a failure after the metadata event still ends
+        # the stream with an error event instead of dropping the connection , the partial answer isn't cached
+        answer_parts , time_to_first_token_ms = [] , None
+        try:
+            async for token in self.generation_client.generate_text_stream(prompt = full_prompt , chat_history = chat_history):
+
+                if time_to_first_token_ms is None:
+                    time_to_first_token_ms = self.elapsed_ms(started_at)
+
+                answer_parts.append(token)
+                yield StreamEventEnums.TOKEN.value , token
+
+        except Exception as e:
+            self.logger.error(f"Error while streaming the answer from the LLM : {e}")
+            yield StreamEventEnums.ERROR.value , {"signal" : ResponseSignal.RAG_ANSWER_ERROR.value}
+            return
+
+        answer = "".join(answer_parts)
+        if not answer:
+            yield StreamEventEnums.ERROR.value , {"signal" : ResponseSignal.RAG_ANSWER_ERROR.value}
+            return
+
+        # Caching the whole answer so the same question doesn't go through the retrieval and the generation again
+        if answer_cache is not None:
+            answer_cache.set(project_id = project.project_id , query = query , limit = limit ,
+                             answer = answer , full_prompt = full_prompt , chat_history = chat_history ,
+                             query_vector = query_vector , documents = documents ,
+                             prompt_tokens = context.prompt_tokens ,
+                             accuracy = accuracy , mode = mode , version = version)
+
+        yield StreamEventEnums.DONE.value , {
+            "signal" : ResponseSignal.RAG_ANSWER_SUCCESS.value,
+            "full_prompt" : full_prompt,
+            "chat_history" : chat_history,
+            "prompt_tokens" : context.prompt_tokens,
+            "time_to_first_token_ms" : time_to_first_token_ms,
+            "total_ms" : self.elapsed_ms(started_at)
+        }
+
+    # The milliseconds passed since a perf counter value
+    def elapsed_ms(self , started_at : float):
+        return round((time.perf_counter() - started_at) * 1000 , 2)
+
     # This function is to answer the query of the user
     async def answer_any_question(self , document : str):
         
@@ -2,12 +2,21 @@
 from .BaseController import BaseController
 from .ProjectController import ProjectController
 
-from langchain_community.document_loaders import TextLoader, PyMuPDFLoader , UnstructuredWordDocumentLoader
-from models import ProcessingEnums
+from helpers.parser_pool import get_file_loader , load_file_content , load_file_window
+from stores.chunkers import ChunkerProviderFactory , ChunkerInterface
+from stores.chunkers.providers import SimpleChunker
+import asyncio
+import hashlib
+import json
+import logging
 import os
 from typing import List
 from dataclasses import dataclass
 
+# The metadata the loaders fill with where the file is stored on the server , like the path of its blob
+# They'd leak the server paths into the search results and make the chunk hashes depend on where the file is stored
+STORAGE_METADATA_KEYS = ("file_path" , "file_directory" , "filename" , "last_modified")
+
 # Data Transfer Object DTO for using in database
 @dataclass
 class Document:
@@ -15,15 +24,30 @@ class Document:
     metadata : dict
 
 
+# Error raised when a file can't be parsed , partial means some of its pages were already read
+class FileParsingError(Exception):
+
+    def __init__(self , file_id : str , is_partial : bool = False):
+        super().__init__(f"Error while parsing the file : {file_id}")
+        self.file_id = file_id
+        self.is_partial = is_partial
+
+
 class ProcessController(BaseController):
     
     # Initialiazation function to initiate the super class
     # It's made if we need to broader the initialization of the project controller class
-    def __init__(self, project_id : str):
+    # The parser pool is optional , without it the files are parsed in a thread
+    # The blob store is optional too , without it the files are only read from the project directory
+    def __init__(self, project_id : str , parser_pool = None , blob_store = None):
         super().__init__()
         
         self.project_id=project_id
         self.project_path = ProjectController().get_project_path(project_id=project_id)
+        self.parser_pool = parser_pool
+        self.blob_store = blob_store
+
+        self.logger = logging.getLogger('uvicorn.error')
     
     # This function only gets the file extention if it's text or pdf
     def get_file_extension(self , file_id : str):
@@ -32,26 +56,15 @@ class ProcessController(BaseController):
     # Now according to the file extension we select the suitable loader for this file
     def get_file_loader(self , file_id : str):
 
-        # Gets the file path then getting its extension
+        # Gets the file path
         file_path=os.path.join(self.project_path,file_id)
-        file_ext = self.get_file_extension(file_id=file_id)
 
         # Validation for the path of the file
         if not os.path.exists(file_path):
             return None
 
         # Now checking which ectension for the loader and if the extenstion is not supported we return None
-        if file_ext == ProcessingEnums.TXT.value:
-            return TextLoader(file_path,encoding='utf-8')
-
-        if file_ext == ProcessingEnums.PDF.value:
-            return PyMuPDFLoader(file_path)
-        
-        if file_ext == ProcessingEnums.DOCX.value:
-            return UnstructuredWordDocumentLoader(file_path , mode = 'elements')
-        
-        
-        return None
+        return get_file_loader(file_path=file_path)
 
     # Loading the file Content
     def get_file_content(self,file_id : str):
@@ -61,16 +74,159 @@ class ProcessController(BaseController):
         loader=self.get_file_loader(file_id=file_id)
 
         if loader :
-            return loader.load()
+            return [ self.set_document_source(document = document , file_id = file_id) for document in loader.load() ]
         return None
 
+    # Setting the file ID , the name of its asset , as the source of a loaded document instead of its storage path
+    def set_document_source(self , document , file_id : str):
+        metadata = { key : value for key , value in (document.metadata or {}).items() if key not in STORAGE_METADATA_KEYS }
+        metadata["source"] = file_id
+        document.metadata = metadata
+        return document
+
+    # Getting the local path of a file , from the blob store if it's stored as a blob
+    # The files uploaded before the blob store are still read from the project directory
+    # It returns None if the file doesn't exist
+    async def get_file_path(self , file_id : str , blob_key : str = None):
+
+        if blob_key and self.blob_store is not None:
+            blob_path = await self.blob_store.get_local_path(key = blob_key)
+            if blob_path is not None:
+                return blob_path
+
+        file_path = os.path.join(self.project_path,file_id)
+        if not os.path.exists(file_path):
+            return None
+
+        return file_path
+
+    # Loading the file Content without blocking the event loop , in the parser pool if there's one
+    # It returns None if the file doesn't exist , isn't supported , fails , times out or runs out of memory
+    async def get_file_content_async(self , file_id : str , blob_key : str = None):
+
+        file_path = await self.get_file_path(file_id = file_id , blob_key = blob_key)
+
+        # Validation for the path of the file
+        if file_path is None:
+            return None
+
+        # The blobs have no extension , the loader is selected from the extension of the file ID
+        file_ext = self.get_file_extension(file_id = file_id)
+
+        if self.parser_pool is not None:
+            file_content = await self.parser_pool.parse(file_path=file_path , file_ext = file_ext)
+        else:
+            file_content = await asyncio.to_thread(load_file_content , file_path , file_ext)
+
+        if file_content is None:
+            return None
+
+        return [ self.set_document_source(document = document , file_id = file_id) for document in file_content ]
+
+    # Hashing the content of the file without blocking the event loop , it's read block by block
+    # A blob is named by the hash of its content so it's never read again
+    # It returns None if the file doesn't exist
+    async def get_file_hash_async(self , file_id : str , blob_key : str = None):
+
+        if blob_key and self.blob_store is not None and await self.blob_store.exists(key = blob_key):
+            return blob_key
+
+        file_path = os.path.join(self.project_path,file_id)
+
+        # Validation for the path of the file
+        if not os.path.exists(file_path):
+            return None
+
+        return await asyncio.to_thread(self.get_file_hash , file_path)
+
+    # Hashing a file with sha256 block by block
+    def get_file_hash(self , file_path : str , block_size : int = 1048576):
+
+        file_hash = hashlib.sha256()
+        with open(file_path , "rb") as f:
+            while block := f.read(block_size):
+                file_hash.update(block)
+
+        return file_hash.hexdigest()
+
+    # Hashing a chunk from its text and its metadata , a chunk with the same hash doesn't need to be embedded again
+    @staticmethod
+    def get_chunk_hash(text : str , metadata : dict = None):
+        content = json.dumps([text , metadata or {}] , ensure_ascii = False , sort_keys = True , default = str)
+        return hashlib.sha256(content.encode("utf-8")).hexdigest()
+
+    # Loading a window of the file starting from a position , in the parser pool if there's one
+    # It returns the documents of the window and the position of the next one , or None if the window fails
+    async def get_file_window(self , file_path : str , position : int , file_ext : str = None):
+
+        window_pages = self.app_settings.PARSER_PDF_WINDOW_PAGES
+        window_bytes = self.app_settings.PARSER_TEXT_WINDOW_BYTES
+
+        if self.parser_pool is not None:
+            return await self.parser_pool.parse_window(file_path = file_path , position = position ,
+                                                       window_pages = window_pages , window_bytes = window_bytes ,
+                                                       file_ext = file_ext)
+
+        try:
+            return await asyncio.to_thread(load_file_window , file_path , position , window_pages , window_bytes , file_ext)
+        except Exception as e:
+            self.logger.error(f"Error while parsing {file_path} : {e}")
+            return None
+
+    # Loading the file page by page , only one window of pages is held in memory at a time
+    async def iterate_file_pages(self , file_id : str , blob_key : str = None):
+
+        file_path = await self.get_file_path(file_id = file_id , blob_key = blob_key)
+        file_ext = self.get_file_extension(file_id = file_id)
+
+        # Validation for the path of the file and its extension
+        if file_path is None or get_file_loader(file_path = file_path , file_ext = file_ext) is None:
+            raise FileParsingError(file_id = file_id)
+
+        position , is_partial = 0 , False
+        while position is not None:
+
+            window = await self.get_file_window(file_path = file_path , position = position , file_ext = file_ext)
+            if window is None:
+                raise FileParsingError(file_id = file_id , is_partial = is_partial)
+
+            documents , position = window
+            for document in documents:
+                is_partial = True
+                yield self.set_document_source(document = document , file_id = file_id)
+
+    # Creating the chunker of a file from its name , None if the chunker isn't supported
+    # A new chunker is created for every file since it keeps the text of the file that's still filling a chunk
+    def create_chunker(self , chunker_name : str , chunk_size : int = 100 , overlap_size : int = 20):
+        return ChunkerProviderFactory(self.app_settings).create(provider = chunker_name , chunk_size = chunk_size ,
+                                                                overlap_size = overlap_size)
+
+    # Processing the file page by page into chunks with the given chunker , every chunk is yielded once it's complete
+    # so the whole file is never held in memory
+    async def iterate_file_chunks(self , file_id : str , chunker : ChunkerInterface , blob_key : str = None):
+
+        async for page in self.iterate_file_pages(file_id = file_id , blob_key = blob_key):
+            for chunk in chunker.feed(text = page.page_content , metadata = page.metadata):
+                yield chunk
+
+        for chunk in chunker.flush():
+            yield chunk
+
     # Processing the file content by getting the output of the loader , then process its text and metadata
     # And return the output in chunks
-    def process_file_content_chunks(self,file_content : list ,file_id : str , chunk_size : int=100 , overlap_size : int=20):
+    # The chunker is optional , without it the simple splitter is used
+    def process_file_content_chunks(self,file_content : list ,file_id : str , chunk_size : int=100 , overlap_size : int=20 ,
+                                    chunker : ChunkerInterface = None):
         file_content_text = [ rec.page_content for rec in file_content ]
         file_content_metadata = [ rec.metadata for rec in file_content ]
 #       chunks=text_splitter.create_documents(file_content_text,metadatas = file_content_metadata)
-        chunks = self.process_simpler_splitter(texts=file_content_text,metadatas=file_content_metadata,chunk_size=chunk_size)
+        if chunker is None:
+            return self.process_simpler_splitter(texts=file_content_text,metadatas=file_content_metadata,chunk_size=chunk_size)
+
+        chunks = []
+        for text , metadata in zip(file_content_text , file_content_metadata):
+            chunks.extend(chunker.feed(text = text , metadata = metadata))
+        chunks.extend(chunker.flush())
         return chunks
 
 
@@ -88,40 +244,19 @@ class ProcessController(BaseController):
     # Processing with a simple splitter by just chunking over each new paragraph with \n
     def process_simpler_splitter(self , texts : List[str],metadatas:List[dict],chunk_size : int,splitter_tag = "\n"):
 
-        # We make all pages in one text
-        full_text = " ".join(texts)
+        # Feeding all pages to the simple chunker , it joins them in one text and gathers its lines into chunks
+        chunker = SimpleChunker(chunk_size = chunk_size , splitter_tag = splitter_tag)
 
-        # Now for each splitting in the full text we strip it and make sure there's no empty lines
-        lines = [doc.strip() for doc in full_text.split(splitter_tag) if len(doc.strip())> 1]
-
-        # Generate an empty text of chunks
         chunks = []
+        for text , metadata in zip(texts , metadatas):
+            chunks.extend(chunker.feed(text = text , metadata = metadata))
 
-        # Start with an empty current chunk
-        current_chunk = ""
-
-        # For each line in the lines we add the line and the splitter tag for the current chunk
-        # Then we make sure it's less than our chunk size
-        # Then we append this chunk as a Document Data Class in the chunks list
-        for line in lines :
-            current_chunk += line + splitter_tag
-            if len(current_chunk) >= chunk_size:
-                chunks.append(Document(
-                    page_content=current_chunk,
-                    metadata={}
-                ))
-
-                current_chunk = ""
-        # For the last chunk we save it if it's length is greater than 0
-        if len(current_chunk) >= 0:
-                chunks.append(Document(
-                    page_content=current_chunk,
-                    metadata={}
-                ))
+        # The last chunk is saved even if it's empty
+        chunks.extend(chunker.flush())
 
         # Now return all created chunks
         return chunks
-    
+
     # Processing the whole file at once by just chunking over each new paragraph with \n
     def process_not_splitting(self , texts : List[str],metadatas:List[dict],splitter_tag = "\n"):
 
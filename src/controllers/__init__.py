@@ -1,4 +1,6 @@
 from .DataController import DataController
 from .ProjectController import ProjectController
 from .ProcessController import ProcessController
-from .NLPController import NLPController
\ No newline at end of file
+from .NLPController import NLPController
+from .IndexController import IndexController
+from .JobController import JobController
\ No newline at end of file
@@ -1,5 +1,11 @@
 from pydantic_settings import BaseSettings , SettingsConfigDict
+from pydantic import Field
 from typing import List
+import logging
+import signal
+
+logger = logging.getLogger('uvicorn.error')
+
 
 class Settings(BaseSettings):
     APP_NAME : str
@@ -8,6 +14,7 @@ class Settings(BaseSettings):
     FILE_ALLOWED_TYPES : list
     FILE_MAX_SIZE : int
     FILE_DEFAULT_CHUNK_SIZE : int
+    FILE_UPLOAD_CONCURRENCY : int = 8
 
     POSTGRES_USERNAME : str
     POSTGRES_PASSWORD : str
@@ -15,6 +22,13 @@ class Settings(BaseSettings):
     POSTGRES_PORT : int
     POSTGRES_MAIN_DATABASE : str
 
+    POSTGRES_POOL_SIZE : int = 10
+    POSTGRES_MAX_OVERFLOW : int = 20
+    POSTGRES_POOL_TIMEOUT : int = 30
+    POSTGRES_POOL_RECYCLE : int = 1800
+    POSTGRES_POOL_PRE_PING : bool = True
+    POSTGRES_STATEMENT_CACHE_SIZE : int = 100
+
     GENERATION_BACKEND : str
     EMBEDDING_BACKEND : str
 
@@ -27,6 +41,16 @@ class Settings(BaseSettings):
     EMBEDDING_MODEL_ID : str = None
     EMBEDDING_MODEL_SIZE : int = None
 
+    EMBEDDING_CACHE_ENABLED : bool = True
+    EMBEDDING_CACHE_LRU_SIZE : int = 10000
+    EMBEDDING_CACHE_PERSISTENT : bool = True
+
+    ANSWER_CACHE_ENABLED : bool = True
+    ANSWER_CACHE_MAX_ENTRIES : int = 1000
+    ANSWER_CACHE_TTL_SECONDS : int = 3600
+    ANSWER_CACHE_SEMANTIC_THRESHOLD : float = None
+    ANSWER_CACHE_SEMANTIC_MAX_ENTRIES : int = 200
+
     INPUT_DEFAULT_MAX_CHARACTERS : int = None
     GENERATION_DEFAULT_MAX_TOKENS : int = None
     GENERATION_DEFAULT_TEMPERATURE : float = None
@@ -36,13 +60,123 @@ class Settings(BaseSettings):
     VECTOR_DB_PATH : str
     VECTOR_DB_DISTANCE_METHOD : str = None
     VECTOR_DB_PGVEC_INDEX_THRESHOLD : int = 100
+    VECTOR_DB_PGVEC_INGEST_MODE : str = "copy"
+    VECTOR_DB_PGVEC_INDEX_TYPE : str = "hnsw"
+    VECTOR_DB_PGVEC_HNSW_M : int = 16
+    VECTOR_DB_PGVEC_HNSW_EF_CONSTRUCTION : int = 64
+    VECTOR_DB_PGVEC_IVFFLAT_LISTS : int = None
+    VECTOR_DB_PGVEC_MAINTENANCE_WORK_MEM : str = None
+    VECTOR_DB_DEFAULT_SEARCH_ACCURACY : str = "balanced"
+    VECTOR_DB_DEFAULT_SEARCH_MODE : str = "vector"
+    VECTOR_DB_PGVEC_TEXT_SEARCH_CONFIG : str = Field(default = "simple" , pattern = r"^[a-z_]+$")
+    VECTOR_DB_HYBRID_RRF_K : int = 60
+    VECTOR_DB_HYBRID_CANDIDATES_FACTOR : int = 2
+    VECTOR_DB_HYBRID_LEXICAL_TIMEOUT_MS : int = 50
+    VECTOR_DB_BATCH_SEARCH_MAX_QUERIES : int = 96
+    VECTOR_DB_SEARCH_MAX_LIMIT : int = 100
+
+    INDEXING_PAGE_SIZE : int = 100
+    INDEXING_EMBEDDING_CONCURRENCY : int = 4
+    INDEXING_QUEUE_SIZE : int = 8
+
+    JOB_WORKERS_COUNT : int = 1
+    JOB_POLL_INTERVAL_SECONDS : float = 1.0
+    JOB_PROGRESS_INTERVAL_SECONDS : float = 2.0
+    JOB_STALE_AFTER_SECONDS : int = 600
+    JOB_MAX_ATTEMPTS : int = 3
+
+    PARSER_POOL_WORKERS : int = None
+    PARSER_TIMEOUT_SECONDS : int = 300
+    PARSER_MAX_MEMORY_MB : int = 2048
+    PARSER_MAX_TASKS_PER_CHILD : int = 50
+    PARSER_PDF_WINDOW_PAGES : int = 16
+    PARSER_TEXT_WINDOW_BYTES : int = 1048576
+
+    PROCESSING_INSERT_BATCH_SIZE : int = 500
+    PROCESSING_DEFAULT_CHUNKER : str = "recursive"
+
+    CHUNKER_BUFFER_SIZE : int = 65536
+    CHUNKER_SENTENCE_LANGUAGE : str = "english"
+    CHUNKER_TOKEN_ENCODING : str = "cl100k_base"
+
+    RERANKER_BACKEND : str = None
+    RERANKER_CANDIDATES_FACTOR : int = 4
+    RERANKER_MAX_CANDIDATES : int = 50
+    RERANKER_TIMEOUT_MS : int = 300
+    RERANKER_COHERE_MODEL_ID : str = "rerank-english-v3.0"
+    RERANKER_CROSS_ENCODER_MODEL_ID : str = "cross-encoder/ms-marco-MiniLM-L-6-v2"
+    RERANKER_CROSS_ENCODER_MAX_LENGTH : int = 512
+    RERANKER_CROSS_ENCODER_WORKERS : int = 1
+
+    CONTEXT_MAX_TOKENS : int = 3000
+    CONTEXT_TOKEN_ENCODING : str = None
+    CONTEXT_DUPLICATE_THRESHOLD : float = 0.9
+    CONTEXT_MIN_DOCUMENT_TOKENS : int = 32
+
+    BLOB_STORE_BACKEND : str = "LOCAL"
+    BLOB_STORE_LOCAL_DIR : str = None
+    BLOB_STORE_CACHE_DIR : str = None
+    BLOB_STORE_CACHE_MAX_BYTES : int = 5368709120
+    BLOB_STORE_SHARD_DEPTH : int = 2
+    BLOB_STORE_BLOCK_SIZE : int = 1048576
+    BLOB_STORE_S3_BUCKET : str = None
+    BLOB_STORE_S3_PREFIX : str = "blobs"
+    BLOB_STORE_S3_ENDPOINT_URL : str = None
+    BLOB_STORE_S3_REGION : str = None
+    BLOB_STORE_S3_ACCESS_KEY_ID : str = None
+    BLOB_STORE_S3_SECRET_ACCESS_KEY : str = None
+    BLOB_STORE_S3_PRESIGNED_DOWNLOADS : bool = True
+    BLOB_STORE_S3_PRESIGNED_URL_EXPIRATION : int = 3600
 
     PRIMARY_LANGUAGE : str = "en"
     DEFAULT_LANGUAGE : str = "en"
-    
-    class Config:
-        env_file='.env'
 
-    
+    # The settings are shared by the whole process so they're frozen , a change is made by reloading them
+    model_config = SettingsConfigDict(env_file = '.env' , frozen = True)
+
+
+# The settings of the process , they're read and validated on the first use
+_settings = None
+
+
+# Getting the settings of the process , the .env file is read and validated once and the same object is returned after
 def get_settings():
-    return Settings()
\ No newline at end of file
+
+    global _settings
+    if _settings is None:
+        _settings = Settings()
+
+    return _settings
+
+
+# Reloading the settings from the environment and the .env file , they're parsed once and swapped in
+# The new settings are validated before the swap so a broken .env keeps the current ones
+# Only what reads the settings again sees the change , the clients created at startup keep their settings
+def reload_settings():
+
+    global _settings
+    settings = Settings()
+    _settings = settings
+
+    return settings
+
+
+# Reloading the settings when the process gets SIGHUP , the platforms without SIGHUP just don't reload
+def add_reload_signal_handler(loop):
+
+    def handle_reload():
+        try:
+            _ = reload_settings()
+            logger.info("The settings are reloaded")
+        except Exception as e:
+            logger.error(f"Couldn't reload the settings : {e}")
+
+    if not hasattr(signal , "SIGHUP"):
+        return False
+
+    try:
+        loop.add_signal_handler(signal.SIGHUP , handle_reload)
+    except (NotImplementedError , RuntimeError):
+        return False
+
+    return True
\ No newline at end of file
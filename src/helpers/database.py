@@ -0,0 +1,57 @@
+# Creating the database engine with a configurable connection pool that exports its metrics
+from sqlalchemy.ext.asyncio import create_async_engine , AsyncEngine
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from .config import Settings
+from . import metrics
+import time
+
+
+# The async queue pool measuring how long every checkout waited for a connection
+class InstrumentedAsyncQueuePool(AsyncAdaptedQueuePool):
+
+    def _do_get(self):
+        started_at = time.perf_counter()
+        try:
+            return super()._do_get()
+        except PoolTimeoutError:
+            metrics.DB_POOL_TIMEOUTS.inc()
+            raise
+        finally:
+            metrics.DB_POOL_WAIT_SECONDS.observe(time.perf_counter() - started_at)
+
+
+# A function to create the async engine from the settings
+def create_db_engine(settings : Settings) -> AsyncEngine:
+
+    # Initializing data base connection
+    postgres_conn = f"postgresql+asyncpg://{settings.POSTGRES_USERNAME}:{settings.POSTGRES_PASSWORD}@{settings.POSTGRES_HOST}:{settings.POSTGRES_PORT}/{settings.POSTGRES_MAIN_DATABASE}"
+
+    engine = create_async_engine(
+        postgres_conn,
+        poolclass = InstrumentedAsyncQueuePool,
+        pool_size = settings.POSTGRES_POOL_SIZE,
+        max_overflow = settings.POSTGRES_MAX_OVERFLOW,
+        pool_timeout = settings.POSTGRES_POOL_TIMEOUT,
+        pool_recycle = settings.POSTGRES_POOL_RECYCLE,
+        pool_pre_ping = settings.POSTGRES_POOL_PRE_PING,
+        connect_args = {
+            # asyncpg's own statement cache and the prepared statements cache of the sqlalchemy adapter
+            "statement_cache_size" : settings.POSTGRES_STATEMENT_CACHE_SIZE,
+            "prepared_statement_cache_size" : settings.POSTGRES_STATEMENT_CACHE_SIZE,
+        }
+    )
+
+    register_pool_metrics(engine = engine)
+
+    return engine
+
+
+# A function to bind the pool gauges to the engine pool , they're read every time the metrics are scraped
+# The pool is looked up on every read because disposing the engine replaces it
+def register_pool_metrics(engine : AsyncEngine):
+
+    metrics.DB_POOL_SIZE.set_function(lambda : engine.sync_engine.pool.size())
+    metrics.DB_POOL_CHECKED_OUT.set_function(lambda : engine.sync_engine.pool.checkedout())
+    metrics.DB_POOL_CHECKED_IN.set_function(lambda : engine.sync_engine.pool.checkedin())
+    metrics.DB_POOL_OVERFLOW.set_function(lambda : max(0 , engine.sync_engine.pool.overflow()))
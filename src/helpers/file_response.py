@@ -0,0 +1,138 @@
+# Serving the stored files , a whole file or a single byte range of it
+# The file is handed to the ASGI server to be sent with sendfile when the server supports it ,
+# so its bytes are copied by the kernel straight from the page cache to the socket without passing through python
+from starlette.background import BackgroundTask
+from starlette.responses import Response
+from urllib.parse import quote
+import aiofiles
+import asyncio
+import os
+import re
+
+
+# A single range of the Range header , the multi range requests are answered with the whole file
+RANGE_PATTERN = re.compile(r"^bytes=(\d*)-(\d*)$")
+
+
+# Error raised when the requested range is outside the file , it's answered with 416
+class RangeNotSatisfiable(Exception):
+
+    def __init__(self , file_size : int):
+        super().__init__(f"Range not satisfiable for a file of {file_size} bytes")
+        self.file_size = file_size
+
+
+# Parsing the Range header of a request into the offset and the length of the range
+# It returns None when the whole file is requested
+def parse_range_header(range_header : str , file_size : int):
+
+    if not range_header:
+        return None
+
+    match = RANGE_PATTERN.match(range_header.strip())
+    if match is None:
+        return None
+
+    start , end = match.groups()
+    if not start and not end:
+        return None
+
+    # A suffix range , the last bytes of the file
+    if not start:
+        length = min(int(end) , file_size)
+        if length == 0:
+            raise RangeNotSatisfiable(file_size = file_size)
+        return file_size - length , length
+
+    start = int(start)
+    end = min(int(end) , file_size - 1) if end else file_size - 1
+    if start >= file_size or end < start:
+        raise RangeNotSatisfiable(file_size = file_size)
+
+    return start , end - start + 1
+
+
+# Getting the headers of a whole file or a range of it
+def get_file_headers(file_size : int , byte_range : tuple = None , file_name : str = None):
+
+    headers = {"accept-ranges" : "bytes"}
+
+    if byte_range is None:
+        headers["content-length"] = str(file_size)
+    else:
+        offset , length = byte_range
+        headers["content-length"] = str(length)
+        headers["content-range"] = f"bytes {offset}-{offset + length - 1}/{file_size}"
+
+    if file_name:
+        headers["content-disposition"] = f"attachment; filename*=utf-8''{quote(file_name)}"
+
+    return headers
+
+
+class BlobFileResponse(Response):
+
+    # Construct the response with the path of the file , its size and the range to send , the whole file without a range
+    def __init__(self , path : str , file_size : int , byte_range : tuple = None , file_name : str = None ,
+                 media_type : str = None , block_size : int = 1048576 , background : BackgroundTask = None):
+
+        self.path = os.path.abspath(path)
+        self.file_size = file_size
+        self.byte_range = byte_range
+        self.block_size = block_size
+        self.status_code = 200 if byte_range is None else 206
+        self.media_type = media_type or "application/octet-stream"
+        self.background = background
+        self.init_headers(get_file_headers(file_size = file_size , byte_range = byte_range , file_name = file_name))
+
+    async def __call__(self , scope , receive , send):
+
+        offset , length = self.byte_range if self.byte_range is not None else (0 , self.file_size)
+        extensions = scope.get("extensions") or {}
+
+        await send({
+            "type" : "http.response.start",
+            "status" : self.status_code,
+            "headers" : self.raw_headers
+        })
+
+        # A HEAD request only gets the headers
+        if scope.get("method") == "HEAD" or length == 0:
+            await send({"type" : "http.response.body" , "body" : b"" , "more_body" : False})
+
+        # The server sends the range of the file itself with sendfile
+        elif "http.response.zerocopy" in extensions:
+            file = await asyncio.to_thread(open , self.path , "rb")
+            try:
+                await send({
+                    "type" : "http.response.zerocopy",
+                    "file" : file,
+                    "offset" : offset,
+                    "count" : length,
+                    "more_body" : False
+                })
+            finally:
+                file.close()
+
+        # The server sends the whole file itself from its path
+        elif "http.response.pathsend" in extensions and self.byte_range is None:
+            await send({"type" : "http.response.pathsend" , "path" : self.path})
+
+        # Otherwise the range is read block by block and sent in the body
+        else:
+            remaining = length
+            async with aiofiles.open(self.path , "rb") as f:
+                await f.seek(offset)
+                while remaining > 0:
+                    block = await f.read(min(self.block_size , remaining))
+                    if not block:
+                        break
+                    remaining -= len(block)
+                    await send({"type" : "http.response.body" , "body" : block , "more_body" : remaining > 0})
+
+            # The file got shorter while it was sent , the body is closed anyway
+            if remaining > 0:
+                await send({"type" : "http.response.body" , "body" : b"" , "more_body" : False})
+
+        if self.background is not None:
+            await self.background()
@@ -0,0 +1,19 @@
+# Prometheus metrics of the application , they're exported on the /metrics endpoint
+from prometheus_client import Gauge , Histogram , Counter
+
+# Database connection pool metrics
+DB_POOL_SIZE = Gauge("db_pool_size" , "Number of connections the pool keeps open")
+DB_POOL_CHECKED_OUT = Gauge("db_pool_checked_out" , "Number of connections currently checked out of the pool")
+DB_POOL_CHECKED_IN = Gauge("db_pool_checked_in" , "Number of idle connections in the pool")
+DB_POOL_OVERFLOW = Gauge("db_pool_overflow" , "Number of overflow connections currently open beyond the pool size")
+DB_POOL_WAIT_SECONDS = Histogram("db_pool_wait_seconds" , "Time spent waiting to check a connection out of the pool",
+                                 buckets = (0.001 , 0.005 , 0.01 , 0.025 , 0.05 , 0.1 , 0.25 , 0.5 , 1 , 2.5 , 5 , 10 , 30))
+DB_POOL_TIMEOUTS = Counter("db_pool_timeouts" , "Number of checkouts that timed out because the pool was exhausted")
+
+# Embedding cache metrics , the hit rate of a tier is its hits over all its lookups
+EMBEDDING_CACHE_LOOKUPS = Counter("embedding_cache_lookups" , "Number of texts looked up in the embedding cache" ,
+                                  ["tier" , "result"])
+
+# Answer cache metrics
+ANSWER_CACHE_LOOKUPS = Counter("answer_cache_lookups" , "Number of questions looked up in the answer cache" ,
+                               ["tier" , "result"])
@@ -0,0 +1,222 @@
+# Parsing the uploaded files in a pool of worker processes , so a big document never blocks the event loop
+# and the files of a project are parsed in parallel on all the cores
+# The functions run in the workers are module level functions so they can be pickled to the worker processes
+from langchain_community.document_loaders import TextLoader, PyMuPDFLoader , UnstructuredWordDocumentLoader
+from langchain_core.documents import Document
+from models.enums.ProcessingEnums import ProcessingEnums
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+import multiprocessing
+import asyncio
+import logging
+import os
+
+
+# Selecting the suitable loader for a file from its extension , None if the extension isn't supported
+# The extension is given for the files stored as blobs , their paths are content hashes without an extension
+def get_file_loader(file_path : str , file_ext : str = None):
+
+    file_ext = file_ext or os.path.splitext(file_path)[-1]
+
+    if file_ext == ProcessingEnums.TXT.value:
+        return TextLoader(file_path,encoding='utf-8')
+
+    if file_ext == ProcessingEnums.PDF.value:
+        return PyMuPDFLoader(file_path)
+
+    if file_ext == ProcessingEnums.DOCX.value:
+        return UnstructuredWordDocumentLoader(file_path , mode = 'elements')
+
+    return None
+
+
+# Loading the whole content of a file with its loader , it runs inside the worker processes
+def load_file_content(file_path : str , file_ext : str = None):
+
+    loader = get_file_loader(file_path = file_path , file_ext = file_ext)
+    if loader is None:
+        return None
+
+    return loader.load()
+
+
+# Loading a window of a file starting from a position , it runs inside the worker processes
+# It returns the documents of the window and the position of the next window , None once the file is over
+# PDFs are read page by page , the position is a page number , text files are read by size at line boundaries ,
+# the position is a byte offset , the other files can't be read partially so they're loaded whole in one window
+def load_file_window(file_path : str , position : int , window_pages : int , window_bytes : int , file_ext : str = None):
+
+    file_ext = file_ext or os.path.splitext(file_path)[-1]
+
+    if file_ext == ProcessingEnums.PDF.value:
+        import fitz
+
+        with fitz.open(file_path) as pdf:
+            total_pages = pdf.page_count
+            end = min(position + window_pages , total_pages)
+
+            # The metadata are the same the PyMuPDF loader sets on every page
+            documents = [
+                Document(
+                    page_content = pdf[page_no].get_text(),
+                    metadata = {
+                        "source" : file_path,
+                        "file_path" : file_path,
+                        "page" : page_no,
+                        "total_pages" : total_pages
+                    }
+                )
+                for page_no in range(position , end)
+            ]
+
+        return documents , (end if end < total_pages else None)
+
+    if file_ext == ProcessingEnums.TXT.value:
+
+        # Completing the window to the end of its last line so no line is split between two windows
+        # The new line byte never appears inside a multi byte utf-8 character so the window is always decodable
+        with open(file_path , "rb") as f:
+            f.seek(position)
+            data = f.read(window_bytes) + f.readline()
+            next_position = f.tell()
+            is_over = not f.read(1)
+
+        documents = [Document(page_content = data.decode("utf-8") , metadata = {"source" : file_path})]
+        return documents , (None if is_over else next_position)
+
+    if position > 0:
+        return [] , None
+
+    return load_file_content(file_path = file_path , file_ext = file_ext) , None
+
+
+# Initializing every worker process , the address space is limited so a huge or broken file
+# fails with a memory error instead of taking the whole node down
+# The worker sends its PID back first , the pool kills its workers by these PIDs when a file gets stuck
+def init_parser_worker(max_memory_mb : int = None , worker_pids = None):
+
+    if worker_pids is not None:
+        worker_pids.put(os.getpid())
+
+    if not max_memory_mb:
+        return
+
+    try:
+        import resource
+        limit = max_memory_mb * 1024 * 1024
+        resource.setrlimit(resource.RLIMIT_AS , (limit , limit))
+    except (ImportError , ValueError , OSError) as e:
+        logging.getLogger('uvicorn.error').warning(f"Couldn't limit the parser worker memory : {e}")
+
+
+class ParserPool:
+
+    # Construct the pool with the number of worker processes , the timeout of a single file ,
+    # the memory limit of every worker and the number of files a worker parses before it's replaced
+    def __init__(self , workers : int = None , timeout_seconds : int = None ,
+                 max_memory_mb : int = None , max_tasks_per_child : int = None):
+
+        self.workers = max(1 , workers or os.cpu_count() or 1)
+        self.timeout_seconds = timeout_seconds
+        self.max_memory_mb = max_memory_mb
+        self.max_tasks_per_child = max_tasks_per_child
+
+        self.executor = None
+        self.worker_pids = None
+        self.logger = logging.getLogger('uvicorn.error')
+
+    # Getting the executor , it's created on the first use and after every restart
+    # The workers are spawned rather than forked so they don't inherit the API memory and its memory limit is meaningful
+    def get_executor(self):
+
+        if self.executor is None:
+            mp_context = multiprocessing.get_context("spawn")
+            self.worker_pids = mp_context.SimpleQueue()
+            self.executor = ProcessPoolExecutor(
+                max_workers = self.workers,
+                mp_context = mp_context,
+                initializer = init_parser_worker,
+                initargs = (self.max_memory_mb , self.worker_pids),
+                max_tasks_per_child = self.max_tasks_per_child
+            )
+
+        return self.executor
+
+    # Killing the workers of an executor and replacing it , it's the only way to stop a file that's stuck
+    # The other files running on it fail with a broken pool and they're retried on the new executor
+    def restart(self , executor : ProcessPoolExecutor):
+
+        if self.executor is not executor:
+            return
+
+        worker_pids = self.worker_pids
+        self.executor , self.worker_pids = None , None
+
+        executor.shutdown(wait = False , cancel_futures = True)
+        self.terminate_workers(worker_pids = worker_pids)
+
+    # Terminating the workers that sent their PIDs , only the live children of this process are terminated
+    # so the PID of a worker that was already replaced is never signalled
+    def terminate_workers(self , worker_pids):
+
+        pids = set()
+        while not worker_pids.empty():
+            pids.add(worker_pids.get())
+
+        for process in multiprocessing.active_children():
+            if process.pid in pids:
+                process.terminate()
+
+    # A function to parse a whole file in the pool , it returns None if the file fails , times out or runs out of memory
+    async def parse(self , file_path : str , file_ext : str = None):
+        return await self.run(load_file_content , file_path , file_ext)
+
+    # A function to parse a window of a file in the pool , it returns the documents of the window and the next position
+    # or None if the window fails , times out or runs out of memory , the timeout applies to every window
+    async def parse_window(self , file_path : str , position : int , window_pages : int , window_bytes : int ,
+                           file_ext : str = None):
+        return await self.run(load_file_window , file_path , position , window_pages , window_bytes , file_ext)
+
+    # Running a parsing function of a file in the pool
+    async def run(self , function , file_path : str , *args):
+
+        loop = asyncio.get_running_loop()
+
+        # A broken pool is retried once , it's usually broken by another file that was stopped
+        for attempt in range(2):
+
+            executor = self.get_executor()
+
+            try:
+                return await asyncio.wait_for(
+                    loop.run_in_executor(executor , function , file_path , *args),
+                    timeout = self.timeout_seconds
+                )
+
+            except asyncio.TimeoutError:
+                self.logger.error(f"Parsing {file_path} took more than {self.timeout_seconds} seconds")
+                self.restart(executor)
+                return None
+
+            except BrokenProcessPool:
+                self.restart(executor)
+                if attempt > 0:
+                    self.logger.error(f"The parser worker of {file_path} died")
+                    return None
+
+            except MemoryError:
+                self.logger.error(f"Parsing {file_path} exceeded the memory limit of {self.max_memory_mb} MB")
+                return None
+
+            except Exception as e:
+                self.logger.error(f"Error while parsing {file_path} : {e}")
+                return None
+
+        return None
+
+    # Stopping the worker processes
+    def close(self):
+
+        if self.executor is not None:
+            self.executor.shutdown(wait = False , cancel_futures = True)
+            self.executor , self.worker_pids = None , None
@@ -0,0 +1,113 @@
+# Creating the shared clients of the application , the API and the job workers build the same ones
+# The clients are set as attributes of the given container , the FastAPI app or any plain object
+from .config import Settings
+from .database import create_db_engine
+from .parser_pool import ParserPool
+from stores.llm.LLMProviderFactory import LLMProviderFactory
+from stores.vectordb.VectorDBProviderFactory import VectorDBProviderFactory
+from stores.llm.templates.template_parser import TemplateParser
+from stores.llm.ContextPacker import ContextPacker
+from stores.cache import EmbeddingCache , AnswerCache
+from stores.blobstore import BlobStoreProviderFactory
+from stores.rerankers import RerankerProviderFactory , RerankingStage
+from models.EmbeddingCacheModel import EmbeddingCacheModel
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import sessionmaker
+import os
+
+
+# A function to create every client from the settings
+async def create_resources(container , settings : Settings):
+
+    # Creating Async Engine to make ORM sessions , with the connection pool configured from the settings
+    container.db_engine = create_db_engine(settings)
+
+    # Using the engine to create async session for database operations , expire on commit keeps the session on even after commiting
+    container.db_client=sessionmaker(
+        container.db_engine, class_ = AsyncSession , expire_on_commit = False
+        )
+
+    # Creating the factory instance for the LLM provider
+    llm_provider_factory = LLMProviderFactory(settings)
+
+    # Creating the factory instance for the vector database provider
+    vectordb_provider_factory = VectorDBProviderFactory(config = settings,db_client=container.db_client)
+
+
+    # Generation_client , creating the generation client from the provider and setting the model ID for it
+    container.generation_client = llm_provider_factory.create(provider=settings.GENERATION_BACKEND)
+    container.generation_client.set_generation_model(model_id = settings.GENERATION_MODEL_ID)
+
+    # Embedding_client , creating the embedding client from the provider and setting the model ID and the embedding size for it
+    container.embedding_client = llm_provider_factory.create(provider=settings.EMBEDDING_BACKEND)
+    container.embedding_client.set_embedding_model(model_id = settings.EMBEDDING_MODEL_ID,
+                                                   embedding_size = settings.EMBEDDING_MODEL_SIZE)
+
+    # Wrapping the embedding client with the embedding cache so unchanged texts aren't embedded again
+    if settings.EMBEDDING_CACHE_ENABLED:
+        embedding_cache_model = None
+        if settings.EMBEDDING_CACHE_PERSISTENT:
+            embedding_cache_model = await EmbeddingCacheModel.create_instance(db_client = container.db_client)
+
+        container.embedding_client = EmbeddingCache(embedding_client = container.embedding_client,
+                                                    backend = settings.EMBEDDING_BACKEND,
+                                                    lru_size = settings.EMBEDDING_CACHE_LRU_SIZE,
+                                                    cache_model = embedding_cache_model)
+
+    # Answer cache , keeping the RAG answers so repeated questions skip the retrieval and the generation
+    container.answer_cache = None
+    if settings.ANSWER_CACHE_ENABLED:
+        container.answer_cache = AnswerCache(max_entries = settings.ANSWER_CACHE_MAX_ENTRIES,
+                                             ttl_seconds = settings.ANSWER_CACHE_TTL_SECONDS,
+                                             semantic_threshold = settings.ANSWER_CACHE_SEMANTIC_THRESHOLD,
+                                             semantic_max_entries = settings.ANSWER_CACHE_SEMANTIC_MAX_ENTRIES)
+
+
+    # Reranking stage , the search over-fetches candidates and the reranker keeps the most relevant ones for the prompt
+    # It's off without a reranker backend
+    container.reranking_stage = None
+    reranker = RerankerProviderFactory(settings).create(provider = settings.RERANKER_BACKEND)
+    if reranker is not None:
+        container.reranking_stage = RerankingStage(reranker = reranker,
+                                                   candidates_factor = settings.RERANKER_CANDIDATES_FACTOR,
+                                                   max_candidates = settings.RERANKER_MAX_CANDIDATES,
+                                                   timeout_ms = settings.RERANKER_TIMEOUT_MS)
+
+        # Loading the reranker model now , the first requests would all fall back while it loads
+        await container.reranking_stage.warm_up()
+
+    # Context packer , fitting the documents of the RAG prompt in a budget of tokens of the generation model tokenizer
+    # It's off without a budget
+    container.context_packer = None
+    if settings.CONTEXT_MAX_TOKENS:
+        container.context_packer = ContextPacker(max_tokens = settings.CONTEXT_MAX_TOKENS,
+                                                 encoding_name = settings.CONTEXT_TOKEN_ENCODING,
+                                                 model_id = settings.GENERATION_MODEL_ID,
+                                                 duplicate_threshold = settings.CONTEXT_DUPLICATE_THRESHOLD,
+                                                 min_document_tokens = settings.CONTEXT_MIN_DOCUMENT_TOKENS)
+
+    # Vectordb_client , creating the vector database client and connect to this client giving the chosen vector database back end then connecting to it
+    container.vectordb_client=vectordb_provider_factory.create_provider(provider=settings.VECTOR_DB_BACKEND)
+    await container.vectordb_client.connect()
+
+    # Templates , setting the language for the template for the llm
+    container.template_parser = TemplateParser(language = settings.PRIMARY_LANGUAGE , default_language = settings.DEFAULT_LANGUAGE)
+
+    # Blob store , the uploaded files are stored once by their content hash and shared by all the projects
+    blob_store_factory = BlobStoreProviderFactory(config = settings , base_dir = os.path.dirname(os.path.dirname(__file__)))
+    container.blob_store = blob_store_factory.create(provider = settings.BLOB_STORE_BACKEND)
+
+    # Parser pool , the worker processes are started on the first parsed file
+    container.parser_pool = ParserPool(workers = settings.PARSER_POOL_WORKERS,
+                                       timeout_seconds = settings.PARSER_TIMEOUT_SECONDS,
+                                       max_memory_mb = settings.PARSER_MAX_MEMORY_MB,
+                                       max_tasks_per_child = settings.PARSER_MAX_TASKS_PER_CHILD)
+
+
+# A function to close the database connections , the vector database connection , the parser workers and the reranker workers
+async def close_resources(container):
+    container.parser_pool.close()
+    if container.reranking_stage is not None:
+        container.reranking_stage.close()
+    await container.db_engine.dispose()
+    await container.vectordb_client.disconnect()
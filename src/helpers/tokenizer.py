@@ -0,0 +1,54 @@
+# Getting the tokenizers the chunks and the prompts are counted with
+# tiktoken downloads the files of an encoding the first time it's used , a node without internet access
+# needs them in the TIKTOKEN_CACHE_DIR directory , otherwise the tokens are estimated from the characters
+from functools import lru_cache
+import logging
+import tiktoken
+
+
+# Estimating the tokens of a text from its characters , a token is about 4 characters of english text
+# Every token is the piece of the text it stands for , so the windows of tokens map back to the text
+class CharacterEncoding:
+
+    def __init__(self , chars_per_token : int = 4):
+        self.name = "characters"
+        self.chars_per_token = max(1 , chars_per_token)
+
+    def encode(self , text : str , disallowed_special = ()):
+        return [ text[i:i + self.chars_per_token] for i in range(0 , len(text) , self.chars_per_token) ]
+
+    def decode(self , tokens : list):
+        return "".join(tokens)
+
+    # The text of the tokens and the position in it where every token starts
+    def decode_with_offsets(self , tokens : list):
+
+        offsets , position = [] , 0
+        for token in tokens:
+            offsets.append(position)
+            position += len(token)
+
+        return self.decode(tokens) , offsets
+
+
+# Getting the tokenizer of an encoding or of a model , the encoding is found from the model ID if it isn't given
+# The models tiktoken doesn't know , like the Cohere ones , are counted with the default encoding as an approximation
+# An encoding that can't be loaded falls back to the characters estimate once per process
+@lru_cache(maxsize = None)
+def get_encoding(encoding_name : str = None , model_id : str = None , default_encoding : str = "cl100k_base"):
+
+    logger = logging.getLogger('uvicorn.error')
+
+    if not encoding_name and model_id:
+        try:
+            encoding_name = tiktoken.encoding_name_for_model(model_id)
+        except KeyError:
+            logger.warning(f"No tokenizer is known for {model_id} , counting with {default_encoding}")
+
+    encoding_name = encoding_name or default_encoding
+
+    try:
+        return tiktoken.get_encoding(encoding_name)
+    except Exception as e:
+        logger.warning(f"Couldn't load the {encoding_name} tokenizer , the tokens are estimated from the characters : {e}")
+        return CharacterEncoding()
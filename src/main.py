@@ -3,17 +3,21 @@ from fastapi import FastAPI
 from routes import base
 from routes import data
 from routes import nlp
+from routes import jobs
 
-from helpers.config import get_settings
-from stores.llm.LLMProviderFactory import LLMProviderFactory
-from stores.vectordb.VectorDBProviderFactory import VectorDBProviderFactory
-from stores.llm.templates.template_parser import TemplateParser
-from sqlalchemy.ext.asyncio import create_async_engine , AsyncSession
-from sqlalchemy.orm import sessionmaker
+from helpers.config import get_settings , add_reload_signal_handler
+from helpers.resources import create_resources , close_resources
+from controllers import JobController , DataController , NLPController
+from models.JobModel import JobModel
+from prometheus_client import make_asgi_app
+import asyncio
 
 
 app=FastAPI()
 
+# Exporting the prometheus metrics like the database pool usage
+app.mount("/metrics", make_asgi_app())
+
 # Making the Start-Up Function which initiatlize every possible variable
 @app.on_event("startup")
 async def startup_span():
@@ -21,46 +25,42 @@ async def startup_span():
     # Getting Settings and credientials from the settings class which contains environment variables
     settings=get_settings()
 
-    # Initializing data base connection
-    postgres_conn = f"postgresql+asyncpg://{settings.POSTGRES_USERNAME}:{settings.POSTGRES_PASSWORD}@{settings.POSTGRES_HOST}:{settings.POSTGRES_PORT}/{settings.POSTGRES_MAIN_DATABASE}" 
-    
-    # Creating Async Engine to make ORM sessions
-    app.db_engine = create_async_engine(postgres_conn)
-
-    # Using the engine to create async session for database operations , expire on commit keeps the session on even after commiting
-    app.db_client=sessionmaker(
-        app.db_engine, class_ = AsyncSession , expire_on_commit = False
-        )
-
-    # Creating the factory instance for the LLM provider
-    llm_provider_factory = LLMProviderFactory(settings)
-
-    # Creating the factory instance for the vector database provider
-    vectordb_provider_factory = VectorDBProviderFactory(config = settings,db_client=app.db_client)
-
-
-    # Generation_client , creating the generation client from the provider and setting the model ID for it
-    app.generation_client = llm_provider_factory.create(provider=settings.GENERATION_BACKEND)
-    app.generation_client.set_generation_model(model_id = settings.GENERATION_MODEL_ID)
-
-    # Embedding_client , creating the embedding client from the provider and setting the model ID and the embedding size for it
-    app.embedding_client = llm_provider_factory.create(provider=settings.EMBEDDING_BACKEND)
-    app.embedding_client.set_embedding_model(model_id = settings.EMBEDDING_MODEL_ID,
-                                             embedding_size = settings.EMBEDDING_MODEL_SIZE)
-    
-
-    # Vectordb_client , creating the vector database client and connect to this client giving the chosen vector database back end then connecting to it
-    app.vectordb_client=vectordb_provider_factory.create_provider(provider=settings.VECTOR_DB_BACKEND)
-    await app.vectordb_client.connect()
-
-    # Templates , setting the language for the template for the llm
-    app.template_parser = TemplateParser(language = settings.PRIMARY_LANGUAGE , default_language = settings.DEFAULT_LANGUAGE) 
+    # Reloading the settings on SIGHUP without restarting the server
+    add_reload_signal_handler(asyncio.get_running_loop())
+
+    # Creating the database session maker , the LLM clients , the caches , the vector database client and the templates
+    await create_resources(app , settings)
+
+    # The controllers shared by all the requests , they only hold the shared clients
+    app.data_controller = DataController()
+    app.nlp_controller = NLPController(
+        vectordb_client = app.vectordb_client,
+        generation_client = app.generation_client,
+        embedding_client = app.embedding_client,
+        template_parser = app.template_parser,
+        answer_cache = app.answer_cache,
+        reranking_stage = app.reranking_stage,
+        context_packer = app.context_packer
+    )
+
+    # Starting the job workers inside the API , it's set to 0 on the API nodes when the jobs run on dedicated worker nodes
+    app.job_stop_event = asyncio.Event()
+    job_model = await JobModel.create_instance(db_client = app.db_client)
+    app.job_workers = [
+        asyncio.create_task(JobController(resources = app , job_model = job_model).run_worker(stop_event = app.job_stop_event))
+        for _ in range(settings.JOB_WORKERS_COUNT)
+    ]
 
 # Define shutdown events like cleaning the database connection and the vector database connection
+# The running jobs are cancelled and put back in the queue for the next worker
 @app.on_event("shutdown")
 async def shutdown_span():
-    app.db_engine.dispose()
-    await app.vectordb_client.disconnect()
+    app.job_stop_event.set()
+    for worker in app.job_workers:
+        worker.cancel()
+    await asyncio.gather(*app.job_workers , return_exceptions = True)
+
+    await close_resources(app)
 
 
 
@@ -68,4 +68,5 @@ async def shutdown_span():
 # Registering routers to the main app
 app.include_router(base.base_router)
 app.include_router(data.data_router)
-app.include_router(nlp.nlp_router)
\ No newline at end of file
+app.include_router(nlp.nlp_router)
+app.include_router(jobs.jobs_router)
\ No newline at end of file
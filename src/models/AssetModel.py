@@ -8,40 +8,94 @@ from .db_schemas import Asset
 
 # Get the select statment to select from the database
 from sqlalchemy.future import select
+from sqlalchemy import update
+from sqlalchemy.dialects.postgresql import insert
 
 # Creating the AssetModel Class for interactions with the database
 class AssetModel(BaseDataModel):
 
-    # initialization for the class to set the database client
-    def __init__(self, db_client: object):
-        super().__init__(db_client=db_client)
-        self.db_client = db_client
+    # initialization for the class to set the database client and the session of the request if there's one
+    def __init__(self, db_client: object , db_session : object = None):
+        super().__init__(db_client=db_client , db_session=db_session)
 
     # Creating a class method to create an object from the class using await
     @classmethod
-    async def create_instance(cls, db_client: object):
-        instance = cls(db_client)
+    async def create_instance(cls, db_client: object , db_session : object = None):
+        instance = cls(db_client , db_session)
         return instance
 
     # A function to create an asset into the database
     async def create_asset(self, asset : Asset):
         
-        # Making the db_client as our session to integrate with
-        async with self.db_client() as session:
-            # Now begin the session to insert the asset into the database
-            async with session.begin():
-                session.add(asset)
-            # Commiting our changes
-            await session.commit()
+        # Getting the session to integrate with , the transaction is committed at the end of its scope
+        async with self.session_scope() as session:
+            # Now insert the asset into the database
+            session.add(asset)
+            # Flushing our changes to get the ID of the asset
+            await session.flush()
             # Refreshing database to get freshed data
             await session.refresh(asset)
         return asset
 
+    # A function to create many assets in one insert , it returns the created assets
+    # An asset whose content hash already exists in its project isn't created , it's a duplicate of the existing one
+    async def create_assets(self , assets : list , batch_size : int = 1000):
+
+        if not assets:
+            return []
+
+        # The columns given by the application , the IDs , the UUIDs and the dates are set on insert
+        rows = [
+            {
+                "asset_type" : asset.asset_type,
+                "asset_name" : asset.asset_name,
+                "asset_size" : asset.asset_size,
+                "asset_config" : asset.asset_config,
+                "asset_hash" : asset.asset_hash,
+                "asset_project_id" : asset.asset_project_id
+            }
+            for asset in assets
+        ]
+
+        records = []
+
+        # Getting the session to insert the assets into the database
+        async with self.session_scope() as session:
+            for i in range(0 , len(rows) , batch_size):
+                stmt = insert(Asset).values(rows[i:i+batch_size]).on_conflict_do_nothing(
+                    index_elements = [Asset.asset_project_id , Asset.asset_hash]
+                ).returning(Asset)
+
+                result = await session.scalars(stmt)
+                records.extend(result.all())
+
+        return records
+
+    # A function to get the assets of a project that have one of the given content hashes
+    async def get_assets_by_hashes(self , asset_project_id : int , asset_hashes : list):
+
+        if not asset_hashes:
+            return []
+
+        # Getting the session to integrate with
+        async with self.session_scope() as session:
+
+            # Preparing Statement to execute in the database
+            stmt = select(Asset).where(
+                Asset.asset_project_id == asset_project_id,
+                Asset.asset_hash.in_(asset_hashes)
+            )
+            # Execute the statement to get results
+            result = await session.execute(stmt)
+
+            records = result.scalars().all()
+        return records
+
     # A function to get all project assets from the database
     async def get_all_project_assets(self , asset_project_id : str):
         
-        # Making the db_client as our session to integrate with
-        async with self.db_client() as session:
+        # Getting the session to integrate with
+        async with self.session_scope() as session:
 
             # Preparing Statement to execute in the database
             stmt = select(Asset).where(Asset.asset_project_id == asset_project_id)
@@ -55,8 +109,8 @@ class AssetModel(BaseDataModel):
     # A function to the get any asset
     async def get_asset_record(self, asset_project_id: str, asset_name: str):
 
-        # Making the db_client as our session to integrate with
-        async with self.db_client() as session:
+        # Getting the session to integrate with
+        async with self.session_scope() as session:
             # Preparing Statement to execute in the database
             stmt = select(Asset).where(
                 Asset.asset_project_id == asset_project_id,
@@ -67,4 +121,14 @@ class AssetModel(BaseDataModel):
 
             # Saving the results in the record then return it
             record = result.scalar_one_or_none()
-        return record
\ No newline at end of file
+        return record
+
+    # A function to replace the config of an asset , like the content hash of the file it was processed from
+    async def update_asset_config(self , asset_id : int , asset_config : dict):
+
+        # Getting the session to update the asset
+        async with self.session_scope() as session:
+            stmt = update(Asset).where(Asset.asset_id == asset_id).values(asset_config = asset_config)
+            await session.execute(stmt)
+
+        return True
@@ -1,8 +1,30 @@
 # Create a Base Data model to inherit from in every data class for manipulating database
 from helpers.config import get_settings,Settings
+from contextlib import asynccontextmanager
 
 # Creating the model and taking as initialization the database client to interface with the database
+# The database session is optional , it's the session of the request when the model is created for a request
 class BaseDataModel:
-    def __init__(self,db_client : object):
+    def __init__(self,db_client : object , db_session : object = None):
         self.db_client=db_client
-        self.app_settings=get_settings()
\ No newline at end of file
+        self.db_session = db_session
+
+    # Getting the configuration Settings , they're cached for the process so reading them is free
+    # and the long lived models see the settings reloaded on SIGHUP
+    @property
+    def app_settings(self) -> Settings:
+        return get_settings()
+
+    # Getting the session of a database operation
+    # The models of a request share the request session , its unit of work is committed once when the request ends
+    # Without it every operation gets its own session and its own transaction , like in the job workers
+    @asynccontextmanager
+    async def session_scope(self):
+
+        if self.db_session is not None:
+            yield self.db_session
+            return
+
+        async with self.db_client() as session:
+            async with session.begin():
+                yield session
\ No newline at end of file
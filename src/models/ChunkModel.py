@@ -10,38 +10,40 @@ from .db_schemas import DataChunk
 from sqlalchemy.future import select
 
 # Get the select function to execute function in the database
-from sqlalchemy import func , delete
+from sqlalchemy import func , delete , update , insert
 
 # Import the ObjectID to validate funcitons input
 from bson.objectid import ObjectId
 
+# The columns of a chunk given by the application when it's inserted
+CHUNK_INSERT_COLUMNS = ("chunk_type" , "chunk_text" , "chunk_metadata" , "chunk_order" , "chunk_hash" ,
+                        "chunk_project_id" , "chunk_asset_id")
+
 
 # Creating the ChunkModel Class for interactions with the database
 class ChunkModel(BaseDataModel):
 
-    # initialization for the class to set the database client
-    def __init__(self,db_client : object):
-        super().__init__(db_client=db_client)
-        self.db_client = self.db_client
+    # initialization for the class to set the database client and the session of the request if there's one
+    def __init__(self,db_client : object , db_session : object = None):
+        super().__init__(db_client=db_client , db_session=db_session)
 
     # Creating a class method to create an object from the class using await
     @classmethod
-    async def create_instance(cls , db_client : object):
-        instance = cls(db_client)
+    async def create_instance(cls , db_client : object , db_session : object = None):
+        instance = cls(db_client , db_session)
         return instance
 
     # A function to insert chunk into the database
     async def insert_chunk(self , chunk : DataChunk):
         
-        # Making the db_client as our session to integrate with
-        async with self.db_client() as session:
+        # Getting the session to integrate with , the transaction is committed at the end of its scope
+        async with self.session_scope() as session:
 
-            # Now begin the session to insert the chunk into the database
-            async with session.begin():
-                session.add(chunk)
+            # Now insert the chunk into the database
+            session.add(chunk)
 
-            # Commiting our changes
-            await session.commit()
+            # Flushing our changes to get the ID of the chunk
+            await session.flush()
 
             # Refreshing database to get freshed data
             await session.refresh(chunk)
@@ -51,98 +53,186 @@ class ChunkModel(BaseDataModel):
     # A function to get a chunk from the database
     async def get_chunk(self,chunk_id: str):
 
-        # Making the db_client as our session to integrate with
-        async with self.db_client() as session:
-
-            # Now begin the session to get the chunk into the database
-            async with session.begin():
+        # Getting the session to integrate with
+        async with self.session_scope() as session:
 
-                # Prepare the statement and execute the query to get the chunk
-                result = await session.execute(select(DataChunk).where(DataChunk.chunk_id == chunk_id))
-                chunk = result.scalar_one_or_none()
+            # Prepare the statement and execute the query to get the chunk
+            result = await session.execute(select(DataChunk).where(DataChunk.chunk_id == chunk_id))
+            chunk = result.scalar_one_or_none()
         return chunk
     
     async def get_chunk_document_by_asset(self,asset_id: str):
 
-        # Making the db_client as our session to integrate with
-        async with self.db_client() as session:
+        # Getting the session to integrate with
+        async with self.session_scope() as session:
 
-            # Now begin the session to get the chunk into the database
-            async with session.begin():
-
-                # Prepare the statement and execute the query to get the chunk
-                result = await session.execute(select(DataChunk).where(DataChunk.chunk_asset_id == asset_id,
-                                                                       DataChunk.chunk_type == "Document"))
-                chunk = result.scalar_one_or_none()
+            # Prepare the statement and execute the query to get the chunk
+            result = await session.execute(select(DataChunk).where(DataChunk.chunk_asset_id == asset_id,
+                                                                   DataChunk.chunk_type == "Document"))
+            chunk = result.scalar_one_or_none()
         return chunk
         
 
-    # A function to the insert many chunks
-    async def insert_many_chunks(self,chunks : list,batch_size : int =100):
-        
-        # Making the db_client as our session to integrate with
-        async with self.db_client() as session:
+    # A function to the insert many chunks , it returns how many chunks were inserted
+    async def insert_many_chunks(self,chunks : list,batch_size : int =1000):
+        chunk_ids = await self.bulk_insert_chunks(chunks = chunks , batch_size = batch_size)
+        return len(chunk_ids)
 
-            # Now begin the session to insert the asset into the database
-            async with session.begin():
+    # A function to insert many chunks with a single core INSERT and return their new IDs in the same order
+    # The chunks can be DataChunk objects or dictionaries of their columns , dictionaries skip building ORM objects
+    # The rows don't go through the session unit of work , the driver sends them as multi rows VALUES pages of batch_size
+    async def bulk_insert_chunks(self , chunks : list , batch_size : int = 1000):
+
+        if not chunks:
+            return []
+
+        # Every row has the same columns so they're all sent in the same statement
+        rows = [ self.to_chunk_row(chunk) for chunk in chunks ]
+
+        # Preparing the insert returning the IDs in the order of the rows
+        chunks_table = DataChunk.__table__
+        stmt = insert(chunks_table).returning(chunks_table.c.chunk_id , sort_by_parameter_order = True)
+
+        # Getting the session to insert the chunks into the database
+        async with self.session_scope() as session:
+            result = await session.execute(stmt , rows ,
+                                           execution_options = {"insertmanyvalues_page_size" : batch_size})
+            chunk_ids = result.scalars().all()
+
+        return chunk_ids
+
+    # Turning a chunk into the row of the insert , the IDs , the UUIDs and the dates are set by the database
+    @staticmethod
+    def to_chunk_row(chunk):
+
+        if not isinstance(chunk , dict):
+            chunk = { column : getattr(chunk , column , None) for column in CHUNK_INSERT_COLUMNS }
+
+        row = { column : chunk.get(column) for column in CHUNK_INSERT_COLUMNS }
+        row["chunk_type"] = row["chunk_type"] or "Chunk"
+
+        return row
 
-                # Loop over chunks to insert them in the batches then insert batcehs one by one
-                for i in range(0,len(chunks),batch_size):
-                    batch = chunks[i:i+batch_size]
-                    session.add_all(batch)
-            
-            # Commit our changes then return length of all chunks
-            await session.commit()
-        return len(chunks)
-        
 
     # A function to delete chunks by project ID , to delete all project related chunks
     async def delete_chunks_by_project_id(self,project_id : ObjectId):
         
-        # Making the db_client as our session to integrate with
-        async with self.db_client() as session:
-
-            # Now begin the session to insert the asset into the database
-            async with session.begin():
+        # Getting the session to integrate with , the transaction is committed at the end of its scope
+        async with self.session_scope() as session:
 
-                # Prepare the statement and execute it to delete every chunk that's project Id is equal the project Id we take as a parameter
-                result = await session.execute(delete(DataChunk).where(DataChunk.chunk_project_id == project_id))
-            
-            # Commiting our changes
-            await session.commit()
+            # Prepare the statement and execute it to delete every chunk that's project Id is equal the project Id we take as a parameter
+            result = await session.execute(delete(DataChunk).where(DataChunk.chunk_project_id == project_id))
 
         # Return how many rows were deleted from the database
         return result.rowcount
     
 
+    # A function to delete chunks by their IDs , it's used to remove the chunks that vanished from a re-processed file
+    async def delete_chunks_by_ids(self , chunk_ids : list):
+
+        if not chunk_ids:
+            return 0
+
+        # Getting the session to delete the chunks from the database
+        async with self.session_scope() as session:
+            result = await session.execute(delete(DataChunk).where(DataChunk.chunk_id.in_(chunk_ids)))
+
+        # Return how many rows were deleted from the database
+        return result.rowcount
+
+    # A function to get the ID , the hash and the order of every chunk of an asset
+    # Only these columns are loaded so diffing a big file doesn't load its texts
+    async def get_asset_chunk_hashes(self , asset_id : int):
+
+        # Getting the session to integrate with
+        async with self.session_scope() as session:
+
+            # Prepare the statement and execute the query to get the chunks hashes of the asset
+            stmt = select(DataChunk.chunk_id , DataChunk.chunk_hash , DataChunk.chunk_order).where(
+                DataChunk.chunk_asset_id == asset_id,
+                DataChunk.chunk_type == "Chunk"
+            ).order_by(DataChunk.chunk_id)
+            result = await session.execute(stmt)
+
+            records = result.all()
+        return records
+
+    # A function to update the order of many chunks at once , every item is a dictionary of chunk_id and chunk_order
+    async def update_chunks_order(self , chunks_orders : list):
+
+        if not chunks_orders:
+            return 0
+
+        # Getting the session and update the chunks by their primary key in one executemany
+        async with self.session_scope() as session:
+            await session.execute(update(DataChunk) , chunks_orders)
+
+        return len(chunks_orders)
+
     # A function to get all project related chunks
     async def get_project_chunks(self,project_id : ObjectId , page_no : int = 1 , page_size : int = 100):
         
-        # Making the db_client as our session to integrate with
-        async with self.db_client() as session:
-
-            # Now begin the session to insert the asset into the database
-            async with session.begin():
+        # Getting the session to integrate with
+        async with self.session_scope() as session:
 
-                # Perpare the get statement to get chunks
-                stmt = select(DataChunk).where(DataChunk.chunk_project_id == project_id , DataChunk.chunk_type == "Chunk").offset((page_no -1) * page_size).limit(page_size)
-                
-                # Executing the statement and save the result
-                result = await session.execute(stmt)
+            # Perpare the get statement to get chunks
+            stmt = select(DataChunk).where(DataChunk.chunk_project_id == project_id , DataChunk.chunk_type == "Chunk").order_by(DataChunk.chunk_id).offset((page_no -1) * page_size).limit(page_size)
+            
+            # Executing the statement and save the result
+            result = await session.execute(stmt)
 
-                # get all results and save them in records then return them
-                records = result.scalars().all()
+            # get all results and save them in records then return them
+            records = result.scalars().all()
         return records
     
 
+    # A function to stream all project related chunks page by page ordered by the chunk ID
+    # Every page starts after the last chunk ID of the previous page , so the database seeks directly
+    # into the (chunk_project_id , chunk_type , chunk_id) index instead of skipping an offset of rows
+    # The iteration can start after a chunk ID to only get the chunks inserted after it , or only get the chunks of some assets
+    async def iterate_project_chunks(self , project_id : ObjectId , page_size : int = 100 , after_chunk_id : int = 0 ,
+                                     asset_ids : list = None):
+
+        # Starting after the given chunk ID , before the first chunk ID by default
+        last_chunk_id = after_chunk_id
+
+        while True:
+
+            # Getting the session to integrate with , every page gets its own session outside a request
+            async with self.session_scope() as session:
+
+                # Perpare the get statement to get the chunks after the last chunk ID
+                stmt = select(DataChunk).where(DataChunk.chunk_project_id == project_id ,
+                                               DataChunk.chunk_type == "Chunk" ,
+                                               DataChunk.chunk_id > last_chunk_id).order_by(DataChunk.chunk_id).limit(page_size)
+                if asset_ids is not None:
+                    stmt = stmt.where(DataChunk.chunk_asset_id.in_(list(asset_ids)))
+
+                # Executing the statement and get all results
+                result = await session.execute(stmt)
+                records = result.scalars().all()
+
+            # If there's no more chunks we stop the iteration
+            if not records:
+                return
+
+            yield records
+
+            # If the page isn't full it's the last page
+            if len(records) < page_size:
+                return
+
+            last_chunk_id = records[-1].chunk_id
+
+
     # A function to count all chunks in a single project
     async def get_total_chunks_count(self , project_id : ObjectId):
         
         # Initiate the records count with zero to store the chunks count
         records_count = 0
 
-        # Making the db_client as our session to integrate with
-        async with self.db_client() as session:
+        # Getting the session to integrate with
+        async with self.session_scope() as session:
 
             # Prepare the statement to count the chunks in a single project
             count_sql = select(func.count(DataChunk.chunk_id)).where(DataChunk.chunk_project_id == project_id,
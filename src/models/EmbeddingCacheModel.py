@@ -0,0 +1,78 @@
+# Creating an embedding cache model to store and get cached embeddings from the database
+
+# Importing the base data model to inherit from
+from .BaseDataModel import BaseDataModel
+
+# Import the schema of the embedding cache entry
+from .db_schemas import EmbeddingCacheEntry
+
+# Get the select statment to select from the database
+from sqlalchemy.future import select
+
+# Get the postgres insert statement to ignore the already cached entries
+from sqlalchemy.dialects.postgresql import insert
+from typing import List , Dict
+
+# Creating the EmbeddingCacheModel Class for interactions with the database
+class EmbeddingCacheModel(BaseDataModel):
+
+    # initialization for the class to set the database client
+    def __init__(self, db_client: object):
+        super().__init__(db_client=db_client)
+        self.db_client = db_client
+
+    # Creating a class method to create an object from the class using await
+    @classmethod
+    async def create_instance(cls, db_client: object):
+        instance = cls(db_client)
+        return instance
+
+    # A function to get the cached embeddings of many texts hashes at once
+    # It returns a dictionary from the text hash to its embedding
+    async def get_embeddings(self , backend : str , model_id : str , document_type : str , text_hashes : List[str]):
+
+        if not text_hashes:
+            return {}
+
+        # Making the db_client as our session to integrate with
+        async with self.db_client() as session:
+
+            # Preparing Statement to execute in the database
+            stmt = select(EmbeddingCacheEntry.cache_text_hash , EmbeddingCacheEntry.cache_embedding).where(
+                EmbeddingCacheEntry.cache_backend == backend,
+                EmbeddingCacheEntry.cache_model_id == model_id,
+                EmbeddingCacheEntry.cache_document_type == document_type,
+                EmbeddingCacheEntry.cache_text_hash.in_(text_hashes)
+            )
+
+            # Execute the statement to get results
+            result = await session.execute(stmt)
+            records = result.fetchall()
+
+        return {record.cache_text_hash : list(record.cache_embedding) for record in records}
+
+    # A function to store many embeddings at once , the already cached ones are left as they are
+    async def insert_embeddings(self , backend : str , model_id : str , document_type : str , embeddings : Dict[str , list]):
+
+        if not embeddings:
+            return 0
+
+        # Making the db_client as our session to integrate with
+        async with self.db_client() as session:
+
+            # Now begin the session to insert the embeddings into the database
+            async with session.begin():
+                stmt = insert(EmbeddingCacheEntry).values([
+                    {
+                        "cache_backend" : backend,
+                        "cache_model_id" : model_id,
+                        "cache_document_type" : document_type,
+                        "cache_text_hash" : text_hash,
+                        "cache_embedding" : embedding,
+                    }
+                    for text_hash , embedding in embeddings.items()
+                ]).on_conflict_do_nothing()
+
+                await session.execute(stmt)
+
+        return len(embeddings)
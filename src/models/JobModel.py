@@ -0,0 +1,190 @@
+# Creating a job model to queue , claim and track the background jobs in the database
+
+# Importing the base data model to inherit from
+from .BaseDataModel import BaseDataModel
+
+# Import the schema of the job to validate data
+from .db_schemas import Job
+from .enums.JobEnums import JobStatusEnums
+
+# Get the select and update statments to integrate with the database
+from sqlalchemy.future import select
+from sqlalchemy import update , func , exists
+from sqlalchemy.orm import aliased
+from datetime import datetime , timezone , timedelta
+
+# The first key of the advisory locks taken while claiming the jobs of a project , the second one is the project ID
+JOB_CLAIM_LOCK_KEY = 7301
+
+# Creating the JobModel Class for interactions with the database
+class JobModel(BaseDataModel):
+
+    # initialization for the class to set the database client and the session of the request if there's one
+    def __init__(self, db_client: object , db_session : object = None):
+        super().__init__(db_client=db_client , db_session=db_session)
+
+    # Creating a class method to create an object from the class using await
+    @classmethod
+    async def create_instance(cls, db_client: object , db_session : object = None):
+        instance = cls(db_client , db_session)
+        return instance
+
+    # A function to queue a job into the database
+    async def create_job(self , job : Job):
+
+        job.job_status = JobStatusEnums.PENDING.value
+        job.job_processed_items = 0
+        job.job_attempts = 0
+
+        # Getting the session to integrate with , in a request the job is queued in the request unit of work
+        # so the workers only see it once the request is committed with the project it belongs to
+        async with self.session_scope() as session:
+            # Now insert the job into the database
+            session.add(job)
+            await session.flush()
+            # Refreshing database to get freshed data
+            await session.refresh(job)
+        return job
+
+    # A function to get a job by its ID
+    async def get_job(self , job_id : int):
+
+        # Getting the session to integrate with
+        async with self.session_scope() as session:
+            stmt = select(Job).where(Job.job_id == job_id)
+            result = await session.execute(stmt)
+            record = result.scalar_one_or_none()
+        return record
+
+    # A function to claim the oldest pending job for a worker
+    # The row is locked with skip locked so concurrent workers never claim the same job and never wait for each other
+    # A project runs one job at a time , a reset or an incremental processing mustn't change a collection another job writes to
+    async def claim_next_job(self , worker_id : str):
+
+        running_job = aliased(Job)
+        has_running_job = exists().where(running_job.job_project_id == Job.job_project_id ,
+                                         running_job.job_status == JobStatusEnums.RUNNING.value)
+
+        # Making the db_client as our session to integrate with
+        async with self.db_client() as session:
+            async with session.begin():
+                stmt = (
+                    select(Job)
+                    .where(Job.job_status == JobStatusEnums.PENDING.value , ~has_running_job)
+                    .order_by(Job.job_id)
+                    .limit(1)
+                    .with_for_update(skip_locked = True)
+                )
+                result = await session.execute(stmt)
+                job = result.scalar_one_or_none()
+
+                if job is None:
+                    return None
+
+                # Two workers can pick two jobs of the same project at once , the claims of a project are serialized
+                # with an advisory lock held until the commit , then the running jobs are checked again after getting it
+                lock_stmt = select(func.pg_try_advisory_xact_lock(JOB_CLAIM_LOCK_KEY , job.job_project_id))
+                if not (await session.execute(lock_stmt)).scalar():
+                    return None
+
+                running_stmt = select(func.count(Job.job_id)).where(Job.job_project_id == job.job_project_id ,
+                                                                    Job.job_status == JobStatusEnums.RUNNING.value)
+                if (await session.execute(running_stmt)).scalar():
+                    return None
+
+                # Marking the job as running by this worker , the progress starts again if it's a retry
+                job.job_status = JobStatusEnums.RUNNING.value
+                job.job_worker_id = worker_id
+                job.job_attempts = job.job_attempts + 1
+                job.job_processed_items = 0
+                job.job_error = None
+                job.started_at = datetime.now(timezone.utc)
+                job.finished_at = None
+
+            await session.refresh(job)
+        return job
+
+    # A function to store the progress of a running job , it also works as the heartbeat of the job
+    # Only the worker running the job updates it , a worker whose job was requeued as stale can't touch the next run
+    async def update_job_progress(self , job_id : int , worker_id : str , processed_items : int , total_items : int = None):
+
+        values = {"job_processed_items" : processed_items , "updated_at" : func.now()}
+        if total_items is not None:
+            values["job_total_items"] = total_items
+
+        async with self.db_client() as session:
+            async with session.begin():
+                await session.execute(
+                    update(Job)
+                    .where(Job.job_id == job_id , Job.job_worker_id == worker_id ,
+                           Job.job_status == JobStatusEnums.RUNNING.value)
+                    .values(**values)
+                )
+
+    # A function to mark a job as succeeded with its result
+    async def finish_job(self , job_id : int , worker_id : str , result : dict , processed_items : int , total_items : int = None):
+        return await self.end_job(job_id = job_id , worker_id = worker_id , status = JobStatusEnums.SUCCEEDED.value ,
+                                  processed_items = processed_items , total_items = total_items , job_result = result)
+
+    # A function to mark a job as failed with its error
+    async def fail_job(self , job_id : int , worker_id : str , error : str , processed_items : int , total_items : int = None):
+        return await self.end_job(job_id = job_id , worker_id = worker_id , status = JobStatusEnums.FAILED.value ,
+                                  processed_items = processed_items , total_items = total_items , job_error = error)
+
+    # A function to put a running job back in the queue , it's used when its worker stops before finishing it
+    async def requeue_job(self , job_id : int , worker_id : str):
+
+        async with self.db_client() as session:
+            async with session.begin():
+                await session.execute(
+                    update(Job)
+                    .where(Job.job_id == job_id , Job.job_worker_id == worker_id ,
+                           Job.job_status == JobStatusEnums.RUNNING.value)
+                    .values(job_status = JobStatusEnums.PENDING.value , job_worker_id = None)
+                )
+
+    # A function to recover the jobs of the workers that died , a running job without a heartbeat for a while
+    # is queued again , or failed if it already used all its attempts
+    async def requeue_stale_jobs(self , stale_after_seconds : int , max_attempts : int):
+
+        stale_before = datetime.now(timezone.utc) - timedelta(seconds = stale_after_seconds)
+        is_stale = (
+            (Job.job_status == JobStatusEnums.RUNNING.value) &
+            (func.coalesce(Job.updated_at , Job.started_at) < stale_before)
+        )
+
+        async with self.db_client() as session:
+            async with session.begin():
+                requeued = await session.execute(
+                    update(Job)
+                    .where(is_stale , Job.job_attempts < max_attempts)
+                    .values(job_status = JobStatusEnums.PENDING.value , job_worker_id = None)
+                )
+                failed = await session.execute(
+                    update(Job)
+                    .where(is_stale , Job.job_attempts >= max_attempts)
+                    .values(job_status = JobStatusEnums.FAILED.value ,
+                            job_error = "The job worker stopped responding" ,
+                            finished_at = datetime.now(timezone.utc))
+                )
+
+        return requeued.rowcount , failed.rowcount
+
+    # A function to end a running job with a final status , only the worker running the job can end it
+    async def end_job(self , job_id : int , worker_id : str , status : str , processed_items : int , total_items : int = None ,
+                      **values):
+
+        if total_items is not None:
+            values["job_total_items"] = total_items
+
+        async with self.db_client() as session:
+            async with session.begin():
+                await session.execute(
+                    update(Job)
+                    .where(Job.job_id == job_id , Job.job_worker_id == worker_id ,
+                           Job.job_status == JobStatusEnums.RUNNING.value)
+                    .values(job_status = status ,
+                            job_processed_items = processed_items ,
+                            finished_at = datetime.now(timezone.utc) ,
+                            **values)
+                )
@@ -10,32 +10,30 @@ from .db_schemas import Project
 from sqlalchemy.future import select
 
 # Get the select function to execute function in the database
-from sqlalchemy import func
+from sqlalchemy import func , update
 
 # Creating the ProjectModel Class fo interactions with the database
 class ProjectModel(BaseDataModel):
     
-    # initialization for the class to set the database client
-    def __init__(self,db_client : object):
-        super().__init__(db_client=db_client)
-        self.db_client = db_client
+    # initialization for the class to set the database client and the session of the request if there's one
+    def __init__(self,db_client : object , db_session : object = None):
+        super().__init__(db_client=db_client , db_session=db_session)
 
     # Creating a class method to create an object from the class using await
     @classmethod
-    async def create_instance(cls , db_client : object):
-        instance = cls(db_client)
+    async def create_instance(cls , db_client : object , db_session : object = None):
+        instance = cls(db_client , db_session)
         return instance
     
     # A function to create a project into the database
     async def create_project(self , project : Project):
         
-        # Making the db_client as our session to integrate with
-        async with self.db_client() as session:
-            # Now begin the session to insert the project into the database
-            async with session.begin():
-                session.add(project)
-            # Commiting our changes
-            await session.commit()
+        # Getting the session to integrate with , the transaction is committed at the end of its scope
+        async with self.session_scope() as session:
+            # Now insert the project into the database
+            session.add(project)
+            # Flushing our changes to get the ID of the project
+            await session.flush()
             # Refreshing database to get freshed data
             await session.refresh(project)
         return project
@@ -43,39 +41,49 @@ class ProjectModel(BaseDataModel):
     # A function to get the project or create it if there's not a one
     async def get_project_or_create_project(self , project_id : str):
         
-        # Making the db_client as our session to integrate with
-        async with self.db_client() as session:
-            # Now begin the session to insert the project into the database
-            async with session.begin():
-                # Create the query we wish to execute
-                query = await session.execute(select(Project).where(Project.project_id == project_id))
-                # now execute the query
-                project = query.scalar_one_or_none()
-                # check if the query returned a record or not , if not create one and return it
-                if project is None:
-                    project_record = Project(project_id = project_id)
-                    project = await self.create_project(project = project_record)
-                return project
+        # Getting the session to integrate with , the project is created in the same session
+        async with self.session_scope() as session:
+            # Create the query we wish to execute
+            query = await session.execute(select(Project).where(Project.project_id == project_id))
+            # now execute the query
+            project = query.scalar_one_or_none()
+            # check if the query returned a record or not , if not create one and return it
+            if project is None:
+                project = Project(project_id = project_id)
+                session.add(project)
+                await session.flush()
+                await session.refresh(project)
+        return project
 
     # A function to get all projects that's in the database
     async def get_all_projects(self,page : int = 1 ,page_size : int = 10):
 
-        # Making the db_client as our session to integrate with
-        async with self.db_client() as session:
-            # Now begin the session to insert the project into the database
-            async with session.begin():
-                # Create the statement and execute it to get
-                total_documents = await session.execute(select(
-                    func.count(Project.project_id)
-                )).scalar_one()
+        # Getting the session to integrate with
+        async with self.session_scope() as session:
+            # Create the statement and execute it to get
+            total_documents = (await session.execute(select(
+                func.count(Project.project_id)
+            ))).scalar_one()
+
+            # Getting number of total pages
+            total_pages = total_documents // page_size
+            if total_documents % page_size > 0:
+                total_pages += 1
+
+            # make the statement to select all projects and return them
+            query = select(Project).offset(( page - 1 )* page_size).limit(page_size)
+            projects = (await session.execute(query)).scalars().all()
+
+        return projects , total_pages
 
-                # Getting number of total pages
-                total_pages = total_documents // page_size
-                if total_documents % page_size > 0:
-                    total_pages += 1
+    # A function to bump the collection version of a project , it's done whenever its vector collection changes
+    # so the answers cached by every process from the old collection aren't served anymore
+    async def bump_collection_version(self , project_id : int):
 
-                # make the statement to select all projects and return them
-                query = select(Project).offset(( page - 1 )* page_size).limit(page_size)
-                projects = await session.execute(query).scalars.all()
+        async with self.session_scope() as session:
+            stmt = update(Project).where(Project.project_id == project_id).values(
+                project_collection_version = Project.project_collection_version + 1
+            ).returning(Project.project_collection_version)
+            version = (await session.execute(stmt)).scalar_one_or_none()
 
-                return projects , total_pages
\ No newline at end of file
+        return version
\ No newline at end of file
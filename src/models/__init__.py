@@ -1,3 +1,5 @@
 from .enums.ResponseEnums import ResponseSignal
 from .enums.ProcessingEnums import ProcessingEnums
-from .enums.AssetTypeEnum import AssetTypeEnum
\ No newline at end of file
+from .enums.AssetTypeEnum import AssetTypeEnum
+from .enums.StreamEventEnums import StreamEventEnums
+from .enums.JobEnums import JobTypeEnums , JobStatusEnums
\ No newline at end of file
@@ -1 +1 @@
-from models.db_schemas.mini_rag.schemes import Project , DataChunk , RetrievedDocument , Asset
\ No newline at end of file
+from models.db_schemas.mini_rag.schemes import Project , DataChunk , RetrievedDocument , Asset , EmbeddingCacheEntry , Job
\ No newline at end of file
@@ -0,0 +1,26 @@
+"""chunk uuid server default
+
+Revision ID: 2d8f6a4c1e07
+Revises: 9e4b7c2a6d51
+Create Date: 2026-10-18 18:21:37.904126
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '2d8f6a4c1e07'
+down_revision: Union[str, None] = '9e4b7c2a6d51'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.alter_column('chunks', 'chunk_uuid', server_default=sa.text('gen_random_uuid()'))
+
+
+def downgrade() -> None:
+    op.alter_column('chunks', 'chunk_uuid', server_default=None)
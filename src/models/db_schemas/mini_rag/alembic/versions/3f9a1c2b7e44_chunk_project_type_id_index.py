@@ -0,0 +1,26 @@
+"""chunk project type id index
+
+Revision ID: 3f9a1c2b7e44
+Revises: d667d3780ffe
+Create Date: 2026-10-18 10:12:41.208311
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3f9a1c2b7e44'
+down_revision: Union[str, None] = 'd667d3780ffe'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index('ix_chunk_project_type_id', 'chunks', ['chunk_project_id', 'chunk_type', 'chunk_id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_chunk_project_type_id', table_name='chunks')
@@ -0,0 +1,50 @@
+"""jobs
+
+Revision ID: 5c7e9a1d3b28
+Revises: 8b2d4e6f1a93
+Create Date: 2026-10-18 15:12:41.208315
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision: str = '5c7e9a1d3b28'
+down_revision: Union[str, None] = '8b2d4e6f1a93'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('jobs',
+    sa.Column('job_id', sa.Integer(), autoincrement=True, nullable=False),
+    sa.Column('job_uuid', sa.UUID(), nullable=False),
+    sa.Column('job_type', sa.String(), nullable=False),
+    sa.Column('job_status', sa.String(), nullable=False),
+    sa.Column('job_params', postgresql.JSONB(astext_type=sa.Text()), nullable=True),
+    sa.Column('job_result', postgresql.JSONB(astext_type=sa.Text()), nullable=True),
+    sa.Column('job_error', sa.String(), nullable=True),
+    sa.Column('job_total_items', sa.Integer(), nullable=True),
+    sa.Column('job_processed_items', sa.Integer(), nullable=False),
+    sa.Column('job_attempts', sa.Integer(), nullable=False),
+    sa.Column('job_worker_id', sa.String(), nullable=True),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.Column('updated_at', sa.DateTime(timezone=True), nullable=True),
+    sa.Column('started_at', sa.DateTime(timezone=True), nullable=True),
+    sa.Column('finished_at', sa.DateTime(timezone=True), nullable=True),
+    sa.Column('job_project_id', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['job_project_id'], ['projects.project_id'], ),
+    sa.PrimaryKeyConstraint('job_id'),
+    sa.UniqueConstraint('job_uuid')
+    )
+    op.create_index('ix_job_project_id', 'jobs', ['job_project_id'], unique=False)
+    op.create_index('ix_job_status_id', 'jobs', ['job_status', 'job_id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_job_status_id', table_name='jobs')
+    op.drop_index('ix_job_project_id', table_name='jobs')
+    op.drop_table('jobs')
@@ -0,0 +1,28 @@
+"""asset hash
+
+Revision ID: 6a3c9e1f7b52
+Revises: 2d8f6a4c1e07
+Create Date: 2026-10-18 19:02:55.318472
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '6a3c9e1f7b52'
+down_revision: Union[str, None] = '2d8f6a4c1e07'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('assets', sa.Column('asset_hash', sa.String(), nullable=True))
+    op.create_index('ix_asset_project_hash', 'assets', ['asset_project_id', 'asset_hash'], unique=True)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_asset_project_hash', table_name='assets')
+    op.drop_column('assets', 'asset_hash')
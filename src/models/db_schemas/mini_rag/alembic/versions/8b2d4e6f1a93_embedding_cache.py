@@ -0,0 +1,34 @@
+"""embedding cache
+
+Revision ID: 8b2d4e6f1a93
+Revises: 3f9a1c2b7e44
+Create Date: 2026-10-18 13:47:05.514230
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision: str = '8b2d4e6f1a93'
+down_revision: Union[str, None] = '3f9a1c2b7e44'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('embedding_cache',
+    sa.Column('cache_backend', sa.String(), nullable=False),
+    sa.Column('cache_model_id', sa.String(), nullable=False),
+    sa.Column('cache_document_type', sa.String(), nullable=False),
+    sa.Column('cache_text_hash', sa.String(length=64), nullable=False),
+    sa.Column('cache_embedding', postgresql.ARRAY(postgresql.REAL()), nullable=False),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.PrimaryKeyConstraint('cache_backend', 'cache_model_id', 'cache_document_type', 'cache_text_hash')
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('embedding_cache')
@@ -0,0 +1,26 @@
+"""chunk hash
+
+Revision ID: 9e4b7c2a6d51
+Revises: 5c7e9a1d3b28
+Create Date: 2026-10-18 17:04:12.551307
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9e4b7c2a6d51'
+down_revision: Union[str, None] = '5c7e9a1d3b28'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('chunks', sa.Column('chunk_hash', sa.String(), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column('chunks', 'chunk_hash')
@@ -0,0 +1,26 @@
+"""project collection version
+
+Revision ID: c4e8a2f6b913
+Revises: 6a3c9e1f7b52
+Create Date: 2026-10-18 21:14:37.206519
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c4e8a2f6b913'
+down_revision: Union[str, None] = '6a3c9e1f7b52'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('projects', sa.Column('project_collection_version', sa.Integer(), server_default='0', nullable=False))
+
+
+def downgrade() -> None:
+    op.drop_column('projects', 'project_collection_version')
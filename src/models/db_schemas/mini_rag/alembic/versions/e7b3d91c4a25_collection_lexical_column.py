@@ -0,0 +1,56 @@
+"""collection lexical column
+
+Revision ID: e7b3d91c4a25
+Revises: c4e8a2f6b913
+Create Date: 2026-10-19 10:42:18.530271
+
+Adds the lexical column of the hybrid search and its GIN index to the pgvector collections created before it.
+Adding a stored generated column rewrites the whole table under an exclusive lock , so it's done here while
+the API and the workers are stopped and not by the indexing jobs.
+The text search configuration is read from VECTOR_DB_PGVEC_TEXT_SEARCH_CONFIG like the API does.
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import os
+import re
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e7b3d91c4a25'
+down_revision: Union[str, None] = 'c4e8a2f6b913'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# The collections are the tables with a pgvector column , the ones without the lexical column yet
+COLLECTIONS_SQL = sa.text("""
+    SELECT c.table_name FROM information_schema.columns c
+    WHERE c.table_schema = current_schema() AND c.column_name = 'vector' AND c.udt_name = 'vector'
+    AND NOT EXISTS (
+        SELECT 1 FROM information_schema.columns t
+        WHERE t.table_schema = c.table_schema AND t.table_name = c.table_name AND t.column_name = 'text_tsv'
+    )
+""")
+
+
+def upgrade() -> None:
+
+    # The configuration is inlined in the column definition , so it's validated like the setting
+    text_search_config = os.environ.get("VECTOR_DB_PGVEC_TEXT_SEARCH_CONFIG") or "simple"
+    if not re.match(r"^[a-z_]+$" , text_search_config):
+        raise ValueError(f"Invalid text search configuration : {text_search_config}")
+
+    for (collection_name ,) in op.get_bind().execute(COLLECTIONS_SQL).fetchall():
+        op.execute(
+            f"ALTER TABLE {collection_name} ADD COLUMN IF NOT EXISTS text_tsv tsvector GENERATED ALWAYS AS "
+            f"(to_tsvector('{text_search_config}'::regconfig, coalesce(text, ''))) STORED"
+        )
+        op.execute(f"CREATE INDEX IF NOT EXISTS {collection_name}_text_tsv_idx ON {collection_name} USING gin (text_tsv)")
+
+
+def downgrade() -> None:
+    # The collections created since the hybrid search have the column from the start , it's kept on all of them
+    pass
@@ -1,4 +1,6 @@
 from .mini_rag_base import SQLAlchemyBase
 from .asset import Asset
 from .project import Project
-from .data_chunk import DataChunk, RetrievedDocument
\ No newline at end of file
+from .data_chunk import DataChunk, RetrievedDocument
+from .embedding_cache import EmbeddingCacheEntry
+from .job import Job
\ No newline at end of file
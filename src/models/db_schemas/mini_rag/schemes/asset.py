@@ -17,6 +17,9 @@ class Asset(SQLAlchemyBase):
     asset_size = Column(Integer , nullable = False)
     asset_config = Column (JSONB , nullable = True)
 
+    # The sha256 of the file content , a project never stores the same content twice
+    asset_hash = Column(String , nullable = True)
+
     created_at = Column(DateTime(timezone = True), server_default = func.now(),nullable = False)
     updated_at = Column(DateTime(timezone = True),onupdate = func.now(),nullable = True)
 
@@ -26,5 +29,6 @@ class Asset(SQLAlchemyBase):
 
     __table_args__ = (
         Index("ix_asset_project_id",asset_project_id),
-        Index("ix_asset_type",asset_type)
+        Index("ix_asset_type",asset_type),
+        Index("ix_asset_project_hash",asset_project_id,asset_hash,unique = True)
     )
\ No newline at end of file
@@ -3,21 +3,25 @@ from sqlalchemy import Column , Integer , DateTime , func , String ,ForeignKey
 from sqlalchemy.dialects.postgresql import UUID , JSONB
 from sqlalchemy.orm import relationship
 from pydantic import BaseModel
+from typing import Optional
 from sqlalchemy import Index
-import uuid
 
 
 class DataChunk(SQLAlchemyBase):
     __tablename__ = "chunks"
 
     chunk_id = Column(Integer , primary_key = True , autoincrement = True)
-    chunk_uuid = Column(UUID(as_uuid = True),default = uuid.uuid4,unique = True , nullable = False)
+    # The UUID is generated by the database so the bulk inserts don't generate one per row in python
+    chunk_uuid = Column(UUID(as_uuid = True),server_default = func.gen_random_uuid(),unique = True , nullable = False)
 
     chunk_type = Column(String , nullable = False , default = "Chunk")
     chunk_text = Column(String , nullable = False)
     chunk_metadata = Column(JSONB , nullable = False)
     chunk_order = Column(Integer, nullable = False)
 
+    # The hash of the chunk text and metadata , the re-processing keeps the chunks whose hash didn't change
+    chunk_hash = Column(String , nullable = True)
+
     chunk_project_id = Column(Integer , ForeignKey("projects.project_id") , nullable = False)
     chunk_asset_id = Column(Integer , ForeignKey("assets.asset_id"),nullable = True)
 
@@ -29,9 +33,12 @@ class DataChunk(SQLAlchemyBase):
 
     __table_args__ = (
         Index("ix_chunk_project_id" , chunk_project_id),
-        Index("ix_chunk_asset_id" , chunk_asset_id)
+        Index("ix_chunk_asset_id" , chunk_asset_id),
+        Index("ix_chunk_project_type_id" , chunk_project_id , chunk_type , chunk_id)
     )
 
 class RetrievedDocument(BaseModel):
     text : str
-    score : float
\ No newline at end of file
+    score : float
+    chunk_id : Optional[int] = None
+    metadata : Optional[dict] = None
\ No newline at end of file
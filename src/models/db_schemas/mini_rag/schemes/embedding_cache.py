@@ -0,0 +1,16 @@
+from .mini_rag_base import SQLAlchemyBase
+from sqlalchemy import Column , DateTime , func , String
+from sqlalchemy.dialects.postgresql import ARRAY , REAL
+
+
+class EmbeddingCacheEntry(SQLAlchemyBase):
+    __tablename__ = "embedding_cache"
+
+    cache_backend = Column(String , primary_key = True)
+    cache_model_id = Column(String , primary_key = True)
+    cache_document_type = Column(String , primary_key = True)
+    cache_text_hash = Column(String(64) , primary_key = True)
+
+    cache_embedding = Column(ARRAY(REAL) , nullable = False)
+
+    created_at = Column(DateTime(timezone = True), server_default = func.now(),nullable = False)
@@ -0,0 +1,35 @@
+from .mini_rag_base import SQLAlchemyBase
+from sqlalchemy import Column , Integer , DateTime , func , String , ForeignKey
+from sqlalchemy.dialects.postgresql import UUID , JSONB
+from sqlalchemy import Index
+import uuid
+
+
+class Job(SQLAlchemyBase):
+    __tablename__ = "jobs"
+
+    job_id = Column(Integer , primary_key = True , autoincrement = True)
+    job_uuid = Column(UUID(as_uuid = True),default = uuid.uuid4,unique = True , nullable = False)
+
+    job_type = Column(String , nullable = False)
+    job_status = Column(String , nullable = False)
+    job_params = Column(JSONB , nullable = True)
+    job_result = Column(JSONB , nullable = True)
+    job_error = Column(String , nullable = True)
+
+    job_total_items = Column(Integer , nullable = True)
+    job_processed_items = Column(Integer , nullable = False , default = 0)
+    job_attempts = Column(Integer , nullable = False , default = 0)
+    job_worker_id = Column(String , nullable = True)
+
+    created_at = Column(DateTime(timezone = True), server_default = func.now(),nullable = False)
+    updated_at = Column(DateTime(timezone = True),onupdate = func.now(),nullable = True)
+    started_at = Column(DateTime(timezone = True),nullable = True)
+    finished_at = Column(DateTime(timezone = True),nullable = True)
+
+    job_project_id = Column(Integer , ForeignKey("projects.project_id") , nullable = False)
+
+    __table_args__ = (
+        Index("ix_job_status_id",job_status,job_id),
+        Index("ix_job_project_id",job_project_id)
+    )
@@ -11,6 +11,10 @@ class Project(SQLAlchemyBase):
     
     project_id = Column(Integer , primary_key = True , autoincrement = True)
     project_uuid = Column(UUID(as_uuid = True) , default = uuid.uuid4,unique = True , nullable = False)
+
+    # Bumped by the jobs whenever they change the vector collection of the project , every process that caches
+    # the answers of the project compares it with the version its answers were cached at
+    project_collection_version = Column(Integer , default = 0 , server_default = "0" , nullable = False)
     
     created_at = Column(DateTime(timezone = True), server_default = func.now(),nullable = False)
     updated_at = Column(DateTime(timezone = True),onupdate = func.now(),nullable = True)
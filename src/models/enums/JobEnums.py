@@ -0,0 +1,14 @@
+from enum import Enum
+
+# The kinds of the background jobs
+class JobTypeEnums(Enum):
+    PROCESS_FILE_CHUNKS = "process_file_chunks"
+    PROCESS_FILE = "process_file"
+    INDEX_PUSH = "index_push"
+
+# The life cycle of a job , a pending job is waiting for a worker to claim it
+class JobStatusEnums(Enum):
+    PENDING = "pending"
+    RUNNING = "running"
+    SUCCEEDED = "succeeded"
+    FAILED = "failed"
@@ -16,5 +16,9 @@ class ResponseSignal(Enum):
     VECTOR_DB_COLLECTION_INFO_RETRIEVED = "Vector DB collection info retrieved"
     VECTORDB_SEARCH_ERROR = "Vector DB search error"
     VECTORDB_SEARCH_SUCCESS = "Vector DB search success"
+    VECTORDB_BATCH_SEARCH_TOO_LARGE = "Vector DB batch search has too many queries"
     RAG_ANSWER_ERROR = "Rag answer error"
-    RAG_ANSWER_SUCCESS = "Rag answer succeded"
\ No newline at end of file
+    RAG_ANSWER_SUCCESS = "Rag answer succeded"
+    JOB_QUEUED = "Job queued"
+    JOB_NOT_FOUND = "Job not found"
+    JOB_RETRIEVED = "Job retrieved"
\ No newline at end of file
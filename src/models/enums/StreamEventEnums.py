@@ -0,0 +1,8 @@
+from enum import Enum
+
+# The events of a streamed answer , in the order they're sent
+class StreamEventEnums(Enum):
+    METADATA = "metadata"
+    TOKEN = "token"
+    DONE = "done"
+    ERROR = "error"
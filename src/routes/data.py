@@ -1,18 +1,21 @@
 from fastapi import FastAPI , APIRouter,Depends ,UploadFile , status , Request , File
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse , RedirectResponse , StreamingResponse , Response
 from typing import List
+import asyncio
+import mimetypes
 import os
 from helpers.config import get_settings , Settings
-from controllers import DataController , ProjectController , ProcessController , NLPController
-import aiofiles
-from models import ResponseSignal
+from helpers.file_response import BlobFileResponse , RangeNotSatisfiable , parse_range_header , get_file_headers
+from controllers import DataController , ProjectController , JobController
+from models import ResponseSignal , JobTypeEnums
 import logging
 from .schemas.data import ProcessRequest
-from models.db_schemas import DataChunk , Asset
+from models.db_schemas import Asset
 from models.ProjectModel import ProjectModel
-from models.ChunkModel import ChunkModel
 from models.AssetModel import AssetModel
 from models.enums.AssetTypeEnum import AssetTypeEnum
+from .dependencies import get_project_model , get_asset_model , get_data_controller , get_job_controller
+from stores.blobstore import BlobStoreEnums
 
 
 logger=logging.getLogger('uvicorn.error')
@@ -24,30 +27,20 @@ data_router = APIRouter(
 )
 
 # Making an endpoint post request for this router to upload the pdf file  , The function gets injected with settings
+# The files are written concurrently to the blob store and hashed while they're written , a content is stored once for all projects
+# A file whose content is already in the project gets the existing asset so it's never parsed or embedded twice
 @data_router.post("/upload/{project_id}")
+# The project model and the asset model share the request session , the data controller is shared by all requests
 async def upload_data(request : Request,project_id: int, files : List[UploadFile] = File(...),
-                      app_settings : Settings = Depends(get_settings)):
-
-    # Creating project model to get project from db or create the project into the database
-    project_model=await ProjectModel.create_instance(db_client=request.app.db_client)
-    
-    # Creating an asset model to store the file information into the database
-    asset_model = await AssetModel.create_instance(db_client=request.app.db_client)
-
-    project = await project_model.get_project_or_create_project(project_id=project_id)
-    
-    # Creating data controller instance to help make necessary operations for the file uploaded
-    data_controller=DataController()
-
-    uploaded_files = []
-
+                      app_settings : Settings = Depends(get_settings) ,
+                      project_model : ProjectModel = Depends(get_project_model) ,
+                      asset_model : AssetModel = Depends(get_asset_model) ,
+                      data_controller : DataController = Depends(get_data_controller)):
 
+    # Checking every uploaded file is valid before writing any of them
+    # If a file is not valid : return a json response with a bad request telling this file is invalid
     for file in files:
-
-        # Checking if the uploaded file in a valid file
         is_valid , result_signal =data_controller.validate_uploaded_file(file=file)
-
-        # If the file is not valid : return a json response with a bad request telling this file is invalid
         if not is_valid:
             return JSONResponse(
                 status_code=status.HTTP_400_BAD_REQUEST,
@@ -55,37 +48,83 @@ async def upload_data(request : Request,project_id: int, files : List[UploadFile
                     "signal" : result_signal
                 }
             )
-        
-        # Giving the file a unique ID and a unique path by generating them
-        file_path , file_id =data_controller.generate_unique_filepath(original_file_name=file.filename,project_id=project_id)
-        
-        # Opening the file and saving it chunk by chunk , and if there's an error return a json response with a bad request
-        try:
-            async with aiofiles.open(file_path,"wb") as f:
-                while chunk := await file.read(app_settings.FILE_DEFAULT_CHUNK_SIZE):
-                    await f.write(chunk)
-        except Exception as e:
-            logger.error(f"error while uploading file : {e}")
-            return JSONResponse(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                content={
-                    "signal" : result_signal
-                }
-            )
-        
-        # Creating an Asset resource to be inserted into the database
-        asset_resource = Asset(
+
+    # Writing the files concurrently to the blob store , as many at once as the upload concurrency
+    upload_slots = asyncio.Semaphore(max(1 , app_settings.FILE_UPLOAD_CONCURRENCY))
+    blob_store = request.app.blob_store
+
+    async def write_file(file : UploadFile):
+        async with upload_slots:
+
+            # Giving the file a unique ID by generating it
+            file_id = data_controller.generate_unique_file_id(original_file_name=file.filename)
+
+            # Saving the file chunk by chunk while hashing it , the blob key is the hash of its content
+            try:
+                blob_info = await data_controller.write_uploaded_file(file = file , blob_store = blob_store)
+            except Exception as e:
+                logger.error(f"error while uploading file : {e}")
+                return None
+
+            return file_id , blob_info.key , blob_info.size
+
+    written_files = await asyncio.gather(*[ write_file(file) for file in files ])
+
+    # If a file couldn't be written , a bad request is returned
+    # The written blobs are kept , they may already be shared with other assets and the same upload will reuse them
+    if any(written_file is None for written_file in written_files):
+        return JSONResponse(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            content={
+                "signal" : ResponseSignal.FILE_UPLOAD_FAILED.value
+            }
+        )
+
+    # Getting the project from db or creating the project into the database
+    # It's read once the files are written , so the request takes its connection only for the database work
+    project = await project_model.get_project_or_create_project(project_id=project_id)
+
+    # Getting the assets of the project that already have the content of one of the files
+    stored_assets = { asset.asset_hash : asset for asset in await asset_model.get_assets_by_hashes(
+        asset_project_id = project.project_id,
+        asset_hashes = list({ file_hash for _ , file_hash , _ in written_files })
+    )}
+
+    # Creating an Asset resource for every new content of the project
+    new_assets = {}
+    for file_id , file_hash , file_size in written_files:
+
+        if file_hash in stored_assets or file_hash in new_assets:
+            continue
+
+        new_assets[file_hash] = Asset(
             asset_project_id=project.project_id,
             asset_type=AssetTypeEnum.FILE.value,
             asset_name=file_id,
-            asset_size=os.path.getsize(file_path)
+            asset_size=file_size,
+            asset_hash=file_hash
         )
 
-        # Using the asset_model created to insert the asset information into the database and return asset record as a flag
-        asset_record = await asset_model.create_asset(asset=asset_resource)
+    # Using the asset_model created to insert all the new assets in one batch
+    created_assets = { asset.asset_hash : asset for asset in await asset_model.create_assets(assets = list(new_assets.values())) }
+
+    # An asset that wasn't created was stored by a concurrent upload of the same content in the meantime
+    missing_hashes = [ file_hash for file_hash in new_assets if file_hash not in created_assets ]
+    if missing_hashes:
+        stored_assets.update({ asset.asset_hash : asset for asset in await asset_model.get_assets_by_hashes(
+            asset_project_id = project.project_id,
+            asset_hashes = missing_hashes
+        )})
+
+    # Answering every uploaded file with its asset , telling whether its content was already stored
+    uploaded_files = []
+    for file , ( _ , file_hash , _ ) in zip(files , written_files):
+        is_duplicate = file_hash not in created_assets
+        asset_record = stored_assets[file_hash] if is_duplicate else created_assets[file_hash]
         uploaded_files.append({
             "original_name": file.filename,
-            "file_id": str(asset_record.asset_id)
+            "file_id": str(asset_record.asset_id),
+            "is_duplicate": is_duplicate
         })
 
     # Return a json response to the API to tell the user the file is uploaded successfully
@@ -101,30 +140,22 @@ async def upload_data(request : Request,project_id: int, files : List[UploadFile
 @data_router.post("/process_file_chunks/{project_id}")
 
 # Making sure the function gets the request body of the process request
-async def process_file_chunks(request : Request,project_id : int, process_request : ProcessRequest):
+async def process_file_chunks(request : Request,project_id : int, process_request : ProcessRequest ,
+                              project_model : ProjectModel = Depends(get_project_model) ,
+                              asset_model : AssetModel = Depends(get_asset_model) ,
+                              job_controller : JobController = Depends(get_job_controller)):
 
     # storing the parameters into variables to use it later
     file_id=process_request.file_id
     chunk_size = process_request.chunk_size
     overlap_size = process_request.overlap_size
+    chunker = process_request.chunker
+    incremental = process_request.incremental
     do_reset=process_request.do_reset
 
-    # Creating instances for chunks , projects and assets to be stored in the database
-    chunk_model=await ChunkModel.create_instance(db_client=request.app.db_client)
-    project_model=await ProjectModel.create_instance(db_client=request.app.db_client)
-    asset_model = await AssetModel.create_instance(db_client=request.app.db_client)
-
     # Creating or getting a project with the given project ID to process the chunks
     project = await project_model.get_project_or_create_project(project_id=project_id)
 
-    # Making controller to access all functions needed to process the file and making it embeddings
-    process_controller = ProcessController(project_id = project_id)
-    nlp_controller = NLPController(vectordb_client=request.app.vectordb_client,
-                                   generation_client=request.app.generation_client,
-                                   embedding_client= request.app.embedding_client,
-                                   template_parser= request.app.template_parser)
-    
-
     # Getting all file ids in the project to process them all
     project_file_ids={}
 
@@ -162,91 +193,47 @@ async def process_file_chunks(request : Request,project_id : int, process_reques
             }
         )
 
-    # the do reset flag we gets from the API , If it's one , we will delete the collection associated with this project
-    # And also we will delete the chunks associated with this project before inserting any
-    if do_reset == 1:
-
-        collection_name = nlp_controller.create_collection_name(project_id=project.project_id)
-        
-        _ = await request.app.vectordb_client.delete_collection(collection_name=collection_name)
-        
-        _ = await chunk_model.delete_chunks_by_project_id(project_id=project.project_id)
-
-    no_records = 0
-    no_files = 0
-
-    # Now for every file in the project we will process it
-    for asset_id , file_id in project_file_ids.items():
-        # Getting the file content using the process controller
-        file_content = process_controller.get_file_content(file_id=file_id)
-
-        # If the file content is None we will return an error and continue for the other file
-        if file_content is None:
-            logger.error(f"Error while processing file : {file_id}")
-            continue
-        
-        # Now getting the file chunks by process the file content
-        file_chunks=process_controller.process_file_content_chunks(file_content=file_content , file_id=file_id,chunk_size=chunk_size,overlap_size=overlap_size)
-        
-        # Another validation if the file chunks is None or len ==0
-        # Return a json respone with a bad request that the processing failed
-        if file_chunks is None or len(file_chunks) == 0:
-            return JSONResponse(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                content={"signal" : ResponseSignal.PROCESSING_FAILED.value}
-            )
-        
-        # If we have chunks now we create it as the DataChunk scheme we agreed upon to be inserted into the data base
-        file_chunks_records = [
-            DataChunk(
-                chunk_text=chunk.page_content,
-                chunk_metadata=chunk.metadata,
-                chunk_order= i+1,
-                chunk_project_id=project.project_id,
-                chunk_asset_id = asset_id
-                
-            )
-            for i,chunk in enumerate (file_chunks)
-        ]
-
-        # Now insert the chunks and increase the number of records inserted to complete for another file
-        # Also increasing the number of files processed
-        no_records += await chunk_model.insert_many_chunks(file_chunks_records)
-        no_files +=1
-
-    # Now returning a json response that the fiels has been successfullu inserted
-    return JSONResponse({
-        "content":{"signal" : ResponseSignal.PROCESSING_SUCCESS.value},
-        "inserted_chunks":no_records,
-        "processed_file" : no_files
-    })
+    # Queuing the processing as a background job , the reset and the chunking run in the job worker
+    # The job ID is returned right away and the progress is polled from the jobs endpoint
+    job = await job_controller.enqueue_job(
+        job_type = JobTypeEnums.PROCESS_FILE_CHUNKS.value,
+        project_id = project.project_id,
+        params = {
+            "file_ids" : [[asset_id , file_id] for asset_id , file_id in project_file_ids.items()],
+            "do_reset" : do_reset,
+            "chunk_size" : chunk_size,
+            "overlap_size" : overlap_size,
+            "chunker" : chunker,
+            "incremental" : incremental
+        },
+        total_items = len(project_file_ids)
+    )
+
+    # Now returning a json response that the files processing has been queued
+    return JSONResponse(
+        status_code = status.HTTP_202_ACCEPTED,
+        content = {
+            "signal" : ResponseSignal.JOB_QUEUED.value,
+            "job_id" : job.job_id
+        }
+    )
 
 # Making an endpoint post process request for this router to process the pdf file
 @data_router.post("/process_file/{project_id}")
 
 # Making sure the function gets the request body of the process request
-async def process_file(request : Request,project_id : int, process_request : ProcessRequest):
+async def process_file(request : Request,project_id : int, process_request : ProcessRequest ,
+                       project_model : ProjectModel = Depends(get_project_model) ,
+                       asset_model : AssetModel = Depends(get_asset_model) ,
+                       job_controller : JobController = Depends(get_job_controller)):
 
     # storing the parameters into variables to use it later
     file_id=process_request.file_id
     do_reset=process_request.do_reset
 
-    # Creating instances for chunks , projects and assets to be stored in the database
-    chunk_model=await ChunkModel.create_instance(db_client=request.app.db_client)
-    project_model=await ProjectModel.create_instance(db_client=request.app.db_client)
-    asset_model = await AssetModel.create_instance(db_client=request.app.db_client)
-
     # Creating or getting a project with the given project ID to process the chunks
     project = await project_model.get_project_or_create_project(project_id=project_id)
 
-    # Making controller to access all functions needed to process the file and making it embeddings
-    process_controller = ProcessController(project_id = project_id)
-    nlp_controller = NLPController(vectordb_client=request.app.vectordb_client,
-                                   generation_client=request.app.generation_client,
-                                   embedding_client= request.app.embedding_client,
-                                   template_parser= request.app.template_parser)
-    
-
     # Getting all file ids in the project to process them all
     project_file_ids={}
 
@@ -284,59 +271,99 @@ async def process_file(request : Request,project_id : int, process_request : Pro
             }
         )
 
-    # the do reset flag we gets from the API , If it's one , we will delete the collection associated with this project
-    # And also we will delete the chunks associated with this project before inserting any
-    if do_reset == 1:
+    # Queuing the processing as a background job , the reset and the chunking run in the job worker
+    # The job ID is returned right away and the progress is polled from the jobs endpoint
+    job = await job_controller.enqueue_job(
+        job_type = JobTypeEnums.PROCESS_FILE.value,
+        project_id = project.project_id,
+        params = {
+            "file_ids" : [[asset_id , file_id] for asset_id , file_id in project_file_ids.items()],
+            "do_reset" : do_reset,
+        },
+        total_items = len(project_file_ids)
+    )
+
+    # Now returning a json response that the files processing has been queued
+    return JSONResponse(
+        status_code = status.HTTP_202_ACCEPTED,
+        content = {
+            "signal" : ResponseSignal.JOB_QUEUED.value,
+            "job_id" : job.job_id
+        }
+    )
 
-        collection_name = nlp_controller.create_collection_name(project_id=project.project_id)
-        
-        _ = await request.app.vectordb_client.delete_collection(collection_name=collection_name)
-        
-        _ = await chunk_model.delete_chunks_by_project_id(project_id=project.project_id)
 
-    no_records = 0
-    no_files = 0
+# Making an endpoint get request for this router to download a file of the project
+# A single byte range can be requested with the Range header , it's answered with a partial content
+# The local files are sent by the server with sendfile when it supports it , the S3 files are downloaded
+# from the bucket directly with a presigned URL or streamed through the API when presigning is disabled
+@data_router.get("/download/{project_id}/{file_id}")
+async def download_file(request : Request , project_id : int , file_id : str ,
+                        app_settings : Settings = Depends(get_settings) ,
+                        project_model : ProjectModel = Depends(get_project_model) ,
+                        asset_model : AssetModel = Depends(get_asset_model)):
 
-    # Now for every file in the project we will process it
-    for asset_id , file_id in project_file_ids.items():
-        # Getting the file content using the process controller
-        file_content = process_controller.get_file_content(file_id=file_id)
+    project = await project_model.get_project_or_create_project(project_id=project_id)
+    asset_record = await asset_model.get_asset_record(asset_project_id = project.project_id , asset_name = file_id)
 
-        # If the file content is None we will return an error and continue for the other file
-        if file_content is None:
-            logger.error(f"Error while processing file : {file_id}")
-            continue
-        
-        # Now getting the file chunks by process the file content
-        file_chunk=process_controller.process_file_content_all(file_content=file_content , file_id=file_id)
-        
-        # Another validation if the file chunks is None or len ==0
-        # Return a json respone with a bad request that the processing failed
-        if file_chunk is None:
+    # If there's not any asset record with this file ID , return not found
+    if asset_record is None:
+        return JSONResponse(
+            status_code = status.HTTP_404_NOT_FOUND,
+            content = {
+                "signal" : ResponseSignal.FILE_ID_ERROR.value
+            }
+        )
+
+    blob_store = request.app.blob_store
+    blob_key = asset_record.asset_hash
+    media_type = mimetypes.guess_type(asset_record.asset_name)[0]
+
+    # Getting the file from the blob store , the files uploaded before it are still in the project directory
+    file_path , file_size = None , None
+    if blob_key and await blob_store.exists(key = blob_key):
+
+        # Redirecting to the bucket , the API never proxies the file
+        if app_settings.BLOB_STORE_S3_PRESIGNED_DOWNLOADS:
+            download_url = await blob_store.get_download_url(key = blob_key , file_name = asset_record.asset_name)
+            if download_url:
+                return RedirectResponse(url = download_url , status_code = status.HTTP_307_TEMPORARY_REDIRECT)
+
+        file_size = await blob_store.get_size(key = blob_key)
+        if app_settings.BLOB_STORE_BACKEND == BlobStoreEnums.LOCAL.value:
+            file_path = await blob_store.get_local_path(key = blob_key)
+
+    else:
+        blob_key = None
+        file_path = os.path.join(ProjectController().get_project_path(project_id = project_id) , asset_record.asset_name)
+        if not os.path.exists(file_path):
             return JSONResponse(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                content={"signal" : ResponseSignal.PROCESSING_FAILED.value}
+                status_code = status.HTTP_404_NOT_FOUND,
+                content = {
+                    "signal" : ResponseSignal.FILE_ID_ERROR.value
+                }
             )
-        
-        # If we have chunks now we create it as the DataChunk scheme we agreed upon to be inserted into the data base
-        file_chunk =DataChunk(
-                chunk_text=file_chunk.page_content,
-                chunk_metadata=file_chunk.metadata,
-                chunk_type = 'Document',
-                chunk_order= 0,
-                chunk_project_id=project.project_id,
-                chunk_asset_id = asset_id)
-
-        # Now insert the chunks and increase the number of records inserted to complete for another file
-        # Also increasing the number of files processed
-        
-        await chunk_model.insert_chunk(chunk=file_chunk)
-        no_records+=1
-        no_files +=1
-
-    # Now returning a json response that the fiels has been successfullu inserted
-    return JSONResponse({
-        "content":{"signal" : ResponseSignal.PROCESSING_SUCCESS.value},
-        "inserted_chunks":no_records,
-        "processed_file" : no_files
-    })
+        file_size = os.path.getsize(file_path)
+
+    # Getting the requested range , a range outside the file is answered with 416
+    try:
+        byte_range = parse_range_header(range_header = request.headers.get("range") , file_size = file_size)
+    except RangeNotSatisfiable:
+        return Response(
+            status_code = status.HTTP_416_REQUESTED_RANGE_NOT_SATISFIABLE,
+            headers = {"content-range" : f"bytes */{file_size}"}
+        )
+
+    if file_path is not None:
+        return BlobFileResponse(path = file_path , file_size = file_size , byte_range = byte_range ,
+                                file_name = asset_record.asset_name , media_type = media_type ,
+                                block_size = app_settings.BLOB_STORE_BLOCK_SIZE)
+
+    # Streaming the range from the blob store
+    offset , length = byte_range if byte_range is not None else (0 , file_size)
+    return StreamingResponse(
+        blob_store.iterate(key = blob_key , offset = offset , length = length),
+        status_code = status.HTTP_200_OK if byte_range is None else status.HTTP_206_PARTIAL_CONTENT,
+        media_type = media_type or "application/octet-stream",
+        headers = get_file_headers(file_size = file_size , byte_range = byte_range , file_name = asset_record.asset_name)
+    )
@@ -0,0 +1,56 @@
+# The dependencies of the routes , FastAPI resolves every one of them once per request
+# so all the models of a request share the same session and the same connection
+from fastapi import Depends , Request
+from sqlalchemy.ext.asyncio import AsyncSession
+from models.ProjectModel import ProjectModel
+from models.AssetModel import AssetModel
+from models.ChunkModel import ChunkModel
+from models.JobModel import JobModel
+from controllers import DataController , NLPController , JobController
+
+
+# The unit of work of a request , one session and one transaction for everything the request reads and writes
+# It's committed once the route returns and rolled back if the route raises
+# The session only checks out a connection on its first statement , a request that doesn't query never takes one
+# A route can commit early to give the connection back before a long call , like the generation ,
+# a query after it starts a new transaction that's committed at the end the same way
+async def get_db_session(request : Request):
+    async with request.app.db_client() as session:
+        try:
+            yield session
+        except Exception:
+            await session.rollback()
+            raise
+        else:
+            await session.commit()
+
+
+# The models of the request , created on the request session
+async def get_project_model(request : Request , db_session : AsyncSession = Depends(get_db_session)) -> ProjectModel:
+    return await ProjectModel.create_instance(db_client = request.app.db_client , db_session = db_session)
+
+
+async def get_asset_model(request : Request , db_session : AsyncSession = Depends(get_db_session)) -> AssetModel:
+    return await AssetModel.create_instance(db_client = request.app.db_client , db_session = db_session)
+
+
+async def get_chunk_model(request : Request , db_session : AsyncSession = Depends(get_db_session)) -> ChunkModel:
+    return await ChunkModel.create_instance(db_client = request.app.db_client , db_session = db_session)
+
+
+async def get_job_model(request : Request , db_session : AsyncSession = Depends(get_db_session)) -> JobModel:
+    return await JobModel.create_instance(db_client = request.app.db_client , db_session = db_session)
+
+
+# The controllers that only hold the shared clients are created once at startup and shared by all the requests
+def get_data_controller(request : Request) -> DataController:
+    return request.app.data_controller
+
+
+def get_nlp_controller(request : Request) -> NLPController:
+    return request.app.nlp_controller
+
+
+# The job controller queues the jobs with the job model of the request , so it's created for every request
+def get_job_controller(request : Request , job_model : JobModel = Depends(get_job_model)) -> JobController:
+    return JobController(resources = request.app , job_model = job_model)
@@ -0,0 +1,41 @@
+from fastapi import APIRouter , status , Request , Depends
+from fastapi.responses import JSONResponse
+import logging
+from models import ResponseSignal
+from .dependencies import get_job_controller
+from controllers import JobController
+
+
+logger = logging.getLogger('uvicorn.error')
+
+# Setting the router for all api/v1/jobs endpoints
+jobs_router = APIRouter(
+    prefix = '/api/v1/jobs',
+    tags = ["api_v1","jobs"]
+)
+
+# Making an endpoint get request for this router to get the progress of a job
+@jobs_router.get("/{job_id}")
+
+# This is the function to get the status , the progress , the throughput and the estimated remaining time of a job
+async def get_job(request : Request , job_id : int ,
+                  job_controller : JobController = Depends(get_job_controller)):
+
+    # Getting the job with the job model of the request
+    job = await job_controller.job_model.get_job(job_id = job_id)
+
+    # If there's no job with this ID , return a json response with not found
+    if job is None:
+        return JSONResponse(
+            status_code = status.HTTP_404_NOT_FOUND,
+            content = {
+                "signal" : ResponseSignal.JOB_NOT_FOUND.value
+            }
+        )
+
+    return JSONResponse(
+        content = {
+            "signal" : ResponseSignal.JOB_RETRIEVED.value,
+            "job" : job_controller.get_job_progress(job = job)
+        }
+    )
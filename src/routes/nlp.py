@@ -1,13 +1,16 @@
-from fastapi import FastAPI , APIRouter, status , Request
-from fastapi.responses import JSONResponse
+from fastapi import FastAPI , APIRouter, status , Request , Depends
+from fastapi.responses import JSONResponse , StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
 import logging
-from routes.schemas.nlp import PushRequest , SearchRequest
+import json
+from routes.schemas.nlp import PushRequest , SearchRequest , BatchSearchRequest
+from helpers.config import get_settings , Settings
 from models.ProjectModel import ProjectModel
 from models.ChunkModel import ChunkModel
 from models.AssetModel import AssetModel
-from controllers import NLPController
-from models import ResponseSignal
-from tqdm.auto import tqdm
+from controllers import NLPController , JobController
+from models import ResponseSignal , StreamEventEnums , JobTypeEnums
+from .dependencies import get_db_session , get_project_model , get_asset_model , get_chunk_model , get_nlp_controller , get_job_controller
 
 
 logger = logging.getLogger('uvicorn.error')
@@ -21,12 +24,11 @@ nlp_router = APIRouter(
 @nlp_router.post("/index/push/{project_id}")
 
 # This is the function for indexing every chunk in the project in the vector database
-async def index_project(request : Request,project_id : int , push_request : PushRequest):
+async def index_project(request : Request,project_id : int , push_request : PushRequest ,
+                        project_model : ProjectModel = Depends(get_project_model) ,
+                        chunk_model : ChunkModel = Depends(get_chunk_model) ,
+                        job_controller : JobController = Depends(get_job_controller)):
 
-    # Creating a project model and a chunk model to help integrate with the database 
-    project_model = await ProjectModel.create_instance(db_client = request.app.db_client)
-    chunk_model = await ChunkModel.create_instance(db_client = request.app.db_client)
-    
     # Getting the project itself or create it if it's not existed but here we get it
     project = await project_model.get_project_or_create_project(
         project_id = project_id
@@ -41,80 +43,31 @@ async def index_project(request : Request,project_id : int , push_request : Push
             }
         )
 
-    # Initiating the NLP Controller to do necessary functions with it
-    nlp_controller = NLPController(
-        vectordb_client= request.app.vectordb_client,
-        generation_client = request.app.generation_client,
-        embedding_client = request.app.embedding_client,
-        template_parser = request.app.template_parser
-        )
-    
-    # Initiating Variabled for counting pages , and inserted items counts
-    has_records = True
-    page_no = 1
-    inserted_items_count = 0
-    idx=0
-
-    # Creating a collection name with the the project ID
-    collection_name = nlp_controller.create_collection_name(project_id=project.project_id)
-
-    # Inserting the collection in the vector database
-    _ = await request.app.vectordb_client.create_collection(
-        collection_name=collection_name,
-        embedding_size = request.app.embedding_client.embedding_size,
-        do_reset = push_request.do_reset
-    )
-
-
-    # Now this is the progress bar created to go along with the number of chunks inserted over processing time
+    # Counting the chunks to push so the job progress has its total from the start
     total_chunks_count = await chunk_model.get_total_chunks_count(project_id = project.project_id)
-    print("total chunks is -------------------",total_chunks_count)
-    pbar = tqdm(total=total_chunks_count, desc= "Vector Indexing",position=0)
-
-    # The loop to insert the chunks into the database
-    while has_records:
-        # First is making sure how many chunks pages in the database
-        page_chunks = await chunk_model.get_project_chunks(project_id = project.project_id,page_no=page_no)
-        
-        # If already there's chunks we will increase page_chunks by 1
-        if len(page_chunks):
-            page_no+=1
-        
-        # If there's not a single page in the database , we will trun the has_records flag off and break the while
-        # As there aren't records in the project to be inserted in the vector database
-        if not page_chunks or len(page_chunks)==0:
-            has_records=False
-            break
-        
-        # Now there are chunks in the project then we get their indices and increment the idx of the pages
-        chunk_ids = [c.chunk_id for c in page_chunks]
-        idx += len(page_chunks)
-
-        # Inserting all chunks in the vector database and return a flag of the inserting status
-        is_inserted = await nlp_controller.index_into_vector_db(
-            project=project,
-            chunks=page_chunks,
-            chunks_ids = chunk_ids
-        )
 
-        # If there's an error with the inserting approach return a json response with bad request to indicate
-        # ther's a failure inserting chunks
-        if not is_inserted :
-            return JSONResponse(
-            status_code = status.HTTP_400_BAD_REQUEST,
-            content = {
-                "signal" : ResponseSignal.INSERT_INTO_VECTOR_DB_ERROR.value
+    # Queuing the indexing as a background job , the collection creation , the indexing pipeline
+    # and the index build scheduling run in the job worker
+    job = await job_controller.enqueue_job(
+        job_type = JobTypeEnums.INDEX_PUSH.value,
+        project_id = project.project_id,
+        params = {
+            "do_reset" : push_request.do_reset,
+            "index_params" : {
+                "m" : push_request.index_m,
+                "ef_construction" : push_request.index_ef_construction,
+                "maintenance_work_mem" : push_request.index_maintenance_work_mem,
             }
-        )
-        # Update the progress bar as it's shown to us and increment the inserted items counts
-        pbar.update(len(page_chunks))
-        inserted_items_count += len(page_chunks)
+        },
+        total_items = total_chunks_count
+    )
 
-    # Finally return a json response that's the process has ended and the number of chunks inserted
+    # Finally return a json response with the job ID to poll the progress with
     return JSONResponse(
+        status_code = status.HTTP_202_ACCEPTED,
         content = {
-            "signal": ResponseSignal.INSERT_INTO_VECTOR_DB_SUCCESS.value,
-            "inserted_items_count" : inserted_items_count
+            "signal": ResponseSignal.JOB_QUEUED.value,
+            "job_id" : job.job_id
         }
     )
 
@@ -122,26 +75,19 @@ async def index_project(request : Request,project_id : int , push_request : Push
 @nlp_router.get("/index/info/{project_id}")
 
 # This is the function gets the project index info by givin it the project ID
-async def get_project_index_info(request : Request,project_id : int):
+async def get_project_index_info(request : Request,project_id : int ,
+                                 project_model : ProjectModel = Depends(get_project_model) ,
+                                 nlp_controller : NLPController = Depends(get_nlp_controller) ,
+                                 db_session : AsyncSession = Depends(get_db_session)):
     
-    # Creating the project model to integrate with the database
-    project_model = await ProjectModel.create_instance(
-        db_client = request.app.db_client
-    )
-
     # Getting the project to search for it's info in the database
     project = await project_model.get_project_or_create_project(
         project_id = project_id
     )
 
-    # Making an NLP Controller to integrate with the vector database
-    nlp_controller = NLPController(
-        vectordb_client= request.app.vectordb_client,
-        generation_client = request.app.generation_client,
-        embedding_client = request.app.embedding_client,
-        template_parser = request.app.template_parser
-        )
-    
+    # Ending the unit of work once the project is read , so its connection isn't held during the slow calls
+    await db_session.commit()
+
     # Getting the collection info by searching the vector database to return it to the user
     collection_info = await nlp_controller.get_vector_collection_info(project=project)
 
@@ -159,28 +105,24 @@ async def get_project_index_info(request : Request,project_id : int):
 @nlp_router.post("/index/search/{project_id}")
 
 #This is the function to search by similarity
-async def search_index(request : Request , project_id : int , search_request : SearchRequest):
+async def search_index(request : Request , project_id : int , search_request : SearchRequest ,
+                       project_model : ProjectModel = Depends(get_project_model) ,
+                       nlp_controller : NLPController = Depends(get_nlp_controller) ,
+                       db_session : AsyncSession = Depends(get_db_session)):
     
-    # Creating the project model to integrate with the database
-    project_model = await ProjectModel.create_instance(
-        db_client = request.app.db_client
-    )
-
     # Getting the project to search in its vectors
     project = await project_model.get_project_or_create_project(
         project_id = project_id
     )
 
-    # Making an NLP Controller to integrate with the vector database
-    nlp_controller = NLPController(
-        vectordb_client= request.app.vectordb_client,
-        generation_client = request.app.generation_client,
-        embedding_client = request.app.embedding_client,
-        template_parser = request.app.template_parser
-        )
-    
+    # Ending the unit of work once the project is read , so its connection isn't held during the slow calls
+    await db_session.commit()
+
     # Search the vector database for relative results with cosine similarity to get relative texts
-    results = await nlp_controller.search_vector_db_collection(project=project,text = search_request.text , limit = search_request.limit)
+    results = await nlp_controller.search_vector_db_collection(project=project,text = search_request.text , limit = search_request.limit ,
+                                                               accuracy = search_request.accuracy ,
+                                                               mode = search_request.mode ,
+                                                               filters = search_request.filter.dict(exclude_none = True) if search_request.filter else None)
 
     # If there's not any search result , this will return a JSON Response with bad request
     if not results:
@@ -202,34 +144,85 @@ async def search_index(request : Request , project_id : int , search_request : S
         }
     )
 
+# Making an endpoint post request for this router to search vectors by similarity with many queries at once
+@nlp_router.post("/index/search/batch/{project_id}")
+
+# This is the function to search by similarity with a batch of queries , the results come back per query
+async def search_index_batch(request : Request , project_id : int , search_request : BatchSearchRequest ,
+                             project_model : ProjectModel = Depends(get_project_model) ,
+                             nlp_controller : NLPController = Depends(get_nlp_controller) ,
+                             app_settings : Settings = Depends(get_settings) ,
+                             db_session : AsyncSession = Depends(get_db_session)):
+
+    # The queries are embedded in a single call , so the batch is kept within what the embedding providers accept
+    max_queries = app_settings.VECTOR_DB_BATCH_SEARCH_MAX_QUERIES
+    if len(search_request.texts) > max_queries:
+        return JSONResponse(
+            status_code = status.HTTP_400_BAD_REQUEST,
+            content = {
+                "signal" : ResponseSignal.VECTORDB_BATCH_SEARCH_TOO_LARGE.value,
+                "max_queries" : max_queries
+            }
+        )
+
+    # Getting the project to search in its vectors
+    project = await project_model.get_project_or_create_project(
+        project_id = project_id
+    )
+
+    # Ending the unit of work once the project is read , so its connection isn't held during the slow calls
+    await db_session.commit()
+
+    results = await nlp_controller.search_vector_db_collection_batch(project = project , texts = search_request.texts ,
+                                                                     limit = search_request.limit ,
+                                                                     accuracy = search_request.accuracy ,
+                                                                     filters = search_request.filter.dict(exclude_none = True) if search_request.filter else None)
+
+    # If the batch couldn't be searched , this will return a JSON Response with bad request
+    if results is False:
+        return JSONResponse(
+            status_code = status.HTTP_400_BAD_REQUEST,
+            content = {
+                "signal" : ResponseSignal.VECTORDB_SEARCH_ERROR.value
+            }
+        )
+
+    # Returning the results of every query with the query itself , in the order of the queries
+    return JSONResponse(
+        content = {
+            "signal" : ResponseSignal.VECTORDB_SEARCH_SUCCESS.value,
+            "results" : [
+                {"text" : text , "results" : [result.dict() for result in query_results]}
+                for text , query_results in zip(search_request.texts , results)
+            ]
+        }
+    )
+
 # Making an endpoint post request for this router to answer the queries
 @nlp_router.get("/index/answer/{project_id}")
 
 #This is the function to answer the query
-async def answer_index(request : Request , project_id : int , search_request : SearchRequest):
+async def answer_index(request : Request , project_id : int , search_request : SearchRequest ,
+                       project_model : ProjectModel = Depends(get_project_model) ,
+                       nlp_controller : NLPController = Depends(get_nlp_controller) ,
+                       db_session : AsyncSession = Depends(get_db_session)):
 
-    # Creating the project model to integrate with the database
-    project_model = await ProjectModel.create_instance(
-        db_client = request.app.db_client
-    )
     # Getting the project to search in its vectors
     project = await project_model.get_project_or_create_project(
         project_id = project_id
     )
 
-    # Making an NLP Controller to integrate with the vector database
-    nlp_controller = NLPController(
-        vectordb_client= request.app.vectordb_client,
-        generation_client = request.app.generation_client,
-        embedding_client = request.app.embedding_client,
-        template_parser = request.app.template_parser
-        )
-    
+    # Ending the unit of work once the project is read , so its connection isn't held during the slow calls
+    await db_session.commit()
+
     # Now using the answer_rag_question function we send the query and the project and the limit
     # to get the search results and give them to the LLM then the LLM answers it and give us the response back
-    answer , full_prompt , chat_history = await nlp_controller.answer_rag_question(project= project ,
+    answer , full_prompt , chat_history , prompt_tokens = await nlp_controller.answer_rag_question(project= project ,
                                                                              query= search_request.text ,
-                                                                             limit = search_request.limit)
+                                                                             limit = search_request.limit ,
+                                                                             accuracy = search_request.accuracy ,
+                                                                             mode = search_request.mode ,
+                                                                             filters = search_request.filter.dict(exclude_none = True) if search_request.filter else None)
     
     
     # If there's no answer from the database we send a Json response with bad request
@@ -248,34 +241,84 @@ async def answer_index(request : Request , project_id : int , search_request : S
                 "Signal" : ResponseSignal.RAG_ANSWER_SUCCESS.value,
                 "Answer" : answer,
                 "Chat History" : chat_history,
-                "Full Prompt" : full_prompt
+                "Full Prompt" : full_prompt,
+                "Prompt Tokens" : prompt_tokens
             }
         )
 
+# Formatting an event as a server sent event , the data is always sent as json
+def format_sse_event(event : str , data):
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+# Making an endpoint post request for this router to stream the answer of the queries as server sent events
+# It's a post request because the streaming clients can't send a body with a get request
+@nlp_router.post("/index/answer/stream/{project_id}")
+
+# This is the function to stream the answer of the query
+async def answer_index_stream(request : Request , project_id : int , search_request : SearchRequest ,
+                              project_model : ProjectModel = Depends(get_project_model) ,
+                              nlp_controller : NLPController = Depends(get_nlp_controller) ,
+                              db_session : AsyncSession = Depends(get_db_session)):
+
+    # Getting the project to search in its vectors
+    project = await project_model.get_project_or_create_project(
+        project_id = project_id
+    )
+
+    # Ending the unit of work once the project is read , so its connection isn't held during the slow calls
+    await db_session.commit()
+
+    events = nlp_controller.answer_rag_question_stream(project = project ,
+                                                       query = search_request.text ,
+                                                       limit = search_request.limit ,
+                                                       accuracy = search_request.accuracy ,
+                                                       mode = search_request.mode ,
+                                                       filters = search_request.filter.dict(exclude_none = True) if search_request.filter else None)
+
+    # Waiting for the first event before starting the stream , so a failed retrieval is still a bad request
+    first_event , first_data = await events.__anext__()
+    if first_event == StreamEventEnums.ERROR.value:
+        await events.aclose()
+        return JSONResponse(
+            status_code = status.HTTP_400_BAD_REQUEST,
+            content = first_data
+        )
+
+    # Sending the leading metadata event then the rest of the events as they come
+    async def event_stream():
+        yield format_sse_event(first_event , first_data)
+        async for event , data in events:
+            yield format_sse_event(event , data)
+
+    # Disabling the caching and the proxy buffering so every token reaches the client as soon as it's sent
+    return StreamingResponse(
+        event_stream(),
+        media_type = "text/event-stream",
+        headers = {
+            "Cache-Control" : "no-cache",
+            "X-Accel-Buffering" : "no"
+        }
+    )
+
 @nlp_router.get("/get_all_crs/{project_id}")
-async def get_all_crs(request : Request, project_id : int):
+async def get_all_crs(request : Request, project_id : int ,
+                      asset_model : AssetModel = Depends(get_asset_model)):
     
-    asset_model = await AssetModel.create_instance(db_client=request.app.db_client)
-
     assets = await asset_model.get_all_project_assets(asset_project_id=project_id)
 
     return assets
 
 @nlp_router.get("/generate_stories/{asset_id}")
-async def generate_stories(request : Request , asset_id : int):
-
-    # Making an NLP Controller to integrate with the vector database
-    nlp_controller = NLPController(
-        vectordb_client= request.app.vectordb_client,
-        generation_client = request.app.generation_client,
-        embedding_client = request.app.embedding_client,
-        template_parser = request.app.template_parser
-        )
-
-    chunk_model = await ChunkModel.create_instance(db_client=request.app.db_client)
+async def generate_stories(request : Request , asset_id : int ,
+                           chunk_model : ChunkModel = Depends(get_chunk_model) ,
+                           nlp_controller : NLPController = Depends(get_nlp_controller) ,
+                           db_session : AsyncSession = Depends(get_db_session)):
 
     chunk_data = await chunk_model.get_chunk_document_by_asset(asset_id=asset_id)
 
+    # Ending the unit of work before the generation , so its connection isn't held while the LLM answers
+    await db_session.commit()
+
     text = chunk_data.chunk_text
 
     answer = await nlp_controller.answer_any_question(document=text)
@@ -1,10 +1,14 @@
-from pydantic import BaseModel
+from pydantic import BaseModel , Field
 from typing import Optional
 
 # Pydantic Scheme of the request in the API with process endpoint
+# The chunker is one of simple , recursive , sentence or token , the default one of the settings is used without it
+# The chunk size and the overlap size are counted in characters , or in tokens for the token chunker
+# The incremental flag only re-processes what changed since the last processing , it's ignored with do_reset
 class ProcessRequest(BaseModel):
     file_id : str = None
     chunk_size : Optional[int] = 100
     overlap_size : Optional[int] = 20
     do_reset : Optional[bool] = False
-    
+    incremental : Optional[bool] = False
+    chunker : Optional[str] = Field(default = None , pattern = "^(simple|recursive|sentence|token)$")
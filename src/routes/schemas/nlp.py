@@ -1,11 +1,47 @@
-from pydantic import BaseModel
-from typing import Optional
+from pydantic import BaseModel , Field , StringConstraints
+from typing import Annotated , Dict , List , Optional , Union
+from helpers.config import get_settings
+
+# The biggest number of documents a search returns , the hybrid search fetches a multiple of it from every arm
+# and the batch search runs it for every query , the HNSW search can't find more than its ef_search of 1000
+SEARCH_MAX_LIMIT = get_settings().VECTOR_DB_SEARCH_MAX_LIMIT
+
+# The metadata keys that can be filtered on , they're used as JSON paths in the vector databases
+MetadataKey = Annotated[str , StringConstraints(pattern = r"^[A-Za-z0-9_]{1,64}$")]
 
 # Pydantic Scheme of the request in the API with push chunks endpoint
 class PushRequest(BaseModel):
     do_reset : Optional[int] = 0
+    index_m : Optional[int] = Field(default = None , ge = 2 , le = 100)
+    index_ef_construction : Optional[int] = Field(default = None , ge = 4 , le = 1000)
+    index_maintenance_work_mem : Optional[str] = Field(default = None , pattern = r"^\d+\s*(kB|MB|GB)?$")
+
+# Pydantic Scheme of a range of a numeric metadata value , like the pages of a document
+class RangeFilter(BaseModel):
+    gt : Optional[float] = None
+    gte : Optional[float] = None
+    lt : Optional[float] = None
+    lte : Optional[float] = None
+
+# Pydantic Scheme of the filter of a search , all its conditions have to match
+# The assets and the chunks match any of their IDs , the metadata values match exactly and the ranges bound numeric values
+class SearchFilter(BaseModel):
+    asset_ids : Optional[List[int]] = Field(default = None , min_length = 1)
+    chunk_ids : Optional[List[int]] = Field(default = None , min_length = 1)
+    metadata : Optional[Dict[MetadataKey , Union[bool , int , float , str]]] = None
+    ranges : Optional[Dict[MetadataKey , RangeFilter]] = None
 
 # Pydantic Scheme of the request in the API with search chunks endpoint
 class SearchRequest(BaseModel):
     text : str
-    limit : Optional[int] = 10
\ No newline at end of file
+    limit : int = Field(default = 10 , ge = 1 , le = SEARCH_MAX_LIMIT)
+    accuracy : Optional[str] = Field(default = None , pattern = r"^(fast|balanced|exact)$")
+    mode : Optional[str] = Field(default = None , pattern = r"^(vector|lexical|hybrid)$")
+    filter : Optional[SearchFilter] = None
+
+# Pydantic Scheme of the request in the API with batch search chunks endpoint
+class BatchSearchRequest(BaseModel):
+    texts : List[str] = Field(min_length = 1)
+    limit : int = Field(default = 10 , ge = 1 , le = SEARCH_MAX_LIMIT)
+    accuracy : Optional[str] = Field(default = None , pattern = r"^(fast|balanced|exact)$")
+    filter : Optional[SearchFilter] = None
\ No newline at end of file
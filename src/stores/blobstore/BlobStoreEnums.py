@@ -0,0 +1,6 @@
+# Setting all needed enums for the blob stores
+from enum import Enum
+
+class BlobStoreEnums(Enum):
+    LOCAL = "LOCAL"
+    S3 = "S3"
@@ -0,0 +1,61 @@
+# Creating Interface to implement blob stores according to these function
+# to ensure all blob stores have the same behavior
+# The blobs are content addressed , the key of a blob is the sha256 of its content so the same content is stored once
+
+# Importing abstraction methods and the abc class for interfacing
+from abc import ABC , abstractmethod
+from dataclasses import dataclass
+
+
+# The result of writing a blob , is_new is False when the same content was already stored
+@dataclass
+class BlobInfo:
+    key : str
+    size : int
+    is_new : bool = True
+
+
+class BlobStoreInterface(ABC):
+
+    # Setting all functions as abstraction_method
+
+    # A function to write a blob from an async iterator of bytes , it's hashed while it's written
+    @abstractmethod
+    async def write(self , chunks) -> BlobInfo:
+        pass
+
+    # A function to check if a blob exists
+    @abstractmethod
+    async def exists(self , key : str) -> bool:
+        pass
+
+    # A function to get the size of a blob , None if it doesn't exist
+    @abstractmethod
+    async def get_size(self , key : str):
+        pass
+
+    # A function to iterate over a range of a blob block by block , the whole blob by default
+    @abstractmethod
+    def iterate(self , key : str , offset : int = 0 , length : int = None):
+        pass
+
+    # A function to read a range of a blob at once
+    @abstractmethod
+    async def read_range(self , key : str , offset : int , length : int) -> bytes:
+        pass
+
+    # A function to get a local path of a blob , the parsers and the zero copy downloads read it
+    # A remote store downloads the blob to its local cache first
+    @abstractmethod
+    async def get_local_path(self , key : str):
+        pass
+
+    # A function to get a URL the clients can download the blob from directly , None if the store can't give one
+    @abstractmethod
+    async def get_download_url(self , key : str , file_name : str = None):
+        pass
+
+    # A function to delete a blob
+    @abstractmethod
+    async def delete(self , key : str):
+        pass
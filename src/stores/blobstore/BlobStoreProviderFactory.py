@@ -0,0 +1,42 @@
+# Creating a factory to handle the blob stores
+
+# Importing blob store enums and all providers we have to switch from
+from .BlobStoreEnums import BlobStoreEnums
+from .providers import LocalBlobStore , S3BlobStore
+import os
+
+# Create a Blob Store Provider Factory Class to handle which blob store we will use
+class BlobStoreProviderFactory:
+
+    # Construct the class with setting configurations and the default directories of the application
+    def __init__(self , config , base_dir : str):
+        self.config = config
+        self.base_dir = base_dir
+
+    # Now selecting which blob store according to the environment variable
+    def create(self , provider : str):
+
+        if provider == BlobStoreEnums.LOCAL.value:
+            return LocalBlobStore(
+                root_dir = self.config.BLOB_STORE_LOCAL_DIR or os.path.join(self.base_dir , "assets/blobs"),
+                shard_depth = self.config.BLOB_STORE_SHARD_DEPTH,
+                block_size = self.config.BLOB_STORE_BLOCK_SIZE
+            )
+
+        if provider == BlobStoreEnums.S3.value:
+            return S3BlobStore(
+                bucket = self.config.BLOB_STORE_S3_BUCKET,
+                prefix = self.config.BLOB_STORE_S3_PREFIX,
+                endpoint_url = self.config.BLOB_STORE_S3_ENDPOINT_URL,
+                region_name = self.config.BLOB_STORE_S3_REGION,
+                access_key_id = self.config.BLOB_STORE_S3_ACCESS_KEY_ID,
+                secret_access_key = self.config.BLOB_STORE_S3_SECRET_ACCESS_KEY,
+                cache_dir = self.config.BLOB_STORE_CACHE_DIR or os.path.join(self.base_dir , "assets/blobs_cache"),
+                cache_max_bytes = self.config.BLOB_STORE_CACHE_MAX_BYTES,
+                shard_depth = self.config.BLOB_STORE_SHARD_DEPTH,
+                block_size = self.config.BLOB_STORE_BLOCK_SIZE,
+                presigned_url_expiration = self.config.BLOB_STORE_S3_PRESIGNED_URL_EXPIRATION
+            )
+
+        # if provider isn't supported , return None
+        return None
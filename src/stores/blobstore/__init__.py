@@ -0,0 +1,3 @@
+from .BlobStoreProviderFactory import BlobStoreProviderFactory
+from .BlobStoreInterface import BlobStoreInterface , BlobInfo
+from .BlobStoreEnums import BlobStoreEnums
@@ -0,0 +1,22 @@
+# The helpers shared by the blob stores to name the blobs
+import hashlib
+import re
+
+# A blob key is the hex sha256 of the blob content
+BLOB_KEY_PATTERN = re.compile(r"^[0-9a-f]{64}$")
+
+
+# Creating the hasher the blob keys are computed with
+def create_blob_hasher():
+    return hashlib.sha256()
+
+
+# Validating a key before it's used in a path , so a key can never point outside the store
+def is_blob_key(key : str):
+    return bool(key) and bool(BLOB_KEY_PATTERN.match(key))
+
+
+# Sharding the blobs in nested directories by the first characters of their key
+# so no directory ends up with millions of entries , a depth of 2 gives ab/cd/abcd...
+def shard_blob_key(key : str , depth : int = 2):
+    return "/".join([ key[i * 2 : i * 2 + 2] for i in range(depth) ] + [key])
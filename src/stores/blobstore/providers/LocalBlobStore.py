@@ -0,0 +1,126 @@
+# Setting the local blob store , the blobs are files in sharded directories named by their content hash
+# The root can be a shared volume so every API node sees the same blobs
+
+# Importing the BlobStoreInterface to implement
+from ..BlobStoreInterface import BlobStoreInterface , BlobInfo
+from ..blob_keys import create_blob_hasher , is_blob_key , shard_blob_key
+import aiofiles
+import asyncio
+import logging
+import os
+import uuid
+
+
+class LocalBlobStore(BlobStoreInterface):
+
+    # Construct the store with its root directory , the depth of the sharding and the read block size
+    def __init__(self , root_dir : str , shard_depth : int = 2 , block_size : int = 1048576):
+
+        self.root_dir = root_dir
+        self.shard_depth = shard_depth
+        self.block_size = block_size
+
+        # The blobs are written to a temporary directory on the same file system then renamed into place
+        # so a blob is never seen half written
+        self.temp_dir = os.path.join(self.root_dir , "tmp")
+        os.makedirs(self.temp_dir , exist_ok = True)
+
+        # The shard directories already created , so they're not checked again on every write
+        self.created_dirs = set()
+
+        self.logger = logging.getLogger("uvicorn")
+
+    # Getting the path of a blob from its key
+    def get_blob_path(self , key : str):
+
+        if not is_blob_key(key):
+            raise ValueError(f"Invalid blob key : {key}")
+
+        return os.path.join(self.root_dir , shard_blob_key(key = key , depth = self.shard_depth))
+
+    # Creating a shard directory once
+    def make_dirs(self , dir_path : str):
+
+        if dir_path in self.created_dirs:
+            return
+
+        os.makedirs(dir_path , exist_ok = True)
+        self.created_dirs.add(dir_path)
+
+    async def write(self , chunks):
+
+        temp_path = os.path.join(self.temp_dir , uuid.uuid4().hex)
+        hasher , size = create_blob_hasher() , 0
+
+        try:
+            # Hashing the blob while it's written to the temporary file
+            async with aiofiles.open(temp_path , "wb") as f:
+                async for chunk in chunks:
+                    hasher.update(chunk)
+                    size += len(chunk)
+                    await f.write(chunk)
+
+            key = hasher.hexdigest()
+            blob_path = self.get_blob_path(key = key)
+
+            # The same content is already stored , the new copy is dropped
+            if os.path.exists(blob_path):
+                os.remove(temp_path)
+                return BlobInfo(key = key , size = size , is_new = False)
+
+            # Renaming is atomic so a concurrent writer of the same content just replaces an identical file
+            self.make_dirs(os.path.dirname(blob_path))
+            os.replace(temp_path , blob_path)
+
+        except BaseException:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+
+        return BlobInfo(key = key , size = size , is_new = True)
+
+    async def exists(self , key : str):
+        return os.path.exists(self.get_blob_path(key = key))
+
+    async def get_size(self , key : str):
+        try:
+            return os.path.getsize(self.get_blob_path(key = key))
+        except FileNotFoundError:
+            return None
+
+    async def iterate(self , key : str , offset : int = 0 , length : int = None):
+
+        remaining = length
+        async with aiofiles.open(self.get_blob_path(key = key) , "rb") as f:
+            await f.seek(offset)
+
+            while remaining is None or remaining > 0:
+                block_size = self.block_size if remaining is None else min(self.block_size , remaining)
+                block = await f.read(block_size)
+                if not block:
+                    return
+
+                if remaining is not None:
+                    remaining -= len(block)
+                yield block
+
+    async def read_range(self , key : str , offset : int , length : int):
+        async with aiofiles.open(self.get_blob_path(key = key) , "rb") as f:
+            await f.seek(offset)
+            return await f.read(length)
+
+    # The blobs are already local files
+    async def get_local_path(self , key : str):
+        blob_path = self.get_blob_path(key = key)
+        return blob_path if os.path.exists(blob_path) else None
+
+    # The local blobs are served by the API itself
+    async def get_download_url(self , key : str , file_name : str = None):
+        return None
+
+    async def delete(self , key : str):
+        try:
+            await asyncio.to_thread(os.remove , self.get_blob_path(key = key))
+        except FileNotFoundError:
+            return False
+        return True
@@ -0,0 +1,252 @@
+# Setting the S3 blob store , the blobs are objects named by their content hash in a bucket
+# Any S3 compatible service works through the endpoint URL , like a MinIO container as a local stand-in
+# boto3 is blocking so every call runs in a thread
+
+# Importing the BlobStoreInterface to implement
+from ..BlobStoreInterface import BlobStoreInterface , BlobInfo
+from ..blob_keys import create_blob_hasher , is_blob_key , shard_blob_key
+import aiofiles
+import asyncio
+import boto3
+from botocore.exceptions import ClientError
+import logging
+import os
+import uuid
+
+
+class S3BlobStore(BlobStoreInterface):
+
+    # Construct the store with the bucket , the keys prefix , the connection settings and the local cache
+    # The blobs are downloaded to the cache directory before they're parsed , a blob never changes so the cache
+    # never goes stale and it can be cleaned at any time
+    # The cache is kept under its maximum size by evicting the least recently used blobs , it's unbounded if it's None
+    def __init__(self , bucket : str , prefix : str = "blobs" , endpoint_url : str = None , region_name : str = None ,
+                 access_key_id : str = None , secret_access_key : str = None ,
+                 cache_dir : str = None , shard_depth : int = 2 , block_size : int = 1048576 ,
+                 presigned_url_expiration : int = 3600 , cache_max_bytes : int = None):
+
+        self.bucket = bucket
+        self.prefix = prefix.strip("/")
+        self.shard_depth = shard_depth
+        self.block_size = block_size
+        self.presigned_url_expiration = presigned_url_expiration
+
+        self.client = boto3.client(
+            "s3",
+            endpoint_url = endpoint_url,
+            region_name = region_name,
+            aws_access_key_id = access_key_id,
+            aws_secret_access_key = secret_access_key
+        )
+
+        self.cache_dir = cache_dir
+        self.temp_dir = os.path.join(self.cache_dir , "tmp")
+        os.makedirs(self.temp_dir , exist_ok = True)
+
+        # The size of the cached blobs , it's measured on the first eviction check then kept up to date
+        self.cache_max_bytes = cache_max_bytes
+        self.cache_size = None
+        self.eviction_lock = asyncio.Lock()
+
+        self.logger = logging.getLogger("uvicorn")
+
+    # Getting the object key of a blob
+    def get_object_key(self , key : str):
+
+        if not is_blob_key(key):
+            raise ValueError(f"Invalid blob key : {key}")
+
+        return f"{self.prefix}/{shard_blob_key(key = key , depth = self.shard_depth)}" if self.prefix else shard_blob_key(key = key , depth = self.shard_depth)
+
+    # Getting the path of a blob in the local cache
+    def get_cache_path(self , key : str):
+        return os.path.join(self.cache_dir , self.get_object_key(key = key))
+
+    # Moving a downloaded or written file into the cache , then evicting the old blobs if the cache got too big
+    async def put_in_cache(self , key : str , file_path : str):
+
+        cache_path = self.get_cache_path(key = key)
+        file_size = os.path.getsize(file_path)
+        is_cached = os.path.exists(cache_path)
+
+        os.makedirs(os.path.dirname(cache_path) , exist_ok = True)
+        os.replace(file_path , cache_path)
+
+        if self.cache_size is not None and not is_cached:
+            self.cache_size += file_size
+
+        await self.evict_cache(keep_path = cache_path)
+        return cache_path
+
+    # Listing the cached blobs with their last access time and their size , the staged files aren't blobs
+    def list_cached_blobs(self):
+
+        blobs = []
+        for root , dirs , files in os.walk(self.cache_dir):
+            dirs[:] = [ d for d in dirs if os.path.join(root , d) != self.temp_dir ]
+            for file_name in files:
+                path = os.path.join(root , file_name)
+                try:
+                    stat = os.stat(path)
+                except FileNotFoundError:
+                    continue
+                blobs.append((stat.st_mtime , stat.st_size , path))
+
+        return blobs
+
+    # Deleting the least recently used blobs until the cache fits its maximum size
+    # The blobs that were just used are the last ones evicted , the kept one is the blob that's about to be parsed
+    # so it's never evicted even if it's bigger than the whole cache alone
+    def evict_blobs(self , keep_path : str = None):
+
+        blobs = self.list_cached_blobs()
+        cache_size = sum(size for _ , size , _ in blobs)
+
+        for _ , size , path in sorted(blobs):
+            if cache_size <= self.cache_max_bytes:
+                break
+            if path == keep_path:
+                continue
+            try:
+                os.remove(path)
+                cache_size -= size
+            except FileNotFoundError:
+                cache_size -= size
+
+        return cache_size
+
+    # Checking the size of the cache and evicting the old blobs in a thread when it's over its maximum size
+    async def evict_cache(self , keep_path : str = None):
+
+        if self.cache_max_bytes is None:
+            return
+
+        if self.cache_size is not None and self.cache_size <= self.cache_max_bytes:
+            return
+
+        async with self.eviction_lock:
+            self.cache_size = await asyncio.to_thread(self.evict_blobs , keep_path)
+
+    async def write(self , chunks):
+
+        # The key is only known once the whole content is hashed , so the blob is staged in a temporary file first
+        temp_path = os.path.join(self.temp_dir , uuid.uuid4().hex)
+        hasher , size = create_blob_hasher() , 0
+
+        try:
+            async with aiofiles.open(temp_path , "wb") as f:
+                async for chunk in chunks:
+                    hasher.update(chunk)
+                    size += len(chunk)
+                    await f.write(chunk)
+
+            key = hasher.hexdigest()
+            is_new = not await self.exists(key = key)
+
+            # Uploading the new content , boto3 switches to a multipart upload for the big files
+            if is_new:
+                await asyncio.to_thread(self.client.upload_file , temp_path , self.bucket , self.get_object_key(key = key))
+
+            # Keeping the staged file as the cached copy , the blob is usually parsed right after it's uploaded
+            _ = await self.put_in_cache(key = key , file_path = temp_path)
+
+        except BaseException:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+
+        return BlobInfo(key = key , size = size , is_new = is_new)
+
+    # Getting the metadata of the object , None if it doesn't exist
+    async def head(self , key : str):
+        try:
+            return await asyncio.to_thread(self.client.head_object , Bucket = self.bucket , Key = self.get_object_key(key = key))
+        except ClientError as e:
+            if e.response.get("Error" , {}).get("Code") in ("404" , "NoSuchKey" , "NotFound"):
+                return None
+            raise
+
+    async def exists(self , key : str):
+        return await self.head(key = key) is not None
+
+    async def get_size(self , key : str):
+        response = await self.head(key = key)
+        return response["ContentLength"] if response is not None else None
+
+    # Getting the object body of a range , the range header is inclusive
+    async def get_object_body(self , key : str , offset : int = 0 , length : int = None):
+
+        params = {"Bucket" : self.bucket , "Key" : self.get_object_key(key = key)}
+        if offset or length is not None:
+            end = "" if length is None else str(offset + length - 1)
+            params["Range"] = f"bytes={offset}-{end}"
+
+        response = await asyncio.to_thread(self.client.get_object , **params)
+        return response["Body"]
+
+    async def iterate(self , key : str , offset : int = 0 , length : int = None):
+
+        if length == 0:
+            return
+
+        body = await self.get_object_body(key = key , offset = offset , length = length)
+        try:
+            while block := await asyncio.to_thread(body.read , self.block_size):
+                yield block
+        finally:
+            body.close()
+
+    async def read_range(self , key : str , offset : int , length : int):
+
+        if length == 0:
+            return b""
+
+        body = await self.get_object_body(key = key , offset = offset , length = length)
+        try:
+            return await asyncio.to_thread(body.read)
+        finally:
+            body.close()
+
+    # Downloading the blob to the local cache if it isn't there already
+    async def get_local_path(self , key : str):
+
+        # A cache hit marks the blob as used , so it's the last one evicted
+        cache_path = self.get_cache_path(key = key)
+        try:
+            os.utime(cache_path)
+            return cache_path
+        except FileNotFoundError:
+            pass
+
+        temp_path = os.path.join(self.temp_dir , uuid.uuid4().hex)
+        try:
+            await asyncio.to_thread(self.client.download_file , self.bucket , self.get_object_key(key = key) , temp_path)
+        except ClientError as e:
+            self.logger.error(f"Error while downloading blob {key} : {e}")
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            return None
+
+        return await self.put_in_cache(key = key , file_path = temp_path)
+
+    # The clients download the blobs from the bucket directly with a presigned URL , the API node never proxies them
+    # Signing is done locally without a request to the bucket
+    async def get_download_url(self , key : str , file_name : str = None):
+
+        params = {"Bucket" : self.bucket , "Key" : self.get_object_key(key = key)}
+        if file_name:
+            params["ResponseContentDisposition"] = f'attachment; filename="{file_name}"'
+
+        return self.client.generate_presigned_url("get_object" , Params = params , ExpiresIn = self.presigned_url_expiration)
+
+    async def delete(self , key : str):
+
+        await asyncio.to_thread(self.client.delete_object , Bucket = self.bucket , Key = self.get_object_key(key = key))
+
+        cache_path = self.get_cache_path(key = key)
+        if os.path.exists(cache_path):
+            if self.cache_size is not None:
+                self.cache_size -= os.path.getsize(cache_path)
+            os.remove(cache_path)
+
+        return True
@@ -0,0 +1,2 @@
+from .LocalBlobStore import LocalBlobStore
+from .S3BlobStore import S3BlobStore
@@ -0,0 +1,164 @@
+# Setting the answer cache , it keeps the RAG answers of every project so repeated questions skip
+# the retrieval and the generation , the entries of a project are dropped when its collection changes
+# The cache lives in one process , the jobs that change a collection run in the workers so they bump the collection
+# version of the project in the database , and every process drops its entries once it sees a newer version
+
+from .LRUCache import LRUCache
+from helpers import metrics
+from dataclasses import dataclass , field
+import math
+import time
+
+
+# A cached answer with the query vector it was asked with and the documents it was built from
+@dataclass
+class AnswerCacheEntry:
+    answer : str
+    full_prompt : str
+    chat_history : list
+    query_vector : list = None
+    documents : list = None
+    prompt_tokens : int = None
+    created_at : float = field(default_factory = time.monotonic)
+
+
+class AnswerCache:
+
+    # Construct the class with the size of the cache of every project , the entries time to live
+    # and the similarity threshold of the semantic tier , the semantic tier is disabled if it's None
+    def __init__(self , max_entries : int = 1000 , ttl_seconds : int = 3600 ,
+                 semantic_threshold : float = None , semantic_max_entries : int = 200):
+
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.semantic_threshold = semantic_threshold
+        self.semantic_max_entries = semantic_max_entries
+
+        # The exact and the semantic tiers of every project
+        self.exact_entries = {}
+        self.semantic_entries = {}
+
+        # The collection version of every project the entries were cached at
+        self.versions = {}
+
+    @property
+    def semantic_enabled(self):
+        return self.semantic_threshold is not None
+
+    # Normalizing the query so the same question written differently gets the same key
+    def normalize_query(self , query : str):
+        return " ".join(query.lower().split()).strip(" ?!.")
+
+    # The key of a question in the exact tier , the answer depends on how its documents were searched too
+    def cache_key(self , query : str , limit : int , accuracy : str = None , mode : str = None):
+        return (self.normalize_query(query) , limit , accuracy , mode)
+
+    # Checking that an entry is still fresh
+    def is_fresh(self , entry : AnswerCacheEntry):
+        return self.ttl_seconds is None or time.monotonic() - entry.created_at <= self.ttl_seconds
+
+    # Checking the collection version of a project against the one its entries were cached at
+    # A newer version drops the entries of the project , an older one comes from a request that read the project
+    # before the last change so it can neither use nor store the entries , no version skips the check
+    def is_current_version(self , project_id : int , version : int = None):
+
+        if version is None:
+            return True
+
+        known_version = self.versions.get(project_id)
+        if known_version is None or version > known_version:
+            self.invalidate(project_id = project_id)
+            self.versions[project_id] = version
+            return True
+
+        return version == known_version
+
+    # Counting a lookup of a tier for the hit rate metrics
+    def record_lookup(self , tier : str , is_hit : bool):
+        metrics.ANSWER_CACHE_LOOKUPS.labels(tier = tier , result = "hit" if is_hit else "miss").inc()
+
+    # A function to get the answer of the exact same question
+    def get(self , project_id : int , query : str , limit : int , accuracy : str = None , mode : str = None ,
+            version : int = None):
+
+        key = self.cache_key(query = query , limit = limit , accuracy = accuracy , mode = mode)
+        entries = self.exact_entries.get(project_id) if self.is_current_version(project_id , version) else None
+        entry = entries.get(key) if entries else None
+
+        if entry is not None and not self.is_fresh(entry):
+            entries.pop(key)
+            entry = None
+
+        self.record_lookup(tier = "exact" , is_hit = entry is not None)
+        return entry
+
+    # A function to get the answer of the most similar question if it's similar enough
+    def get_semantic(self , project_id : int , query_vector : list , limit : int , accuracy : str = None , mode : str = None ,
+                     version : int = None):
+
+        if not self.semantic_enabled or not query_vector:
+            return None
+
+        entries = self.semantic_entries.get(project_id) if self.is_current_version(project_id , version) else None
+        if entries is None:
+            self.record_lookup(tier = "semantic" , is_hit = False)
+            return None
+
+        best_entry , best_score = None , -1.0
+        query_vector = self.normalize_vector(query_vector)
+
+        for key , entry in entries.items():
+
+            # The answers were retrieved with a limit , an accuracy and a mode , only the ones searched the same way are reusable
+            if key[1:] != (limit , accuracy , mode):
+                continue
+
+            if not self.is_fresh(entry):
+                entries.pop(key)
+                continue
+
+            score = sum(a * b for a , b in zip(query_vector , entry.query_vector))
+            if score > best_score:
+                best_entry , best_score = entry , score
+
+        if best_score < self.semantic_threshold:
+            best_entry = None
+
+        self.record_lookup(tier = "semantic" , is_hit = best_entry is not None)
+        return best_entry
+
+    # Scaling a vector to a unit length so the dot product is the cosine similarity
+    def normalize_vector(self , vector : list):
+        norm = math.sqrt(sum(v * v for v in vector)) or 1.0
+        return [v / norm for v in vector]
+
+    # A function to store the answer of a question
+    def set(self , project_id : int , query : str , limit : int ,
+            answer : str , full_prompt : str , chat_history : list , query_vector : list = None , documents : list = None ,
+            prompt_tokens : int = None , accuracy : str = None , mode : str = None , version : int = None):
+
+        # The answer was built from an older collection than the cached ones
+        if not self.is_current_version(project_id , version):
+            return None
+
+        entry = AnswerCacheEntry(
+            answer = answer,
+            full_prompt = full_prompt,
+            chat_history = chat_history,
+            query_vector = self.normalize_vector(query_vector) if query_vector else None,
+            documents = documents,
+            prompt_tokens = prompt_tokens
+        )
+        key = self.cache_key(query = query , limit = limit , accuracy = accuracy , mode = mode)
+
+        self.exact_entries.setdefault(project_id , LRUCache(max_size = self.max_entries)).set(key , entry)
+
+        if self.semantic_enabled and entry.query_vector:
+            self.semantic_entries.setdefault(project_id , LRUCache(max_size = self.semantic_max_entries)).set(key , entry)
+
+        return entry
+
+    # A function to drop all the answers of a project , it's called whenever the project collection changes
+    def invalidate(self , project_id : int):
+        self.exact_entries.pop(project_id , None)
+        self.semantic_entries.pop(project_id , None)
@@ -0,0 +1,137 @@
+# Setting the embedding cache , it wraps an embedding client and caches its embeddings by their content
+# The cache has two tiers , an in-process LRU tier and a persistent tier stored in postgres
+
+from .LRUCache import LRUCache
+from helpers import metrics
+from stores.llm.LLMEnum import DocumentTypeEnums
+from typing import List , Union
+import hashlib
+import logging
+
+
+class EmbeddingCache:
+
+    # Construct the class with the wrapped embedding client , the name of its backend and the tiers settings
+    # cache_model is the EmbeddingCacheModel of the persistent tier , the tier is disabled if it's None
+    def __init__(self , embedding_client , backend : str , lru_size : int = 10000 , cache_model = None):
+
+        self.embedding_client = embedding_client
+        self.backend = backend
+        self.lru = LRUCache(max_size = lru_size)
+        self.cache_model = cache_model
+
+        self.logger = logging.getLogger(__name__)
+
+    # Every other attribute , like the embedding size or the model setters , comes from the wrapped client
+    def __getattr__(self , name):
+        return getattr(self.embedding_client , name)
+
+    # The hash of the text content
+    def hash_text(self , text : str):
+        return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+    # The key of a text in the LRU tier , (backend , model id , document type , sha256(text))
+    def cache_key(self , document_type : str , text_hash : str):
+        return (self.backend , self.embedding_client.embedding_model_id , document_type , text_hash)
+
+    # Counting a lookup of a tier for the hit rate metrics
+    def record_lookups(self , tier : str , hits : int , misses : int):
+        if hits:
+            metrics.EMBEDDING_CACHE_LOOKUPS.labels(tier = tier , result = "hit").inc(hits)
+        if misses:
+            metrics.EMBEDDING_CACHE_LOOKUPS.labels(tier = tier , result = "miss").inc(misses)
+
+    # A function to look the texts up in the LRU tier
+    # It returns the list of embeddings with None for the missing ones , and the hashes of the missing texts
+    def lookup_lru(self , texts : List[str] , document_type : str):
+
+        embeddings = []
+        missing_hashes = {}
+
+        for idx , text in enumerate(texts):
+            text_hash = self.hash_text(text)
+            embedding = self.lru.get(self.cache_key(document_type = document_type , text_hash = text_hash))
+            embeddings.append(embedding)
+
+            if embedding is None:
+                missing_hashes.setdefault(text_hash , []).append(idx)
+
+        misses = sum(len(idxs) for idxs in missing_hashes.values())
+        self.record_lookups(tier = "lru" , hits = len(texts) - misses , misses = misses)
+
+        return embeddings , missing_hashes
+
+    # A function to fill the found embeddings in their places and in the LRU tier
+    def fill(self , embeddings : list , missing_hashes : dict , found : dict , document_type : str):
+
+        for text_hash , embedding in found.items():
+            self.lru.set(self.cache_key(document_type = document_type , text_hash = text_hash) , embedding)
+            for idx in missing_hashes.pop(text_hash , []):
+                embeddings[idx] = embedding
+
+    # This function is to get text embeddings , only the texts that aren't cached are embedded by the wrapped client
+    # It uses the LRU tier only , the persistent tier needs the event loop
+    def embed_text(self , text : Union[str , List[str]] , document_type : str = None):
+
+        texts = [text] if isinstance(text , str) else list(text)
+        document_type = document_type or DocumentTypeEnums.DOCUMENT.value
+
+        embeddings , missing_hashes = self.lookup_lru(texts = texts , document_type = document_type)
+
+        if missing_hashes:
+            missing_texts = [texts[idxs[0]] for idxs in missing_hashes.values()]
+            vectors = self.embedding_client.embed_text(text = missing_texts , document_type = document_type)
+
+            if not vectors or len(vectors) != len(missing_texts):
+                return None
+
+            self.fill(embeddings = embeddings , missing_hashes = missing_hashes ,
+                      found = dict(zip(list(missing_hashes.keys()) , vectors)) , document_type = document_type)
+
+        return embeddings
+
+    # This function is to get text embeddings without blocking the event loop
+    # The texts are looked up in the LRU tier , then in the persistent tier , and only the rest is embedded
+    async def embed_text_async(self , text : Union[str , List[str]] , document_type : str = None):
+
+        texts = [text] if isinstance(text , str) else list(text)
+        document_type = document_type or DocumentTypeEnums.DOCUMENT.value
+        model_id = self.embedding_client.embedding_model_id
+
+        embeddings , missing_hashes = self.lookup_lru(texts = texts , document_type = document_type)
+
+        # Looking the texts missing from the LRU tier up in the persistent tier
+        if missing_hashes and self.cache_model is not None:
+            requested = len(missing_hashes)
+            try:
+                found = await self.cache_model.get_embeddings(backend = self.backend , model_id = model_id ,
+                                                              document_type = document_type ,
+                                                              text_hashes = list(missing_hashes.keys()))
+            except Exception as e:
+                self.logger.error(f"Error while reading the persistent embedding cache : {e}")
+                found = {}
+
+            self.record_lookups(tier = "persistent" , hits = len(found) , misses = requested - len(found))
+            self.fill(embeddings = embeddings , missing_hashes = missing_hashes , found = found , document_type = document_type)
+
+        # Embedding the texts that aren't cached in any tier , every distinct text is embedded once
+        if missing_hashes:
+            missing_texts = [texts[idxs[0]] for idxs in missing_hashes.values()]
+            vectors = await self.embedding_client.embed_text_async(text = missing_texts , document_type = document_type)
+
+            if not vectors or len(vectors) != len(missing_texts):
+                return None
+
+            new_embeddings = dict(zip(list(missing_hashes.keys()) , vectors))
+            self.fill(embeddings = embeddings , missing_hashes = missing_hashes , found = new_embeddings , document_type = document_type)
+
+            # Storing the new embeddings in the persistent tier
+            if self.cache_model is not None:
+                try:
+                    await self.cache_model.insert_embeddings(backend = self.backend , model_id = model_id ,
+                                                             document_type = document_type ,
+                                                             embeddings = new_embeddings)
+                except Exception as e:
+                    self.logger.error(f"Error while writing the persistent embedding cache : {e}")
+
+        return embeddings
@@ -0,0 +1,38 @@
+# A small in-process least recently used cache with a maximum number of entries
+from collections import OrderedDict
+
+class LRUCache:
+
+    def __init__(self , max_size : int = 10000):
+        self.max_size = max_size
+        self.entries = OrderedDict()
+
+    # Getting an entry and marking it as the most recently used one
+    def get(self , key , default = None):
+        if key not in self.entries:
+            return default
+        self.entries.move_to_end(key)
+        return self.entries[key]
+
+    # Setting an entry and evicting the least recently used entries above the maximum size
+    def set(self , key , value):
+        self.entries[key] = value
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_size:
+            self.entries.popitem(last = False)
+
+    def pop(self , key , default = None):
+        return self.entries.pop(key , default)
+
+    # A copy of the entries from the least to the most recently used , without touching their order
+    def items(self):
+        return list(self.entries.items())
+
+    def clear(self):
+        self.entries.clear()
+
+    def __contains__(self , key):
+        return key in self.entries
+
+    def __len__(self):
+        return len(self.entries)
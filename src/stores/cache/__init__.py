@@ -0,0 +1,3 @@
+from .LRUCache import LRUCache
+from .EmbeddingCache import EmbeddingCache
+from .AnswerCache import AnswerCache
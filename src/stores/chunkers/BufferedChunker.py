@@ -0,0 +1,131 @@
+# A base for the chunkers that split a buffer of text into chunk spans
+# The pages are gathered in a buffer , once the buffer is big enough the complete chunks are emitted
+# and the buffer restarts from the chunk that's still filling , so the memory stays bounded by the buffer size
+from .ChunkerInterface import ChunkerInterface
+from langchain_core.documents import Document
+from abc import abstractmethod
+from bisect import bisect_right
+from collections import deque
+from typing import List , Tuple
+
+
+class BufferedChunker(ChunkerInterface):
+
+    # The pages are joined with a new line so a page break is a line break for the separators
+    PAGE_SEPARATOR = "\n"
+
+    # Construct the chunker with the chunk size , the overlap between two following chunks and the buffer size
+    # The overlap is kept below the chunk size so every chunk moves the text forward
+    def __init__(self , chunk_size : int , overlap_size : int = 0 , buffer_size : int = 65536):
+
+        self.chunk_size = max(1 , chunk_size)
+        self.overlap_size = min(max(0 , overlap_size or 0) , self.chunk_size - 1)
+        self.buffer_size = max(buffer_size , self.chunk_size * 4)
+
+        self.reset()
+
+    # Emptying the buffer and the pages positions
+    def reset(self):
+        self.buffer = ""
+        self.page_starts = []
+        self.page_metadatas = []
+
+    # Splitting a text into the spans of its chunks , the last span is the chunk that's still filling
+    @abstractmethod
+    def split_chunks(self , text : str) -> List[Tuple[int , int]]:
+        pass
+
+    def feed(self , text : str , metadata : dict = None):
+
+        # A page that already ends with a line break , like a window of a text file , isn't given another one
+        if self.buffer and not self.buffer.endswith(self.PAGE_SEPARATOR):
+            self.buffer += self.PAGE_SEPARATOR
+
+        # Keeping where every page starts in the buffer so every chunk gets the metadata of its page
+        self.page_starts.append(len(self.buffer))
+        self.page_metadatas.append(metadata or {})
+        self.buffer += text
+
+        if len(self.buffer) < self.buffer_size:
+            return []
+
+        return self.emit(is_final = False)
+
+    def flush(self):
+        chunks = self.emit(is_final = True)
+        self.reset()
+        return chunks
+
+    # Making the documents of the complete chunks , the buffer then restarts from the chunk that's still filling
+    def emit(self , is_final : bool):
+
+        spans = self.split_chunks(self.buffer)
+        if not spans:
+            return []
+
+        if not is_final:
+            spans , last_start = spans[:-1] , spans[-1][0]
+
+        chunks = []
+        for start , end in spans:
+            chunk = self.create_chunk(start = start , end = end)
+            if chunk is not None:
+                chunks.append(chunk)
+
+        if not is_final:
+            self.cut_buffer(position = last_start)
+
+        return chunks
+
+    # Creating the document of a span with the metadata of the page it starts in
+    # and the last page too when the chunk crosses pages
+    def create_chunk(self , start : int , end : int):
+
+        text = self.buffer[start:end]
+        stripped_text = text.lstrip()
+        start += len(text) - len(stripped_text)
+        stripped_text = stripped_text.rstrip()
+
+        if not stripped_text:
+            return None
+
+        start_page = bisect_right(self.page_starts , start) - 1
+        end_page = bisect_right(self.page_starts , start + len(stripped_text) - 1) - 1
+
+        metadata = dict(self.page_metadatas[start_page])
+        if end_page != start_page and "page" in self.page_metadatas[end_page]:
+            metadata["end_page"] = self.page_metadatas[end_page]["page"]
+
+        return Document(page_content = stripped_text , metadata = metadata)
+
+    # Dropping the buffer before a position , with the pages that end before it
+    def cut_buffer(self , position : int):
+
+        first_page = max(0 , bisect_right(self.page_starts , position) - 1)
+
+        self.buffer = self.buffer[position:]
+        self.page_starts = [ max(0 , start - position) for start in self.page_starts[first_page:] ]
+        self.page_metadatas = self.page_metadatas[first_page:]
+
+    # Merging small contiguous pieces into chunks up to the chunk size
+    # The last pieces of a chunk that fit in the overlap size start the next chunk
+    def merge_pieces(self , pieces : List[Tuple[int , int]]):
+
+        chunks , current = [] , deque()
+
+        for piece in pieces:
+
+            if current and piece[1] - current[0][0] > self.chunk_size:
+                chunks.append((current[0][0] , current[-1][1]))
+
+                # Keeping the tail of the chunk as long as it fits in the overlap and leaves a room for the new piece
+                while current and (current[-1][1] - current[0][0] > self.overlap_size
+                                   or piece[1] - current[0][0] > self.chunk_size):
+                    current.popleft()
+
+            current.append(piece)
+
+        if current:
+            chunks.append((current[0][0] , current[-1][1]))
+
+        return chunks
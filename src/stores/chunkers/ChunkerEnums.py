@@ -0,0 +1,16 @@
+# Setting all needed enums for the chunkers
+from enum import Enum
+
+class ChunkerEnums(Enum):
+
+    # The legacy line splitter , it ignores the overlap
+    SIMPLE = "simple"
+
+    # Splitting on paragraphs , then lines , then sentences , then words until the pieces fit
+    RECURSIVE = "recursive"
+
+    # Splitting on the sentences boundaries
+    SENTENCE = "sentence"
+
+    # Splitting on a number of tokens of the embedding model tokenizer
+    TOKEN = "token"
@@ -0,0 +1,20 @@
+# Creating Interface to implement chunkers according to these function
+# to ensure all chunkers have the same behavior
+
+# Importing abstraction methods and the abc class for interfacing
+from abc import ABC ,abstractmethod
+
+class ChunkerInterface(ABC):
+
+    # Setting all functions as abstraction_method
+    # A chunker is fed the pages of a single file one by one , so the file is never held whole in memory
+
+    # Feeding a page with its metadata , it returns the chunks that are complete so far
+    @abstractmethod
+    def feed(self , text : str , metadata : dict = None):
+        pass
+
+    # Ending the file , it returns the remaining chunks
+    @abstractmethod
+    def flush(self):
+        pass
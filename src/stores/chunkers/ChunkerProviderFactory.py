@@ -0,0 +1,36 @@
+# Creating a factory to handle the chunkers
+
+# Importing chunker enums and all providers we have to switch from
+from .ChunkerEnums import ChunkerEnums
+from .providers import SimpleChunker , RecursiveChunker , SentenceChunker , TokenChunker
+
+# Create a Chunker Provider Factory Class to handle which chunker we will use
+class ChunkerProviderFactory:
+
+    # Construct the class with setting configurations and giving it to the class
+    def __init__(self , config):
+        self.config = config
+
+    # Now selecting which chunker according to the request , a new chunker is created for every file
+    # The chunk size and the overlap are counted in characters , or in tokens for the token chunker
+    def create(self , provider : str , chunk_size : int , overlap_size : int = 0):
+
+        if provider == ChunkerEnums.SIMPLE.value:
+            return SimpleChunker(chunk_size = chunk_size)
+
+        if provider == ChunkerEnums.RECURSIVE.value:
+            return RecursiveChunker(chunk_size = chunk_size , overlap_size = overlap_size ,
+                                    buffer_size = self.config.CHUNKER_BUFFER_SIZE)
+
+        if provider == ChunkerEnums.SENTENCE.value:
+            return SentenceChunker(chunk_size = chunk_size , overlap_size = overlap_size ,
+                                   buffer_size = self.config.CHUNKER_BUFFER_SIZE ,
+                                   language = self.config.CHUNKER_SENTENCE_LANGUAGE)
+
+        if provider == ChunkerEnums.TOKEN.value:
+            return TokenChunker(chunk_size = chunk_size , overlap_size = overlap_size ,
+                                buffer_size = self.config.CHUNKER_BUFFER_SIZE ,
+                                encoding_name = self.config.CHUNKER_TOKEN_ENCODING)
+
+        # if provider isn't supported , return None
+        return None
@@ -0,0 +1,3 @@
+from .ChunkerProviderFactory import ChunkerProviderFactory
+from .ChunkerInterface import ChunkerInterface
+from .ChunkerEnums import ChunkerEnums
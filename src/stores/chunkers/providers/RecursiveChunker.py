@@ -0,0 +1,43 @@
+# Splitting the text on paragraphs , then lines , then sentences , then words and characters
+# until every piece fits the chunk size , then merging the pieces back into chunks with the overlap
+from ..BufferedChunker import BufferedChunker
+
+
+class RecursiveChunker(BufferedChunker):
+
+    SEPARATORS = ["\n\n" , "\n" , ". " , " " , ""]
+
+    def split_chunks(self , text : str):
+        return self.merge_pieces(self.split_range(text = text , start = 0 , end = len(text) , separators = self.SEPARATORS))
+
+    # Splitting a range of the text with the first separator found in it , the separator stays at the end of its piece
+    # so the pieces cover the whole range , a piece that's still too long is split with the next separators
+    def split_range(self , text : str , start : int , end : int , separators : list):
+
+        if end - start <= self.chunk_size:
+            return [(start , end)] if end > start else []
+
+        for index , separator in enumerate(separators):
+
+            # No separator left , cutting the range by the chunk size
+            if not separator:
+                return [ (position , min(position + self.chunk_size , end)) for position in range(start , end , self.chunk_size) ]
+
+            if text.find(separator , start , end) == -1:
+                continue
+
+            pieces , position = [] , start
+            while position < end:
+                found = text.find(separator , position , end)
+                piece_end = end if found == -1 else found + len(separator)
+
+                if piece_end - position <= self.chunk_size:
+                    pieces.append((position , piece_end))
+                else:
+                    pieces.extend(self.split_range(text = text , start = position , end = piece_end ,
+                                                   separators = separators[index + 1:]))
+                position = piece_end
+
+            return pieces
+
+        return [(start , end)]
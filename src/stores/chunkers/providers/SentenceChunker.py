@@ -0,0 +1,47 @@
+# Splitting the text on the sentences boundaries found by the nltk punkt tokenizer
+# then merging the sentences into chunks with the overlap , a sentence longer than a chunk is split recursively
+from .RecursiveChunker import RecursiveChunker
+from functools import lru_cache
+import logging
+
+
+class SentenceChunker(RecursiveChunker):
+
+    # The separators used inside a sentence that's longer than a chunk
+    SEPARATORS = ["\n" , " " , ""]
+
+    def __init__(self , chunk_size : int , overlap_size : int = 0 , buffer_size : int = 65536 , language : str = "english"):
+        super().__init__(chunk_size = chunk_size , overlap_size = overlap_size , buffer_size = buffer_size)
+        self.tokenizer = self.load_tokenizer(language = language)
+
+    # Loading the pretrained punkt model of the language , falling back to the untrained tokenizer
+    # when the model isn't downloaded , it still splits on the usual sentences endings
+    # The tokenizer is loaded once per language and shared by the chunkers of all files
+    @staticmethod
+    @lru_cache(maxsize = None)
+    def load_tokenizer(language : str):
+
+        from nltk.tokenize.punkt import PunktSentenceTokenizer
+
+        try:
+            from nltk.tokenize import PunktTokenizer
+            return PunktTokenizer(language)
+        except (ImportError , LookupError , OSError) as e:
+            logging.getLogger('uvicorn.error').warning(f"The punkt model of {language} isn't available , using the untrained tokenizer : {e}")
+            return PunktSentenceTokenizer()
+
+    def split_chunks(self , text : str):
+
+        # Every sentence piece runs until the next sentence starts so the pieces cover the whole text
+        starts = [ start for start , _ in self.tokenizer.span_tokenize(text) ]
+        if not starts:
+            return []
+
+        starts[0] = 0
+        ends = starts[1:] + [len(text)]
+
+        pieces = []
+        for start , end in zip(starts , ends):
+            pieces.extend(self.split_range(text = text , start = start , end = end , separators = self.SEPARATORS))
+
+        return self.merge_pieces(pieces)
@@ -0,0 +1,61 @@
+# The legacy chunker , it gathers the lines of the file until the chunk size and has no overlap
+from ..ChunkerInterface import ChunkerInterface
+from langchain_core.documents import Document
+
+
+class SimpleChunker(ChunkerInterface):
+
+    def __init__(self , chunk_size : int , splitter_tag : str = "\n"):
+
+        self.chunk_size = chunk_size
+        self.splitter_tag = splitter_tag
+
+        self.pending_line , self.current_chunk , self.current_metadata = "" , "" , {}
+        self.is_first_page = True
+
+    def feed(self , text : str , metadata : dict = None):
+
+        # The pages are joined with a space , the last line of a page may continue in the next page
+        # so it's kept until the next page comes
+        text = text if self.is_first_page else " " + text
+        self.is_first_page = False
+
+        lines = (self.pending_line + text).split(self.splitter_tag)
+        self.pending_line = lines.pop()
+
+        return self.accumulate_lines(lines = lines , metadata = metadata or {})
+
+    def flush(self):
+
+        chunks = self.accumulate_lines(lines = [self.pending_line] , metadata = self.current_metadata)
+
+        # For the last chunk we save it even if it's empty like the legacy splitter does
+        chunks.append(Document(page_content = self.current_chunk , metadata = self.current_metadata))
+
+        self.pending_line , self.current_chunk , self.current_metadata = "" , "" , {}
+        self.is_first_page = True
+
+        return chunks
+
+    # Gathering lines into chunks , it returns the complete chunks and keeps the chunk that's still filling
+    def accumulate_lines(self , lines : list , metadata : dict):
+
+        chunks = []
+
+        # For each line we strip it and make sure there's no empty lines
+        # Then we add the line and the splitter tag for the current chunk until it reaches the chunk size
+        for line in lines :
+            line = line.strip()
+            if len(line) <= 1:
+                continue
+
+            # A chunk takes the metadata of the page it starts in
+            if not self.current_chunk:
+                self.current_metadata = dict(metadata)
+
+            self.current_chunk += line + self.splitter_tag
+            if len(self.current_chunk) >= self.chunk_size:
+                chunks.append(Document(page_content = self.current_chunk , metadata = self.current_metadata))
+                self.current_chunk = ""
+
+        return chunks
@@ -0,0 +1,38 @@
+# Splitting the text into windows of tokens of the embedding model tokenizer
+# The chunk size and the overlap are counted in tokens , so every chunk fits the model context exactly
+from ..BufferedChunker import BufferedChunker
+from helpers.tokenizer import get_encoding
+
+
+class TokenChunker(BufferedChunker):
+
+    def __init__(self , chunk_size : int , overlap_size : int = 0 , buffer_size : int = 65536 , encoding_name : str = "cl100k_base"):
+        super().__init__(chunk_size = chunk_size , overlap_size = overlap_size , buffer_size = buffer_size)
+
+        # A token is a few characters so the buffer is made big enough to hold many windows
+        self.buffer_size = max(self.buffer_size , self.chunk_size * 16)
+        self.encoding_name = encoding_name
+
+    # The tokenizer is loaded on the first split , it's shared by all the chunkers of the process
+    @property
+    def encoding(self):
+        return get_encoding(self.encoding_name)
+
+    def split_chunks(self , text : str):
+
+        tokens = self.encoding.encode(text , disallowed_special = ())
+        if not tokens:
+            return []
+
+        # The offsets are the positions of the tokens in the text , the windows are mapped back to the text with them
+        _ , offsets = self.encoding.decode_with_offsets(tokens)
+        offsets.append(len(text))
+
+        spans , stride = [] , self.chunk_size - self.overlap_size
+        for start in range(0 , len(tokens) , stride):
+            end = min(start + self.chunk_size , len(tokens))
+            spans.append((offsets[start] , offsets[end]))
+            if end == len(tokens):
+                break
+
+        return spans
@@ -0,0 +1,4 @@
+from .SimpleChunker import SimpleChunker
+from .RecursiveChunker import RecursiveChunker
+from .SentenceChunker import SentenceChunker
+from .TokenChunker import TokenChunker
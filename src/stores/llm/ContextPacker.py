@@ -0,0 +1,118 @@
+# Packing the retrieved documents into the prompt within a budget of tokens of the generation model tokenizer
+# The documents are added in score order , the near duplicates are dropped and the last one that doesn't fit is cut
+from helpers.tokenizer import get_encoding
+from dataclasses import dataclass , field
+from typing import Callable , List
+import re
+
+
+# The words of a text , lower cased , the near duplicates are found by the shingles of these words
+WORD_PATTERN = re.compile(r"\w+" , re.UNICODE)
+
+
+# The documents kept in the prompt with their rendered prompts and what the packing cost
+# The tokens are the ones of the documents prompts , the prompt tokens are the ones of the whole prompt once it's built
+@dataclass
+class PackedContext:
+    documents : list = field(default_factory = list)
+    prompts : List[str] = field(default_factory = list)
+    tokens : int = 0
+    prompt_tokens : int = None
+    dropped_duplicates : int = 0
+    dropped_over_budget : int = 0
+    truncated : bool = False
+
+
+class ContextPacker:
+
+    # Construct the packer with the budget of tokens of the documents and the tokenizer of the generation model
+    # Two documents sharing at least duplicate_threshold of their word shingles are near duplicates
+    def __init__(self , max_tokens : int , encoding_name : str = None , model_id : str = None ,
+                 duplicate_threshold : float = 0.9 , shingle_size : int = 3 , min_document_tokens : int = 32):
+
+        self.max_tokens = max_tokens
+        self.encoding_name = encoding_name
+        self.model_id = model_id
+        self.duplicate_threshold = duplicate_threshold
+        self.shingle_size = shingle_size
+        self.min_document_tokens = min_document_tokens
+
+    # The tokenizer is loaded on the first count and not at startup , loading it may download its files
+    @property
+    def encoding(self):
+        return get_encoding(encoding_name = self.encoding_name , model_id = self.model_id)
+
+    # Counting the tokens of a text
+    def count_tokens(self , text : str):
+        return len(self.encoding.encode(text , disallowed_special = ()))
+
+    # Cutting a text to its first tokens
+    def truncate_tokens(self , text : str , max_tokens : int):
+        tokens = self.encoding.encode(text , disallowed_special = ())
+        return self.encoding.decode(tokens[:max(0 , max_tokens)]).strip()
+
+    # The shingles of the words of a text , the short texts are a single shingle
+    def get_shingles(self , text : str):
+        words = WORD_PATTERN.findall(text.lower())
+        if len(words) <= self.shingle_size:
+            return {tuple(words)}
+        return { tuple(words[i:i + self.shingle_size]) for i in range(len(words) - self.shingle_size + 1) }
+
+    # Checking if a text is a near duplicate of any of the kept ones with the jaccard similarity of their shingles
+    def is_near_duplicate(self , shingles : set , kept_shingles : list):
+
+        if self.duplicate_threshold is None:
+            return False
+
+        for kept in kept_shingles:
+            union = len(shingles | kept)
+            if union and len(shingles & kept) / union >= self.duplicate_threshold:
+                return True
+
+        return False
+
+    # Packing the documents into the budget , render turns the number and the text of a document into its prompt
+    # The reserved tokens are the rest of the prompt , like the system prompt and the footer , they're taken from the budget
+    def pack(self , documents : list , render : Callable[[int , str] , str] , reserved_tokens : int = 0):
+
+        packed = PackedContext()
+        kept_shingles = []
+        remaining = self.max_tokens - reserved_tokens
+
+        # The best documents first , the ties keep their search order
+        ranked = sorted(documents , key = lambda document: document.score , reverse = True)
+
+        for position , document in enumerate(ranked):
+
+            shingles = self.get_shingles(document.text)
+            if self.is_near_duplicate(shingles = shingles , kept_shingles = kept_shingles):
+                packed.dropped_duplicates += 1
+                continue
+
+            # Every document is followed by a new line in the prompt
+            prompt = render(len(packed.documents) + 1 , document.text)
+            prompt_tokens = self.count_tokens(prompt) + 1
+
+            if prompt_tokens > remaining:
+
+                # The first document that doesn't fit is cut to the rest of the budget if enough of it is left
+                overhead = self.count_tokens(render(len(packed.documents) + 1 , "")) + 1
+                if remaining - overhead >= self.min_document_tokens:
+                    text = self.truncate_tokens(document.text , max_tokens = remaining - overhead)
+                    prompt = render(len(packed.documents) + 1 , text)
+                    packed.documents.append(document.model_copy(update = {"text" : text}))
+                    packed.prompts.append(prompt)
+                    packed.tokens += self.count_tokens(prompt) + 1
+                    packed.truncated = True
+                    position += 1
+
+                packed.dropped_over_budget += len(ranked) - position
+                break
+
+            kept_shingles.append(shingles)
+            packed.documents.append(document)
+            packed.prompts.append(prompt)
+            packed.tokens += prompt_tokens
+            remaining -= prompt_tokens
+
+        return packed
@@ -19,6 +19,8 @@ class CoHereEnums(Enum):
     DOCUMENT = "search_document"
     QUERY = "search_query"
 
+    TEXT_GENERATION_EVENT = "text-generation"
+
 class DocumentTypeEnums(Enum):
     DOCUMENT = "document"
     QUERY = "query"
\ No newline at end of file
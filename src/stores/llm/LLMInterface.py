@@ -23,11 +23,22 @@ class LLMInterface(ABC):
                     chat_history : list =[],max_output_token: int = None , temperature : float = None):
         pass
 
+    # Generating text from query as an async stream of the text pieces as soon as the LLM sends them
+    @abstractmethod
+    async def generate_text_stream(self , prompt : str ,
+                    chat_history : list = None , max_output_tokens : int = None , temperature : float = None):
+        pass
+
     # getting text embeddings
     @abstractmethod
     def embed_text(self , text:str, document_type : str = None):
         pass
 
+    # getting text embeddings without blocking the event loop
+    @abstractmethod
+    async def embed_text_async(self , text:str, document_type : str = None):
+        pass
+
     # Construction the prompt
     @abstractmethod
     def construct_prompt(self , prompt : str , role : str):
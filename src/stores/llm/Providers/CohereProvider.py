@@ -29,6 +29,7 @@ class CoHereProvider(LLMInterface):
         self.embedding_size = None
 
         self.client = cohere.Client(api_key = self.api_key)
+        self.async_client = cohere.AsyncClient(api_key = self.api_key)
         self.enums = CoHereEnums
 
         self.logger = logging.getLogger(__name__)
@@ -90,6 +91,36 @@ class CoHereProvider(LLMInterface):
         # Now if the response validated return its content
         return response.text
     
+    # This function is to generate text from the LLM as a stream , the text pieces are yielded as soon as they arrive
+    async def generate_text_stream(self , prompt : str ,
+                    chat_history : list = None , max_output_tokens : int = None , temperature : float = None):
+
+        # Validate the async client was set
+        if not self.async_client:
+            self.logger.error("CoHere async client wasn't set.")
+            return
+
+        # Validate generation model was set
+        if not self.generation_model_id:
+            self.logger.error("Generation model for CoHere wasn't set")
+            return
+
+        # Checking if there's max output tokens and temperature given or not , if not set them with their default values
+        max_output_tokens = max_output_tokens if max_output_tokens else self.default_generation_max_output_tokens
+        temperature = temperature if temperature else self.default_generation_temperature
+
+        # Asking the LLM for a streamed response
+        stream = self.async_client.chat_stream(model = self.generation_model_id ,
+                                               chat_history = chat_history if chat_history is not None else [] ,
+                                               message = prompt,
+                                               temperature = temperature,
+                                               max_tokens = max_output_tokens)
+
+        # Only the text generation events carry the answer , the others are the stream start and end
+        async for event in stream:
+            if event.event_type == CoHereEnums.TEXT_GENERATION_EVENT.value and event.text:
+                yield event.text
+
     # This function is to get text embeddings
     def embed_text(self , text: Union[str,List[str]], document_type : str = None):
         
@@ -125,5 +156,43 @@ class CoHereProvider(LLMInterface):
             self.logger.error("Error while embedding text with cohere")
             return None
         
+        # Return the embeddings if the response is validated
+        return [f for f in response.embeddings.float]
+
+    # This function is to get text embeddings using the async client so the event loop isn't blocked
+    async def embed_text_async(self , text: Union[str,List[str]], document_type : str = None):
+
+        # Making sure the text is string , it it's append it to a list
+        if isinstance(text , str):
+            text = [text]
+
+        # Validate the CoHere async client was set
+        if not self.async_client:
+            self.logger.error("CoHere async client wasn't set.")
+            return None
+
+        # Validate the embedding model client was set
+        if not self.embedding_model_id:
+            self.logger.error("Embedding model for CoHere wasn't set")
+            return None
+
+        # Validate the input type given to the model , if it's query , if it's not then it's a document
+        input_type = CoHereEnums.DOCUMENT.value
+        if document_type == DocumentTypeEnums.QUERY.value:
+            input_type = CoHereEnums.QUERY.value
+
+        # Get the embedding from the LLM by awaiting the async client with the text
+        response = await self.async_client.embed(
+            model=self.embedding_model_id,
+            texts=[self.process_text(t) for t in text],
+            input_type=input_type,
+            embedding_types=['float']
+        )
+
+        # Validate response in some aspects
+        if not response or not response.embeddings or not response.embeddings.float:
+            self.logger.error("Error while embedding text with cohere")
+            return None
+
         # Return the embeddings if the response is validated
         return [f for f in response.embeddings.float]
\ No newline at end of file
@@ -3,7 +3,7 @@
 # Importing the LLMInterface to implement
 from ..LLMInterface import LLMInterface
 
-from openai import OpenAI
+from openai import OpenAI , AsyncOpenAI
 import logging
 from ..LLMEnum import OpenAIEnums
 from typing import List , Union
@@ -30,6 +30,7 @@ class OpenAIProvider(LLMInterface):
         self.embedding_size = None
 
         self.client = OpenAI(api_key = self.api_key , base_url = self.api_url)
+        self.async_client = AsyncOpenAI(api_key = self.api_key , base_url = self.api_url)
         self.enums = OpenAIEnums
 
         self.logger = logging.getLogger(__name__)
@@ -96,6 +97,46 @@ class OpenAIProvider(LLMInterface):
         return response.choices[0].message["content"]
         
     
+    # This function is to generate text from the LLM as a stream , the text pieces are yielded as soon as they arrive
+    async def generate_text_stream(self , prompt : str ,
+                    chat_history : list = None , max_output_tokens : int = None , temperature : float = None):
+
+        # Validate the async client was set
+        if not self.async_client:
+            self.logger.error("OpenAI async client wasn't set.")
+            return
+
+        # Validate generation model was set
+        if not self.generation_model_id:
+            self.logger.error("Generation model for OpenAI wasn't set")
+            return
+
+        # Checking if there's max output tokens and temperature given or not , if not set them with their default values
+        max_output_tokens = max_output_tokens if max_output_tokens else self.default_generation_max_output_tokens
+        temperature = temperature if temperature else self.default_generation_temperature
+
+        # Constructing the chat history to give it to the model with the context
+        chat_history = chat_history if chat_history is not None else []
+        chat_history.append(self.construct_prompt(prompt = prompt , role = OpenAIEnums.USER.value))
+
+        # Asking the LLM for a streamed response
+        stream = await self.async_client.chat.completions.create(
+            model = self.generation_model_id,
+            messages = chat_history,
+            max_tokens = max_output_tokens,
+            temperature = temperature,
+            stream = True
+        )
+
+        # Yielding the content of every chunk , the last chunks may carry no content
+        async for chunk in stream:
+            if not chunk.choices:
+                continue
+
+            delta = chunk.choices[0].delta.content
+            if delta:
+                yield delta
+
     # This function is to get text embeddings
     def embed_text(self , text: Union[str , List[str]], document_type : str = None):
         
@@ -124,5 +165,36 @@ class OpenAIProvider(LLMInterface):
             self.logger.error("Error while embedding text with OpenAI.")
             return None
         
+        # Return the embeddings if the response is validated
+        return [record.embedding for record in response.data]
+
+    # This function is to get text embeddings using the async client so the event loop isn't blocked
+    async def embed_text_async(self , text: Union[str , List[str]], document_type : str = None):
+
+        # Making sure the text is string , it it's append it to a list
+        if isinstance(text,str):
+            text = [text]
+
+        # Validate the OpenAI async client was set
+        if not self.async_client:
+            self.logger.error("OpenAI async client wasn't set.")
+            return None
+
+        # Validate the embedding model client was set
+        if not self.embedding_model_id:
+            self.logger.error("Embedding model for OpenAI wasn't set")
+            return None
+
+        # Get the embedding from the LLM by awaiting the async client with the text
+        response = await self.async_client.embeddings.create(
+            model = self.embedding_model_id,
+            input = text
+        )
+
+        # Validate response in some aspects
+        if not response or not response.data or len(response.data) ==0 or not response.data[0].embedding:
+            self.logger.error("Error while embedding text with OpenAI.")
+            return None
+
         # Return the embeddings if the response is validated
         return [record.embedding for record in response.data]
\ No newline at end of file
@@ -0,0 +1,13 @@
+# Setting all needed enums for the rerankers
+from enum import Enum
+
+class RerankerEnums(Enum):
+
+    # Scoring the candidates by the words they share with the query , it needs no model and is the fallback
+    LEXICAL = "lexical"
+
+    # Scoring the candidates with the rerank endpoint of Cohere
+    COHERE = "cohere"
+
+    # Scoring the candidates with a small cross encoder model on the CPU
+    CROSS_ENCODER = "cross_encoder"
@@ -0,0 +1,29 @@
+# Creating Interface to implement rerankers according to these function
+# to ensure all rerankers have the same behavior
+
+# Importing abstraction methods and the abc class for interfacing
+from abc import ABC ,abstractmethod
+from typing import List
+
+class RerankerInterface(ABC):
+
+    # Setting all functions as abstraction_method
+
+    # Scoring how relevant every text is to the query , it returns one score per text in the same order
+    # A higher score is more relevant , the scores are only compared between the texts of the same call
+    @abstractmethod
+    async def score(self , query : str , texts : List[str]) -> List[float]:
+        pass
+
+    # Loading what the reranker needs before the first request , like its model , nothing by default
+    async def warm_up(self):
+        pass
+
+    # Releasing the workers of the reranker when the application stops , nothing by default
+    def close(self):
+        pass
+
+
+# Error raised by a reranker that has no free worker for a request , the request is scored by the fallback
+class RerankerBusyError(Exception):
+    pass
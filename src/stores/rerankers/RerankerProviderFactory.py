@@ -0,0 +1,30 @@
+# Creating a factory to handle the rerankers
+
+# Importing reranker enums and all providers we have to switch from
+from .RerankerEnums import RerankerEnums
+from .providers import LexicalReranker , CohereReranker , CrossEncoderReranker
+
+# Create a Reranker Provider Factory Class to handle which reranker we will use
+class RerankerProviderFactory:
+
+    # Construct the class with setting configurations and giving it to the class
+    def __init__(self , config):
+        self.config = config
+
+    # Now selecting which reranker according to the environment variable
+    def create(self , provider : str):
+
+        if provider == RerankerEnums.LEXICAL.value:
+            return LexicalReranker()
+
+        if provider == RerankerEnums.COHERE.value:
+            return CohereReranker(api_key = self.config.COHERE_API_KEY ,
+                                  model_id = self.config.RERANKER_COHERE_MODEL_ID)
+
+        if provider == RerankerEnums.CROSS_ENCODER.value:
+            return CrossEncoderReranker(model_id = self.config.RERANKER_CROSS_ENCODER_MODEL_ID ,
+                                        max_length = self.config.RERANKER_CROSS_ENCODER_MAX_LENGTH ,
+                                        workers = self.config.RERANKER_CROSS_ENCODER_WORKERS)
+
+        # if provider isn't supported , return None
+        return None
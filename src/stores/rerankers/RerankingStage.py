@@ -0,0 +1,78 @@
+# The reranking stage between the search and the prompt , the search over-fetches candidates
+# and the stage keeps the few that the reranker finds the most relevant to the query
+# The reranker gets a hard time budget , when it runs out , fails or has no free worker the candidates are scored by the lexical fallback
+from .RerankerInterface import RerankerInterface , RerankerBusyError
+from .providers import LexicalReranker
+from models.db_schemas import RetrievedDocument
+from typing import List
+import asyncio
+import logging
+import time
+
+
+class RerankingStage:
+
+    def __init__(self , reranker : RerankerInterface , candidates_factor : int = 4 , max_candidates : int = 50 ,
+                 timeout_ms : int = 300):
+
+        self.reranker = reranker
+        self.fallback = reranker if isinstance(reranker , LexicalReranker) else LexicalReranker()
+        self.candidates_factor = max(1 , int(candidates_factor))
+        self.max_candidates = max_candidates
+        self.timeout_ms = timeout_ms
+
+        self.logger = logging.getLogger('uvicorn.error')
+
+    # How many candidates the search fetches to keep the top k of them
+    def get_candidates_count(self , top_k : int):
+
+        candidates = int(top_k) * self.candidates_factor
+        if self.max_candidates:
+            candidates = min(candidates , self.max_candidates)
+
+        return max(int(top_k) , candidates)
+
+    # Loading the reranker before the first request and releasing it when the application stops
+    async def warm_up(self):
+        await self.reranker.warm_up()
+
+    def close(self):
+        self.reranker.close()
+
+    # Scoring the candidates with the reranker within the time budget , with the lexical fallback otherwise
+    # It returns the scores and the name of the scorer that made them
+    async def score(self , query : str , texts : List[str]):
+
+        try:
+            scores = await asyncio.wait_for(self.reranker.score(query = query , texts = texts) ,
+                                            timeout = self.timeout_ms / 1000 if self.timeout_ms else None)
+            return scores , type(self.reranker).__name__
+
+        except asyncio.TimeoutError:
+            self.logger.warning(f"The reranker ran out of its {self.timeout_ms} ms budget , using the lexical fallback")
+        except RerankerBusyError as e:
+            self.logger.warning(f"{e} , using the lexical fallback")
+        except Exception as e:
+            self.logger.error(f"Error while reranking , using the lexical fallback : {e}")
+
+        return self.fallback.score_sync(query = query , texts = texts) , type(self.fallback).__name__
+
+    # Reranking the candidates and keeping the top k , the score of every kept document is its rerank score
+    # The candidates keep their search order when they tie
+    async def rerank(self , query : str , documents : List[RetrievedDocument] , top_k : int):
+
+        if not documents:
+            return documents
+
+        started_at = time.perf_counter()
+        scores , scorer = await self.score(query = query , texts = [ document.text for document in documents ])
+
+        ranked = sorted(range(len(documents)) , key = lambda i: scores[i] , reverse = True)[:int(top_k)]
+
+        self.logger.debug(f"Reranked {len(documents)} candidates to {len(ranked)} with {scorer} "
+                          f"in {(time.perf_counter() - started_at) * 1000:.1f} ms")
+
+        return [
+            documents[i].model_copy(update = {"score" : float(scores[i])})
+            for i in ranked
+        ]
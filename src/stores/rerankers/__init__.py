@@ -0,0 +1,4 @@
+from .RerankerProviderFactory import RerankerProviderFactory
+from .RerankerInterface import RerankerInterface , RerankerBusyError
+from .RerankerEnums import RerankerEnums
+from .RerankingStage import RerankingStage
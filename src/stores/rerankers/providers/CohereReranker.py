@@ -0,0 +1,32 @@
+# Scoring the candidates with the rerank endpoint of Cohere
+from ..RerankerInterface import RerankerInterface
+from typing import List
+import cohere
+
+
+class CohereReranker(RerankerInterface):
+
+    def __init__(self , api_key : str , model_id : str , max_chunks_per_doc : int = None):
+        self.model_id = model_id
+        self.max_chunks_per_doc = max_chunks_per_doc
+        self.async_client = cohere.AsyncClient(api_key = api_key)
+
+    async def score(self , query : str , texts : List[str]):
+
+        if not texts:
+            return []
+
+        response = await self.async_client.rerank(
+            model = self.model_id,
+            query = query,
+            documents = texts,
+            top_n = len(texts),
+            max_chunks_per_doc = self.max_chunks_per_doc
+        )
+
+        # The results are sorted by relevance , they're put back in the order of the texts
+        scores = [0.0] * len(texts)
+        for result in response.results:
+            scores[result.index] = result.relevance_score
+
+        return scores
@@ -0,0 +1,75 @@
+# Scoring the candidates with a small cross encoder model , the query and every candidate are read together by the model
+# It runs on the CPU in its own bounded pool of threads , sentence-transformers is only needed when this reranker is selected
+# A prediction that ran out of the time budget keeps its thread until it's over , so the requests that find every thread
+# busy are refused right away instead of queueing behind it
+from ..RerankerInterface import RerankerInterface , RerankerBusyError
+from concurrent.futures import ThreadPoolExecutor
+from typing import List
+import asyncio
+import logging
+import threading
+
+
+class CrossEncoderReranker(RerankerInterface):
+
+    # The loaded models by model ID and max length , shared by all the requests and loaded once under the lock
+    models = {}
+    models_lock = threading.Lock()
+
+    def __init__(self , model_id : str , max_length : int = 512 , batch_size : int = 32 , workers : int = 1):
+        self.model_id = model_id
+        self.max_length = max_length
+        self.batch_size = batch_size
+        self.workers = max(1 , int(workers))
+
+        # The threads of the predictions and a slot per thread , a slot is freed when its prediction is over
+        self.executor = ThreadPoolExecutor(max_workers = self.workers , thread_name_prefix = "cross-encoder")
+        self.slots = threading.BoundedSemaphore(self.workers)
+
+        self.logger = logging.getLogger('uvicorn.error')
+
+    # Loading the model once per model ID , the concurrent first requests wait for the same load
+    @classmethod
+    def load_model(cls , model_id : str , max_length : int):
+
+        with cls.models_lock:
+            if (model_id , max_length) not in cls.models:
+                from sentence_transformers import CrossEncoder
+                cls.models[(model_id , max_length)] = CrossEncoder(model_id , max_length = max_length , device = "cpu")
+
+            return cls.models[(model_id , max_length)]
+
+    # Loading the model at startup , a model that can't be loaded leaves the requests to the fallback
+    async def warm_up(self):
+        try:
+            await asyncio.get_running_loop().run_in_executor(self.executor , self.load_model , self.model_id , self.max_length)
+        except Exception as e:
+            self.logger.error(f"Couldn't load the cross encoder {self.model_id} : {e}")
+
+    def score_sync(self , query : str , texts : List[str]):
+
+        model = self.load_model(model_id = self.model_id , max_length = self.max_length)
+        scores = model.predict([ (query , text) for text in texts ] , batch_size = self.batch_size ,
+                               show_progress_bar = False)
+
+        return [ float(score) for score in scores ]
+
+    async def score(self , query : str , texts : List[str]):
+
+        if not texts:
+            return []
+
+        if not self.slots.acquire(blocking = False):
+            raise RerankerBusyError(f"All the {self.workers} cross encoder workers are busy")
+
+        try:
+            future = self.executor.submit(self.score_sync , query , texts)
+        except Exception:
+            self.slots.release()
+            raise
+
+        future.add_done_callback(lambda _ : self.slots.release())
+        return await asyncio.wrap_future(future)
+
+    def close(self):
+        self.executor.shutdown(wait = False , cancel_futures = True)
@@ -0,0 +1,55 @@
+# Scoring the candidates with BM25 computed over the candidates themselves
+# The document frequencies come from the candidates so no index is needed , it's cheap enough to be the fallback
+from ..RerankerInterface import RerankerInterface
+from typing import List
+import math
+import re
+
+
+# The words of a text , lower cased
+WORD_PATTERN = re.compile(r"\w+" , re.UNICODE)
+
+
+class LexicalReranker(RerankerInterface):
+
+    def __init__(self , k1 : float = 1.2 , b : float = 0.75):
+        self.k1 = k1
+        self.b = b
+
+    # Splitting a text into its lower cased words
+    @staticmethod
+    def tokenize(text : str):
+        return WORD_PATTERN.findall(text.lower())
+
+    def score_sync(self , query : str , texts : List[str]):
+
+        query_terms = set(self.tokenize(query))
+        documents = [ self.tokenize(text) for text in texts ]
+        if not query_terms or not documents:
+            return [0.0] * len(texts)
+
+        # The inverse document frequency of every query term among the candidates
+        documents_count = len(documents)
+        average_length = sum(len(document) for document in documents) / documents_count or 1.0
+        idf = {}
+        for term in query_terms:
+            frequency = sum(1 for document in documents if term in document)
+            idf[term] = math.log(1 + (documents_count - frequency + 0.5) / (frequency + 0.5))
+
+        scores = []
+        for document in documents:
+            counts = {}
+            for word in document:
+                if word in query_terms:
+                    counts[word] = counts.get(word , 0) + 1
+
+            normalization = self.k1 * (1 - self.b + self.b * len(document) / average_length)
+            scores.append(sum(
+                idf[term] * count * (self.k1 + 1) / (count + normalization)
+                for term , count in counts.items()
+            ))
+
+        return scores
+
+    async def score(self , query : str , texts : List[str]):
+        return self.score_sync(query = query , texts = texts)
@@ -0,0 +1,3 @@
+from .LexicalReranker import LexicalReranker
+from .CohereReranker import CohereReranker
+from .CrossEncoderReranker import CrossEncoderReranker
@@ -15,12 +15,40 @@ class PgVectorTableSchemeEnums(Enum):
     VECTOR = "vector"
     CHUNK_ID = "chunk_id"
     METADATA = "metadata"
+    TEXT_SEARCH_VECTOR = "text_tsv"
     _PREFIX = "pgvector"
 
 class PgVectorDistanceMethonEnums(Enum):
     COSINE = "vector_cosine_ops"
     DOT = "vector_l2_ops"
 
+class PgVectorDistanceOperatorEnums(Enum):
+    COSINE = "<=>"
+    DOT = "<->"
+
 class PgVectorIndexTypeEnums(Enum):
     HNSW = "hnsw"
-    IVFFLAT = "ivfflat"
\ No newline at end of file
+    IVFFLAT = "ivfflat"
+
+class PgVectorIngestModeEnums(Enum):
+    COPY = "copy"
+    INSERT = "insert"
+
+class PgVectorIndexStatusEnums(Enum):
+    NOT_BUILT = "not_built"
+    PENDING = "pending"
+    BUILDING = "building"
+    READY = "ready"
+    SKIPPED = "skipped"
+    FAILED = "failed"
+    CANCELLED = "cancelled"
+
+class SearchAccuracyEnums(Enum):
+    FAST = "fast"
+    BALANCED = "balanced"
+    EXACT = "exact"
+
+class SearchModeEnums(Enum):
+    VECTOR = "vector"
+    LEXICAL = "lexical"
+    HYBRID = "hybrid"
\ No newline at end of file
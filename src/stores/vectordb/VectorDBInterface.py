@@ -61,8 +61,40 @@ class VectorDBinterface(ABC):
                            batch_size : int = 50):
         pass
     
-    # A function to search by a vector
+    # A function to delete the records of the given IDs , the chunks that vanished from a re-processed file
     @abstractmethod
-    def search_by_vector(self , collection_name : str , vector : list , limit : int):
+    def delete_by_record_ids(self , collection_name : str , record_ids : list):
         pass
 
+    # A function to get which of the given record IDs are stored in the collection , the chunks missing from it are indexed
+    @abstractmethod
+    def get_existing_record_ids(self , collection_name : str , record_ids : list):
+        pass
+
+    # A function to build the collection index after a bulk load without blocking the ingestion
+    @abstractmethod
+    def schedule_index_build(self , collection_name : str , index_params : dict = None):
+        pass
+
+    # A function to search by a vector , the filters scope the search to some assets , chunks or metadata values
+    @abstractmethod
+    def search_by_vector(self , collection_name : str , vector : list , limit : int , accuracy : str = None ,
+                         filters : dict = None):
+        pass
+
+    # A function to search by many vectors at once , it returns the documents of every vector in the same order
+    @abstractmethod
+    def search_by_vectors(self , collection_name : str , vectors : list , limit : int , accuracy : str = None ,
+                          filters : dict = None):
+        pass
+
+    # A function to search by the words of a text with the full text search
+    @abstractmethod
+    def search_by_text(self , collection_name : str , text : str , limit : int , filters : dict = None):
+        pass
+
+    # A function to search by a vector and by the words of its text and fuse both rankings
+    @abstractmethod
+    def search_hybrid(self , collection_name : str , vector : list , text : str , limit : int , accuracy : str = None ,
+                      filters : dict = None):
+        pass
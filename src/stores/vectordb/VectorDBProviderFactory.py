@@ -3,6 +3,7 @@
 # Importing VectorDBEnums enums and all providers we have to switch from
 from .providers import QdrantDBProvider , PGVectorProvider
 from .VectorDBEnums import VectorDBEnums
+from .providers.PGVectorIndexManager import PgVectorIndexParams
 from controllers.BaseController import BaseController
 from sqlalchemy.orm import sessionmaker
 
@@ -29,6 +30,7 @@ class VectorDBProviderFactory:
                 distance_method=self.config.VECTOR_DB_DISTANCE_METHOD,
                 default_vector_size=self.config.EMBEDDING_MODEL_SIZE,
                 index_threshold=self.config.VECTOR_DB_PGVEC_INDEX_THRESHOLD,
+                default_search_accuracy=self.config.VECTOR_DB_DEFAULT_SEARCH_ACCURACY,
             )
         
         # If it's PGVector , return PGVectorProvider
@@ -38,6 +40,19 @@ class VectorDBProviderFactory:
                 distance_method=self.config.VECTOR_DB_DISTANCE_METHOD,
                 default_vector_size=self.config.EMBEDDING_MODEL_SIZE,
                 index_threshold=self.config.VECTOR_DB_PGVEC_INDEX_THRESHOLD,
+                ingest_mode=self.config.VECTOR_DB_PGVEC_INGEST_MODE,
+                index_params=PgVectorIndexParams(
+                    index_type=self.config.VECTOR_DB_PGVEC_INDEX_TYPE,
+                    m=self.config.VECTOR_DB_PGVEC_HNSW_M,
+                    ef_construction=self.config.VECTOR_DB_PGVEC_HNSW_EF_CONSTRUCTION,
+                    lists=self.config.VECTOR_DB_PGVEC_IVFFLAT_LISTS,
+                    maintenance_work_mem=self.config.VECTOR_DB_PGVEC_MAINTENANCE_WORK_MEM,
+                ),
+                default_search_accuracy=self.config.VECTOR_DB_DEFAULT_SEARCH_ACCURACY,
+                text_search_config=self.config.VECTOR_DB_PGVEC_TEXT_SEARCH_CONFIG,
+                rrf_k=self.config.VECTOR_DB_HYBRID_RRF_K,
+                hybrid_candidates_factor=self.config.VECTOR_DB_HYBRID_CANDIDATES_FACTOR,
+                hybrid_lexical_timeout_ms=self.config.VECTOR_DB_HYBRID_LEXICAL_TIMEOUT_MS,
                 )
             
         # if provider isn't supported , return None
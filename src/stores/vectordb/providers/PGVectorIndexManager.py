@@ -0,0 +1,247 @@
+# Setting the PGVector Index Manager , it builds the vector indexes of the pgvector collections
+# in the background after the bulk loads finish instead of inside the insert transactions
+
+from ..VectorDBEnums import PgVectorIndexTypeEnums , PgVectorTableSchemeEnums , PgVectorIndexStatusEnums
+from sqlalchemy.sql import text as sql_text
+from dataclasses import dataclass , asdict , replace
+from datetime import datetime , timezone
+import asyncio
+import logging
+import re
+
+# The maintenance_work_mem values accepted , like 512MB or 2GB
+MEMORY_SETTING_PATTERN = re.compile(r"^\d+\s*(kB|MB|GB)?$")
+
+# Parameters used to build the index of a collection
+@dataclass
+class PgVectorIndexParams:
+    index_type : str = PgVectorIndexTypeEnums.HNSW.value
+    m : int = 16
+    ef_construction : int = 64
+    lists : int = None
+    maintenance_work_mem : str = None
+
+
+class PGVectorIndexManager:
+
+    # Construct the class and give it all parameters needed
+    def __init__(self , db_client , distance_method : str , index_threshold : int = 100 ,
+                 default_params : PgVectorIndexParams = None):
+
+        self.db_client = db_client
+        self.distance_method = distance_method
+        self.index_threshold = index_threshold
+        self.default_params = default_params or PgVectorIndexParams()
+
+        # Per collection overrides of the index parameters
+        self.collection_params = {}
+
+        # The running build tasks and the last known build status for every collection
+        self.build_tasks = {}
+        self.build_status = {}
+
+        self.logger = logging.getLogger("uvicorn")
+
+    # The name of the vector index of a collection
+    def index_name(self , collection_name : str):
+        return f"{collection_name}_vector_idx"
+
+    # A function to tune the index parameters of a single collection
+    def configure(self , collection_name : str , **params):
+
+        # Ignoring the parameters that weren't given
+        params = {key : value for key , value in params.items() if value is not None}
+
+        # Validating the memory setting because it's inlined in the SET statement
+        maintenance_work_mem = params.get("maintenance_work_mem")
+        if maintenance_work_mem and not MEMORY_SETTING_PATTERN.match(str(maintenance_work_mem)):
+            raise ValueError(f"Invalid maintenance_work_mem value : {maintenance_work_mem}")
+
+        self.collection_params[collection_name] = replace(self.get_params(collection_name = collection_name) , **params)
+        return self.collection_params[collection_name]
+
+    # A function to get the index parameters of a collection
+    def get_params(self , collection_name : str):
+        return self.collection_params.get(collection_name , self.default_params)
+
+    # A function to set the build status of a collection
+    def set_status(self , collection_name : str , status : str , **extra):
+        current = self.build_status.get(collection_name , {})
+        current.update({"status" : status , **extra})
+        self.build_status[collection_name] = current
+
+    # A function to start building the index of a collection in the background
+    # It returns directly so the ingestion never waits for the index build
+    def schedule_build(self , collection_name : str):
+
+        # If there's a build running already for this collection we leave it
+        task = self.build_tasks.get(collection_name)
+        if task and not task.done():
+            return False
+
+        self.set_status(collection_name , PgVectorIndexStatusEnums.PENDING.value ,
+                        scheduled_at = datetime.now(timezone.utc).isoformat())
+
+        task = asyncio.create_task(self.build(collection_name = collection_name))
+        self.build_tasks[collection_name] = task
+        task.add_done_callback(lambda _ : self.build_tasks.pop(collection_name , None))
+        return True
+
+    # A function to cancel a running build , used before dropping a collection
+    async def cancel_build(self , collection_name : str):
+
+        task = self.build_tasks.pop(collection_name , None)
+        if task and not task.done():
+            task.cancel()
+            await asyncio.gather(task , return_exceptions = True)
+
+        self.build_status.pop(collection_name , None)
+        self.collection_params.pop(collection_name , None)
+
+    # A function to get the index row of a collection from the catalog with its validity flag
+    async def get_index_record(self , connection , collection_name : str):
+
+        index_sql = sql_text("""
+                             SELECT i.indisvalid AS is_valid , i.indisready AS is_ready
+                             FROM pg_index i JOIN pg_class c ON c.oid = i.indexrelid
+                             WHERE c.relname = :index_name
+                             """)
+        result = await connection.execute(index_sql , {"index_name" : self.index_name(collection_name = collection_name)})
+        return result.fetchone()
+
+    # A function to build the "CREATE INDEX" statement with the parameters of the collection
+    def build_index_sql(self , collection_name : str , params : PgVectorIndexParams , records_count : int):
+
+        index_name = self.index_name(collection_name = collection_name)
+
+        # HNSW takes the graph parameters , IVFFlat takes the number of lists
+        if params.index_type == PgVectorIndexTypeEnums.IVFFLAT.value:
+            lists = int(params.lists or max(10 , records_count // 1000))
+            with_sql = f"WITH (lists = {lists})"
+        else:
+            with_sql = f"WITH (m = {int(params.m)} , ef_construction = {int(params.ef_construction)})"
+
+        return (
+            f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {index_name} ON {collection_name} "
+            f"USING {params.index_type} ({PgVectorTableSchemeEnums.VECTOR.value} {self.distance_method}) "
+            f"{with_sql}"
+        )
+
+    # A function to build the index of a collection with CREATE INDEX CONCURRENTLY
+    # The statement can't run inside a transaction so it runs on an autocommit connection
+    async def build(self , collection_name : str):
+
+        params = self.get_params(collection_name = collection_name)
+
+        # Getting the engine the sessions are bound to , to open an autocommit connection on it
+        async with self.db_client() as session:
+            engine = session.bind
+
+        try:
+            async with engine.connect() as connection:
+                connection = await connection.execution_options(isolation_level = "AUTOCOMMIT")
+
+                # Checking that the collection is large enough to need an index
+                count_sql = sql_text(f"SELECT COUNT (*) FROM {collection_name}")
+                records_count = (await connection.execute(count_sql)).scalar_one()
+
+                if records_count < self.index_threshold:
+                    self.set_status(collection_name , PgVectorIndexStatusEnums.SKIPPED.value ,
+                                    records_count = records_count)
+                    return False
+
+                # A failed concurrent build leaves an invalid index behind , we drop it to build it again
+                index_record = await self.get_index_record(connection = connection , collection_name = collection_name)
+                if index_record is not None and index_record.is_valid:
+                    self.set_status(collection_name , PgVectorIndexStatusEnums.READY.value ,
+                                    records_count = records_count)
+                    return False
+
+                if index_record is not None:
+                    await connection.execute(sql_text(
+                        f"DROP INDEX CONCURRENTLY IF EXISTS {self.index_name(collection_name = collection_name)}"
+                    ))
+
+                self.set_status(collection_name , PgVectorIndexStatusEnums.BUILDING.value ,
+                                records_count = records_count ,
+                                params = asdict(params) ,
+                                started_at = datetime.now(timezone.utc).isoformat() ,
+                                error = None)
+
+                # Log a message that the index is being created
+                self.logger.info(f"START : Creating index vector for collection: {collection_name}")
+
+                # Giving the build more memory only for this connection
+                if params.maintenance_work_mem:
+                    await connection.execute(sql_text(f"SET maintenance_work_mem = '{params.maintenance_work_mem}'"))
+
+                try:
+                    await connection.execute(sql_text(self.build_index_sql(collection_name = collection_name ,
+                                                                           params = params ,
+                                                                           records_count = records_count)))
+                finally:
+                    if params.maintenance_work_mem:
+                        await connection.execute(sql_text("RESET maintenance_work_mem"))
+
+            self.set_status(collection_name , PgVectorIndexStatusEnums.READY.value ,
+                            finished_at = datetime.now(timezone.utc).isoformat())
+
+            # Log a message that the index has been created
+            self.logger.info(f"END : Created index vector for collection : {collection_name}")
+            return True
+
+        except asyncio.CancelledError:
+            self.set_status(collection_name , PgVectorIndexStatusEnums.CANCELLED.value)
+            raise
+
+        except Exception as e:
+            self.logger.error(f"Error while creating index for collection {collection_name} : {e}")
+            self.set_status(collection_name , PgVectorIndexStatusEnums.FAILED.value ,
+                            error = str(e) ,
+                            finished_at = datetime.now(timezone.utc).isoformat())
+            return False
+
+    # A function to get the index status of a collection , mixing the last known build status
+    # with what the catalog says and the progress of a build that's running right now
+    async def get_status(self , collection_name : str):
+
+        status = {
+            "index_name" : self.index_name(collection_name = collection_name),
+            "params" : asdict(self.get_params(collection_name = collection_name)),
+            **self.build_status.get(collection_name , {"status" : PgVectorIndexStatusEnums.NOT_BUILT.value}),
+        }
+
+        # Setting our vector database client as our session
+        async with self.db_client() as session:
+
+            # Begin the session execute queries
+            async with session.begin():
+
+                index_record = await self.get_index_record(connection = session , collection_name = collection_name)
+
+                if index_record is not None:
+                    status["is_valid"] = index_record.is_valid
+                    status["is_ready"] = index_record.is_ready
+
+                    # An index found valid in the catalog is ready even if it was built by another node
+                    if index_record.is_valid and status["status"] != PgVectorIndexStatusEnums.BUILDING.value:
+                        status["status"] = PgVectorIndexStatusEnums.READY.value
+
+                # Getting the progress of the build from postgres if it's running
+                progress_sql = sql_text("""
+                                        SELECT phase , blocks_done , blocks_total , tuples_done , tuples_total
+                                        FROM pg_stat_progress_create_index
+                                        WHERE relid = to_regclass(:collection_name)
+                                        """)
+                progress = (await session.execute(progress_sql , {"collection_name" : collection_name})).fetchone()
+
+                if progress is not None:
+                    status["progress"] = {
+                        "phase" : progress.phase,
+                        "blocks_done" : progress.blocks_done,
+                        "blocks_total" : progress.blocks_total,
+                        "tuples_done" : progress.tuples_done,
+                        "tuples_total" : progress.tuples_total,
+                    }
+
+        return status
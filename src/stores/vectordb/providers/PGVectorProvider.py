@@ -3,33 +3,114 @@
 # Importing the VectorDBInterface to implement
 from ..VectorDBInterface import VectorDBinterface
 
-from ..VectorDBEnums import PgVectorDistanceMethonEnums , PgVectorIndexTypeEnums , PgVectorTableSchemeEnums , DistanceMethodEnums
+from ..VectorDBEnums import PgVectorDistanceMethonEnums , PgVectorIndexTypeEnums , PgVectorTableSchemeEnums , DistanceMethodEnums , PgVectorIngestModeEnums
+from ..VectorDBEnums import PgVectorDistanceOperatorEnums , SearchAccuracyEnums
 import logging
 from typing import List
 from models.db_schemas import RetrievedDocument
 from sqlalchemy.sql import text as sql_text
 import json
+from .PGVectorIndexManager import PGVectorIndexManager , PgVectorIndexParams
+from ..rank_fusion import reciprocal_rank_fusion
+import asyncio
+import re
+import struct
+import time
+import weakref
+
+
+# Encoding a vector in the pgvector binary format , the dimensions then an unused short then big endian float4 values
+# Text literals like "[1,2,3]" are accepted too so the string parameters of the other queries keep working
+def encode_vector_binary(value):
+    if isinstance(value , str):
+        value = json.loads(value)
+    return struct.pack(f">HH{len(value)}f" , len(value) , 0 , *value)
+
+# Decoding a vector from the pgvector binary format into a list of floats
+def decode_vector_binary(data):
+    dimensions , _ = struct.unpack_from(">HH" , data)
+    return list(struct.unpack_from(f">{dimensions}f" , data , 4))
+
+# The query time tuning of every search accuracy profile
+SEARCH_ACCURACY_PROFILES = {
+    SearchAccuracyEnums.FAST.value : {"exact" : False , "ef_search" : 20 , "probes" : 1},
+    SearchAccuracyEnums.BALANCED.value : {"exact" : False , "ef_search" : 100 , "probes" : 10},
+    SearchAccuracyEnums.EXACT.value : {"exact" : True},
+}
+
+# The range operators of the metadata filters and their jsonpath comparisons
+RANGE_FILTER_OPERATORS = {"gt" : ">" , "gte" : ">=" , "lt" : "<" , "lte" : "<="}
 
 # Creating the class PGVectorDBProvider that implements the VectorDBInterface , with inheriting from it
 class PGVectorProvider(VectorDBinterface):
 
     # Construct the class and give it all parameters needed
-    def __init__(self, db_client, default_vector_size : int = 786 , distance_method : str = None,index_threshold : int = 100):
+    def __init__(self, db_client, default_vector_size : int = 786 , distance_method : str = None,index_threshold : int = 100,
+                 ingest_mode : str = PgVectorIngestModeEnums.COPY.value,
+                 index_params : PgVectorIndexParams = None,
+                 default_search_accuracy : str = SearchAccuracyEnums.BALANCED.value,
+                 text_search_config : str = "simple",
+                 rrf_k : int = 60,
+                 hybrid_candidates_factor : int = 2,
+                 hybrid_lexical_timeout_ms : int = 50):
         
         self.db_client = db_client
         self.default_vector_size = default_vector_size
         self.index_threshold = index_threshold
-
+        self.ingest_mode = ingest_mode
+
+        # The asyncpg connections that already have the binary vector codec registered
+        self.vector_codec_connections = weakref.WeakSet()
+
+        # The collections whose chunk IDs index was already checked
+        self.record_id_indexed_collections = set()
+
+        # The full text search of the hybrid search , the text search configuration of the lexical column ,
+        # the collections that already have the column and the ones whose GIN index was already checked
+        # The collections without the column are remembered for a while , the column is added to them by a migration
+        # that may run while this process is up so they're checked again once it's over
+        self.text_search_config = text_search_config
+        self.lexical_column_collections = set()
+        self.lexical_indexed_collections = set()
+        self.lexical_missing_collections = {}
+        self.lexical_missing_ttl_seconds = 60
+
+        # The collections whose metadata GIN index was already checked , the metadata filters use it
+        self.metadata_indexed_collections = set()
+
+        # Whether the vector extension can keep scanning the ANN index until enough rows pass the filters ,
+        # it's checked once on the first filtered search
+        self.iterative_scan_supported = None
+
+        # Every arm of the hybrid search fetches more candidates than the limit , the lexical arm gets a statement timeout
+        # and it's dropped if it times out , the vector arm has no timeout since the results are never lexical only
+        self.rrf_k = rrf_k
+        self.hybrid_candidates_factor = max(1 , int(hybrid_candidates_factor))
+        self.hybrid_lexical_timeout_ms = hybrid_lexical_timeout_ms
+
+        # Setting the operator class of the index and the distance operator that can use it
         if distance_method == DistanceMethodEnums.COSINE.value:
             distance_method = PgVectorDistanceMethonEnums.COSINE.value
+            distance_operator = PgVectorDistanceOperatorEnums.COSINE.value
         else:
             distance_method = PgVectorDistanceMethonEnums.DOT.value
+            distance_operator = PgVectorDistanceOperatorEnums.DOT.value
 
         self.distance_method = distance_method
+        self.distance_operator = distance_operator
+        self.default_search_accuracy = default_search_accuracy
 
         self.pgvector_table_prefix = PgVectorTableSchemeEnums._PREFIX.value
         self.default_index_name = lambda collection_name: f"{collection_name}_vector_idx"
 
+        # The index manager builds the vector indexes in the background after the loads
+        self.index_manager = PGVectorIndexManager(
+            db_client = self.db_client,
+            distance_method = self.distance_method,
+            index_threshold = self.index_threshold,
+            default_params = index_params
+        )
+
         self.logger = logging.getLogger("uvicorn")
 
 
@@ -132,12 +213,21 @@ class PGVectorProvider(VectorDBinterface):
                     "tableowner":table_info[2],
                     "tablespace":table_info[3],
                     "hasindexes":table_info[4]},
-                    "record_count" : record_count.scalar_one()
+                    "record_count" : record_count.scalar_one(),
+                    "index" : await self.index_manager.get_status(collection_name = collection_name)
                 }
 
     # A function to delete a collection from the vector database
     async def delete_collection(self, collection_name):
 
+        # Stopping any index build running on the collection first , it would hold a lock on the table
+        await self.index_manager.cancel_build(collection_name = collection_name)
+        self.record_id_indexed_collections.discard(collection_name)
+        self.lexical_column_collections.discard(collection_name)
+        self.lexical_indexed_collections.discard(collection_name)
+        self.lexical_missing_collections.pop(collection_name , None)
+        self.metadata_indexed_collections.discard(collection_name)
+
         # Setting our vector database client as our session
         async with self.db_client() as session:
 
@@ -182,15 +272,178 @@ class PGVectorProvider(VectorDBinterface):
                                           f"{PgVectorTableSchemeEnums.VECTOR.value} vector({embedding_size}), "
                                           f"{PgVectorTableSchemeEnums.METADATA.value} jsonb DEFAULT \'{{}}\', "
                                           f"{PgVectorTableSchemeEnums.CHUNK_ID.value} integer,"
+                                          f"{self.get_text_search_column_sql()}, "
                                           f"FOREIGN KEY ({PgVectorTableSchemeEnums.CHUNK_ID.value}) REFERENCES chunks(chunk_id)"
                                           ")")
                     
                     # Execute the queries and commit our changes
                     await session.execute(create_sql)
                     await session.commit()
+
+            # Indexing the chunk IDs so the records of the re-processed chunks are deleted without scanning the collection
+            await self.ensure_record_id_index(collection_name = collection_name)
+            await self.ensure_lexical_index(collection_name = collection_name)
+            await self.ensure_metadata_index(collection_name = collection_name)
             return True
         return False
 
+    # A function to create an index of a collection if it doesn't exist , the existing collections get it with
+    # CREATE INDEX CONCURRENTLY so neither their writes nor their searches are locked during the build
+    # The statement can't run inside a transaction so it runs on an autocommit connection like the vector index
+    async def create_index_concurrently(self , collection_name : str , index_name : str , index_definition : str):
+
+        # Getting the engine the sessions are bound to , to open an autocommit connection on it
+        async with self.db_client() as session:
+            engine = session.bind
+
+        async with engine.connect() as connection:
+            connection = await connection.execution_options(isolation_level = "AUTOCOMMIT")
+
+            # A failed concurrent build leaves an invalid index behind that IF NOT EXISTS would keep , we drop it to build it again
+            valid_sql = sql_text("""
+                                 SELECT i.indisvalid FROM pg_index i JOIN pg_class c ON c.oid = i.indexrelid
+                                 WHERE c.relname = :index_name
+                                 """)
+            is_valid = (await connection.execute(valid_sql , {"index_name" : index_name})).scalar_one_or_none()
+            if is_valid is False:
+                await connection.execute(sql_text(f"DROP INDEX CONCURRENTLY IF EXISTS {index_name}"))
+
+            await connection.execute(sql_text(
+                f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {index_name} ON {collection_name} {index_definition}"
+            ))
+
+    # A function to create the GIN index of the metadata if it doesn't exist , it's checked once per collection
+    # jsonb_path_ops only supports the containment and the jsonpath operators , it's smaller and faster for them
+    async def ensure_metadata_index(self , collection_name : str):
+
+        if collection_name in self.metadata_indexed_collections:
+            return
+
+        await self.create_index_concurrently(
+            collection_name = collection_name,
+            index_name = f"{collection_name}_{PgVectorTableSchemeEnums.METADATA.value}_idx",
+            index_definition = f"USING gin ({PgVectorTableSchemeEnums.METADATA.value} jsonb_path_ops)"
+        )
+
+        self.metadata_indexed_collections.add(collection_name)
+
+    # The definition of the lexical column , the tsvector of the text generated and stored by postgres on every write
+    def get_text_search_column_sql(self):
+        return (f"{PgVectorTableSchemeEnums.TEXT_SEARCH_VECTOR.value} tsvector GENERATED ALWAYS AS "
+                f"(to_tsvector('{self.text_search_config}'::regconfig, coalesce({PgVectorTableSchemeEnums.TEXT.value}, ''))) STORED")
+
+    # A function to create the GIN index of the lexical column if it doesn't exist , it's checked once per collection
+    # The column is never added here , adding a stored generated column rewrites the whole table under an exclusive lock
+    # The collections created before the hybrid search get it from the collection_lexical_column migration
+    async def ensure_lexical_index(self , collection_name : str):
+
+        if collection_name in self.lexical_indexed_collections:
+            return
+
+        if not await self.is_lexical_index_existed(collection_name = collection_name):
+            self.logger.warning(f"Collection {collection_name} has no lexical column , the database migrations need to run")
+            return
+
+        await self.create_index_concurrently(
+            collection_name = collection_name,
+            index_name = f"{collection_name}_{PgVectorTableSchemeEnums.TEXT_SEARCH_VECTOR.value}_idx",
+            index_definition = f"USING gin ({PgVectorTableSchemeEnums.TEXT_SEARCH_VECTOR.value})"
+        )
+
+        self.lexical_indexed_collections.add(collection_name)
+
+    # Checking if a collection has the lexical column , the collections that weren't indexed again since
+    # the hybrid search was added don't have it and are only searched by vector
+    async def is_lexical_index_existed(self , collection_name : str):
+
+        if collection_name in self.lexical_column_collections:
+            return True
+
+        checked_at = self.lexical_missing_collections.get(collection_name)
+        if checked_at is not None and time.monotonic() - checked_at < self.lexical_missing_ttl_seconds:
+            return False
+
+        # Setting our vector database client as our session
+        async with self.db_client() as session:
+
+            # Begin the session execute queries
+            async with session.begin():
+                results = await session.execute(sql_text(
+                    "SELECT 1 FROM information_schema.columns WHERE table_name = :collection_name AND column_name = :column_name"
+                ) , {"collection_name" : collection_name , "column_name" : PgVectorTableSchemeEnums.TEXT_SEARCH_VECTOR.value})
+                existed = bool(results.scalar_one_or_none())
+
+        if existed:
+            self.lexical_column_collections.add(collection_name)
+            self.lexical_missing_collections.pop(collection_name , None)
+        else:
+            self.lexical_missing_collections[collection_name] = time.monotonic()
+
+        return existed
+
+    # A function to create the index of the chunk IDs if it doesn't exist , it's checked once per collection
+    async def ensure_record_id_index(self , collection_name : str):
+
+        if collection_name in self.record_id_indexed_collections:
+            return
+
+        # Setting our vector database client as our session
+        async with self.db_client() as session:
+
+            # Begin the session execute queries
+            async with session.begin():
+                await session.execute(sql_text(
+                    f"CREATE INDEX IF NOT EXISTS {collection_name}_chunk_id_idx "
+                    f"ON {collection_name} ({PgVectorTableSchemeEnums.CHUNK_ID.value})"
+                ))
+
+        self.record_id_indexed_collections.add(collection_name)
+
+    # A function to delete the records of some chunks from the collection
+    # It has to run before the chunks are deleted since the records reference them
+    async def delete_by_record_ids(self , collection_name : str , record_ids : list):
+
+        # Nothing to delete if the collection doesn't exist yet
+        if not record_ids or not await self.is_collection_existed(collection_name = collection_name):
+            return 0
+
+        await self.ensure_record_id_index(collection_name = collection_name)
+
+        # Setting our vector database client as our session
+        async with self.db_client() as session:
+
+            # Begin the session execute queries
+            async with session.begin():
+
+                # Prepare the query that deletes every record of the given chunk IDs
+                delete_sql = sql_text(f"DELETE FROM {collection_name} "
+                                      f"WHERE {PgVectorTableSchemeEnums.CHUNK_ID.value} = ANY(:record_ids)")
+
+                result = await session.execute(delete_sql , {"record_ids" : list(record_ids)})
+
+        # Return how many records were deleted
+        return result.rowcount
+
+    # A function to get the chunk IDs among the given ones that have a record in the collection
+    async def get_existing_record_ids(self , collection_name : str , record_ids : list):
+
+        # Nothing is stored if the collection doesn't exist yet
+        if not record_ids or not await self.is_collection_existed(collection_name = collection_name):
+            return set()
+
+        await self.ensure_record_id_index(collection_name = collection_name)
+
+        # Setting our vector database client as our session
+        async with self.db_client() as session:
+
+            # Prepare the query that gets the chunk IDs found in the collection
+            select_sql = sql_text(f"SELECT DISTINCT {PgVectorTableSchemeEnums.CHUNK_ID.value} FROM {collection_name} "
+                                  f"WHERE {PgVectorTableSchemeEnums.CHUNK_ID.value} = ANY(:record_ids)")
+
+            result = await session.execute(select_sql , {"record_ids" : list(record_ids)})
+
+        return { row[0] for row in result.fetchall() }
+
     # Checking if there's andy index has been made to a specific table
     async def is_index_existed(self , collection_name : str):
 
@@ -215,55 +468,15 @@ class PGVectorProvider(VectorDBinterface):
                 return bool(results.scalar_one_or_none())
 
     # A function to create an index for a specific collection table
+    # The index is built with CREATE INDEX CONCURRENTLY by the index manager so the table stays writable
     async def create_vector_index(self ,collection_name:str,
-                                        index_type : str = PgVectorIndexTypeEnums.HNSW.value):
-        
-        # Checking first if the index existed or not
-        is_index_existed = await self.is_index_existed(collection_name=collection_name)
+                                        index_type : str = None):
 
-        # Return False if index already existed
-        if is_index_existed:
-            return False
-        
-        # Setting our vector database client as our session
-        async with self.db_client() as session:
+        # Setting the index type for this collection if it's given
+        if index_type:
+            self.index_manager.configure(collection_name = collection_name , index_type = index_type)
 
-            # Begin the session execute queries
-            async with session.begin():
-                
-                # Prepare the query that will be executed
-                count_sql = sql_text(f"SELECT COUNT (*) FROM {collection_name}")
-                
-                # Execute the query and return its result
-                result = await session.execute(count_sql)
-                
-                # Get the counts from that query
-                counts = result.scalar_one()
-
-                # Check if the counts is less than the index_threshould , because it's not necessary to
-                # implement the index if the number of rows is small and return false if it's less
-                # than the index
-                if counts < self.index_threshold:
-                    return False
-                
-                # After validation , now we're ready to create the index
-                # Log a message that the index is being created
-                self.logger.info(f"START : Creating index vector for collection: {collection_name}")
-
-                # Perpare the index name we want to make
-                index_name = self.default_index_name(collection_name=collection_name)
-
-                # Prepare the statement for creating that index and give it the index type
-                create_idx_sql = sql_text(
-                    f"CREATE INDEX {index_name} ON {collection_name} "
-                    f"USING {index_type} ({PgVectorTableSchemeEnums.VECTOR.value} {self.distance_method})"
-                    )
-                
-                # Execute the query that creates the index
-                await session.execute(create_idx_sql)
-
-                # Log a message that the index has been created
-                self.logger.info(f"END : Created index vector for collection : {collection_name}")
+        return await self.index_manager.build(collection_name = collection_name)
 
 
     # A function to reset vector index
@@ -272,6 +485,8 @@ class PGVectorProvider(VectorDBinterface):
         # Prepare the index name we want to update
         index_name = self.default_index_name(collection_name=collection_name)
 
+        # Stopping any running build of this index
+        await self.index_manager.cancel_build(collection_name = collection_name)
         
         # Setting our vector database client as our session
         async with self.db_client() as session:
@@ -286,7 +501,24 @@ class PGVectorProvider(VectorDBinterface):
                 await session.execute(drop_sql)
 
         # Creating the index again
-        return await self.create_vector_index(colleciton_name=collection_name,index_type=index_type)
+        return await self.create_vector_index(collection_name=collection_name,index_type=index_type)
+
+    # A function to build the collection index in the background after a bulk load has finished
+    # index_params can tune the index of this collection , like m , ef_construction and maintenance_work_mem
+    async def schedule_index_build(self , collection_name : str , index_params : dict = None):
+
+        if index_params:
+            self.index_manager.configure(collection_name = collection_name , **index_params)
+
+        # The GIN indexes of the lexical column of the hybrid search and of the metadata filters are built concurrently
+        # on the older collections once they're indexed again
+        try:
+            await self.ensure_lexical_index(collection_name = collection_name)
+            await self.ensure_metadata_index(collection_name = collection_name)
+        except Exception as e:
+            self.logger.error(f"Error while adding the search indexes to collection {collection_name} : {e}")
+
+        return self.index_manager.schedule_build(collection_name = collection_name)
 
 
     # A function to insert a record into the collection ( the table )
@@ -329,10 +561,7 @@ class PGVectorProvider(VectorDBinterface):
                     "chunk_id":record_id
                 })
                 # Commit the changes
-                session.commit()
-
-                # Checking if we can make an index now or not
-                await self.create_vector_index(colleciton_name=collection_name)
+                await session.commit()
         return True
     
     # A function to insert many records in the vector database
@@ -357,6 +586,13 @@ class PGVectorProvider(VectorDBinterface):
         if not metadata or len(metadata)==0:
             metadata = [None] * len(texts)
         
+        # Streaming the records with the binary COPY protocol if it's the selected ingest mode
+        if self.ingest_mode == PgVectorIngestModeEnums.COPY.value:
+            if not await self.bulk_ingest(collection_name = collection_name ,
+                                          records = zip(texts , vectors , metadata , record_ids)):
+                return False
+            return True
+
         # Setting our vector database client as our session
         async with self.db_client() as session:
 
@@ -393,13 +629,174 @@ class PGVectorProvider(VectorDBinterface):
                     # Execute the query to insert the data
                     await session.execute(batch_insert_sql,values)
 
-        # Create an index for this collection it there's not any and it's rows exceeds the threshold
-        await self.create_vector_index(collection_name=collection_name)
+        # The vector index isn't touched here , it's built once the whole load finishes with schedule_index_build
         return True
     
 
+    # A function to get the asyncpg connection behind the session with the binary vector codec registered on it
+    async def get_vector_driver_connection(self , session):
+
+        # Getting the raw asyncpg connection the session is using
+        connection = await session.connection()
+        raw_connection = await connection.get_raw_connection()
+        driver_connection = raw_connection.driver_connection
+
+        # Registering the codec once for every pooled connection
+        if driver_connection not in self.vector_codec_connections:
+            await driver_connection.set_type_codec(
+                "vector",
+                schema = "public",
+                encoder = encode_vector_binary,
+                decoder = decode_vector_binary,
+                format = "binary"
+            )
+            self.vector_codec_connections.add(driver_connection)
+
+        return driver_connection
+
+    # A function to turn the (text , vector , metadata , record_id) records into rows for the COPY protocol
+    # It's a generator so the rows are only built while asyncpg is writing them to the connection
+    def to_copy_rows(self , records):
+        for _text , _vector , _metadata , _record_id in records:
+            metadata_json = json.dumps(_metadata,ensure_ascii=False) if _metadata is not None else "{}"
+            yield (_text , _vector , metadata_json , _record_id)
+
+    # A function to turn an async stream of records into rows for the COPY protocol
+    async def to_copy_rows_async(self , records):
+        async for record in records:
+            for row in self.to_copy_rows([record]):
+                yield row
+
+    # A function to ingest records in bulk using the binary COPY protocol
+    # The records can be a list , a generator or an async generator of (text , vector , metadata , record_id) tuples
+    # asyncpg writes them to the connection in buffers while iterating , so millions of rows can be streamed
+    # through a single COPY with bounded memory
+    async def bulk_ingest(self , collection_name : str , records):
+
+        # Choosing the rows generator according to the records type
+        if hasattr(records , "__aiter__"):
+            rows = self.to_copy_rows_async(records)
+        else:
+            rows = self.to_copy_rows(records)
+
+        try:
+            # Setting our vector database client as our session
+            async with self.db_client() as session:
+
+                # Begin the session execute queries
+                async with session.begin():
+
+                    # Getting the asyncpg connection to copy the rows with
+                    driver_connection = await self.get_vector_driver_connection(session = session)
+
+                    # Copying the rows into the collection table
+                    await driver_connection.copy_records_to_table(
+                        collection_name,
+                        records = rows,
+                        columns = [
+                            PgVectorTableSchemeEnums.TEXT.value,
+                            PgVectorTableSchemeEnums.VECTOR.value,
+                            PgVectorTableSchemeEnums.METADATA.value,
+                            PgVectorTableSchemeEnums.CHUNK_ID.value,
+                        ]
+                    )
+        except Exception as e:
+            self.logger.error(f"Error while copying records into collection {collection_name} : {e}")
+            return False
+
+        return True
+
+    # A function to apply the accuracy profile of a search on the current transaction with SET LOCAL
+    # so the tuning only affects this query and the pooled connection goes back untouched
+    # A filtered search keeps scanning the index until enough rows pass the filters when the extension supports it
+    async def apply_search_profile(self , session , collection_name : str , limit : int , accuracy : str = None ,
+                                   filtered : bool = False):
+
+        profile = SEARCH_ACCURACY_PROFILES.get(accuracy or self.default_search_accuracy ,
+                                               SEARCH_ACCURACY_PROFILES[SearchAccuracyEnums.BALANCED.value])
+
+        # The exact profile skips the approximate index and compares the query with every vector
+        if profile["exact"]:
+            await session.execute(sql_text("SET LOCAL enable_indexscan = off"))
+            return
+
+        # The approximate search can't return more rows than the candidates list it explores
+        if self.index_manager.get_params(collection_name = collection_name).index_type == PgVectorIndexTypeEnums.IVFFLAT.value:
+            index_type = PgVectorIndexTypeEnums.IVFFLAT.value
+            await session.execute(sql_text(f"SET LOCAL ivfflat.probes = {int(profile['probes'])}"))
+        else:
+            index_type = PgVectorIndexTypeEnums.HNSW.value
+            ef_search = min(max(int(profile["ef_search"]) , int(limit)) , 1000)
+            await session.execute(sql_text(f"SET LOCAL hnsw.ef_search = {ef_search}"))
+
+        # Without the iterative scan the index returns its candidates once and the filters may leave fewer rows than the limit
+        if filtered and await self.is_iterative_scan_supported(session = session):
+            await session.execute(sql_text(f"SET LOCAL {index_type}.iterative_scan = relaxed_order"))
+
+    # Checking once if the vector extension has the iterative index scans , they came with pgvector 0.8.0
+    async def is_iterative_scan_supported(self , session):
+
+        if self.iterative_scan_supported is None:
+            result = await session.execute(sql_text("SELECT extversion FROM pg_extension WHERE extname = 'vector'"))
+            version = [ int(part) for part in re.findall(r"\d+" , result.scalar_one_or_none() or "0")[:2] ]
+            self.iterative_scan_supported = tuple(version) >= (0 , 8)
+
+        return self.iterative_scan_supported
+
+    # A function to turn the filters of a search into SQL predicates on the collection and their parameters
+    # The exact metadata values and the assets become jsonb containments that the GIN index of the metadata answers ,
+    # the chunk IDs use the btree index of the chunk IDs and the ranges are jsonpath predicates checked on the rows they let through
+    def build_filter_sql(self , filters : dict = None):
+
+        if not filters:
+            return None , {}
+
+        metadata_column = PgVectorTableSchemeEnums.METADATA.value
+        conditions , parameters = [] , {}
+
+        # The exact values are matched together in a single containment , with the asset when there's only one
+        contained = dict(filters.get("metadata") or {})
+        asset_ids = filters.get("asset_ids") or []
+        if len(asset_ids) == 1:
+            contained["asset_id"] = asset_ids[0]
+
+        if contained:
+            conditions.append(f"{metadata_column} @> CAST(:filter_metadata AS jsonb)")
+            parameters["filter_metadata"] = json.dumps(contained , ensure_ascii = False)
+
+        # Many assets are an OR of containments , the planner ORs their bitmap index scans
+        if len(asset_ids) > 1:
+            asset_conditions = []
+            for i , asset_id in enumerate(asset_ids):
+                asset_conditions.append(f"{metadata_column} @> CAST(:filter_asset_{i} AS jsonb)")
+                parameters[f"filter_asset_{i}"] = json.dumps({"asset_id" : asset_id})
+            conditions.append("(" + " OR ".join(asset_conditions) + ")")
+
+        if filters.get("chunk_ids"):
+            conditions.append(f"{PgVectorTableSchemeEnums.CHUNK_ID.value} = ANY(:filter_chunk_ids)")
+            parameters["filter_chunk_ids"] = list(filters["chunk_ids"])
+
+        # The bounds are passed as jsonpath variables , a value that isn't a number doesn't match instead of failing
+        for i , (key , bounds) in enumerate((filters.get("ranges") or {}).items()):
+            bounds = { name : value for name , value in (bounds or {}).items() if value is not None and name in RANGE_FILTER_OPERATORS }
+            if not bounds:
+                continue
+
+            predicates = " && ".join(f"@ {RANGE_FILTER_OPERATORS[name]} ${name}" for name in bounds)
+            conditions.append(f"jsonb_path_exists({metadata_column}, CAST(:filter_range_path_{i} AS jsonpath), "
+                              f"CAST(:filter_range_vars_{i} AS jsonb))")
+            parameters[f"filter_range_path_{i}"] = f'$."{key}" ? ({predicates})'
+            parameters[f"filter_range_vars_{i}"] = json.dumps(bounds)
+
+        if not conditions:
+            return None , {}
+
+        return " AND ".join(conditions) , parameters
+
     # A function to search in the vector database by the vector
-    async def  search_by_vector(self, collection_name, vector, limit):
+    # The rows are ordered by the raw distance operator of the index so the ANN index is used for the search
+    # The filters scope the search to some assets , chunks , metadata values or ranges of them
+    async def  search_by_vector(self, collection_name, vector, limit, accuracy : str = None , filters : dict = None):
         
         # Validating if the collection exists or not first
         if not await self.is_collection_existed(collection_name=collection_name):
@@ -417,24 +814,198 @@ class PGVectorProvider(VectorDBinterface):
             # Begin the session execute queries
             async with session.begin():
 
-                # Prepate the query that will search using the vector
-                search_sql = sql_text(f"SELECT {PgVectorTableSchemeEnums.TEXT.value} as text, 1 - ({PgVectorTableSchemeEnums.VECTOR.value} <=> :vector) as score "
-                                      f"FROM {collection_name} "
-                                      f"ORDER BY score DESC "
-                                      f"LIMIT {limit}"
-                                      )
-                
-                # Execute the query and save results
-                result = await session.execute(search_sql,{"vector":vector})
+                # Return all retrieved documents and their score of the match with the vector
+                return await self.query_by_vector(session = session , collection_name = collection_name ,
+                                                  vector = vector , limit = limit , accuracy = accuracy ,
+                                                  filters = filters)
+
+    # A function to run the vector search query on a session , the vector is already in its text form
+    async def query_by_vector(self , session , collection_name : str , vector : str , limit : int , accuracy : str = None ,
+                              filters : dict = None):
+
+        filter_sql , filter_parameters = self.build_filter_sql(filters = filters)
+
+        # Tuning the search for the accuracy profile asked for
+        await self.apply_search_profile(session = session , collection_name = collection_name ,
+                                        limit = limit , accuracy = accuracy , filtered = filter_sql is not None)
+
+        # Prepate the query that will search using the vector , the filters are applied during the index scan
+        search_sql = (f"SELECT {PgVectorTableSchemeEnums.TEXT.value} as text, 1 - ({PgVectorTableSchemeEnums.VECTOR.value} <=> :vector) as score, "
+                      f"{PgVectorTableSchemeEnums.VECTOR.value} {self.distance_operator} :vector as distance, "
+                      f"{PgVectorTableSchemeEnums.CHUNK_ID.value} as chunk_id, {PgVectorTableSchemeEnums.METADATA.value} as metadata "
+                      f"FROM {collection_name} "
+                      f"{'WHERE ' + filter_sql + ' ' if filter_sql else ''}"
+                      f"ORDER BY {PgVectorTableSchemeEnums.VECTOR.value} {self.distance_operator} :vector "
+                      f"LIMIT :limit")
+
+        # The iterative scan of a filtered search returns the rows in a relaxed order , they're sorted again
+        if filter_sql:
+            search_sql = f"WITH candidates AS MATERIALIZED ({search_sql}) SELECT * FROM candidates ORDER BY distance"
+
+        # Execute the query and turn the result object to records to response with them
+        result = await session.execute(sql_text(search_sql),{"vector":vector , "limit" : int(limit) , **filter_parameters})
+        return self.to_retrieved_documents(records = result.fetchall())
+
+    # A function to search by many vectors in a single round trip
+    # The query vectors are unnested into rows and every row runs its own ANN lookup in a LATERAL subquery ,
+    # the vectors are sent as one text array parameter so the statement is the same whatever the number of queries
+    async def search_by_vectors(self , collection_name : str , vectors : list , limit : int , accuracy : str = None ,
+                                filters : dict = None):
 
-                # Turn the result object to records to response with them
+        # Validating if the collection exists or not first
+        if not await self.is_collection_existed(collection_name = collection_name):
+            self.logger.error(f"Can not search records in non-existed collection: {collection_name}")
+            return False
+
+        if not vectors:
+            return []
+
+        vector_literals = [ "[" + ",".join([str(v) for v in vector]) +"]" for vector in vectors ]
+        filter_sql , filter_parameters = self.build_filter_sql(filters = filters)
+
+        # Setting our vector database client as our session
+        async with self.db_client() as session:
+
+            # Begin the session execute queries
+            async with session.begin():
+
+                # Tuning the search for the accuracy profile asked for , it applies to every lookup
+                await self.apply_search_profile(session = session , collection_name = collection_name ,
+                                                limit = limit , accuracy = accuracy , filtered = filter_sql is not None)
+
+                search_sql = sql_text(f"SELECT queries.query_index as query_index, results.text as text, results.score as score, "
+                                      f"results.chunk_id as chunk_id, results.metadata as metadata "
+                                      f"FROM (SELECT CAST(query_text AS vector) AS query_vector, query_index "
+                                      f"      FROM unnest(CAST(:vectors AS text[])) WITH ORDINALITY AS q(query_text, query_index)) AS queries "
+                                      f"CROSS JOIN LATERAL ("
+                                      f"  SELECT {PgVectorTableSchemeEnums.TEXT.value} as text, "
+                                      f"  1 - ({PgVectorTableSchemeEnums.VECTOR.value} <=> queries.query_vector) as score, "
+                                      f"  {PgVectorTableSchemeEnums.VECTOR.value} {self.distance_operator} queries.query_vector as distance, "
+                                      f"  {PgVectorTableSchemeEnums.CHUNK_ID.value} as chunk_id, {PgVectorTableSchemeEnums.METADATA.value} as metadata "
+                                      f"  FROM {collection_name} "
+                                      f"  {'WHERE ' + filter_sql + ' ' if filter_sql else ''}"
+                                      f"  ORDER BY {PgVectorTableSchemeEnums.VECTOR.value} {self.distance_operator} queries.query_vector "
+                                      f"  LIMIT :limit"
+                                      f") AS results "
+                                      f"ORDER BY queries.query_index, results.distance")
+
+                result = await session.execute(search_sql , {"vectors" : vector_literals , "limit" : int(limit) , **filter_parameters})
                 records = result.fetchall()
 
-        # Return all retrieved documents and their score of the match with the vector
+        # Grouping the rows by their query , the ordinality starts from 1
+        grouped = [ [] for _ in vectors ]
+        for record in records:
+            grouped[record.query_index - 1].append(record)
+
+        return [ self.to_retrieved_documents(records = query_records) for query_records in grouped ]
+
+    # A function to turn the rows of a search into retrieved documents
+    def to_retrieved_documents(self , records):
+
         return [
             RetrievedDocument(
                 text = record.text,
-                score = record.score
+                score = record.score,
+                chunk_id = record.chunk_id,
+                metadata = json.loads(record.metadata) if isinstance(record.metadata , str) else record.metadata
             )
             for record in records
-        ]
\ No newline at end of file
+        ]
+
+    # A function to search in the vector database by the words of the query with the full text search
+    # The words are matched with OR and ranked with ts_rank_cd , the GIN index of the lexical column finds the matching rows
+    async def search_by_text(self , collection_name : str , text : str , limit : int , filters : dict = None):
+
+        # Validating if the collection exists and has the lexical column first
+        if not await self.is_collection_existed(collection_name = collection_name):
+            self.logger.error(f"Can not search records in non-existed collection: {collection_name}")
+            return False
+
+        if not await self.is_lexical_index_existed(collection_name = collection_name):
+            self.logger.warning(f"Collection {collection_name} has no lexical index , it needs to be indexed again")
+            return []
+
+        # Setting our vector database client as our session
+        async with self.db_client() as session:
+
+            # Begin the session execute queries
+            async with session.begin():
+                return await self.query_by_text(session = session , collection_name = collection_name ,
+                                                text = text , limit = limit , filters = filters)
+
+    # A function to run the full text search query on a session
+    async def query_by_text(self , session , collection_name : str , text : str , limit : int , filters : dict = None):
+
+        filter_sql , filter_parameters = self.build_filter_sql(filters = filters)
+
+        # Prepare the query , the words of plainto_tsquery are joined with OR instead of AND
+        # so a chunk that has only some of the words is still found , ranked lower
+        tsv = PgVectorTableSchemeEnums.TEXT_SEARCH_VECTOR.value
+        search_sql = sql_text(f"SELECT {PgVectorTableSchemeEnums.TEXT.value} as text, ts_rank_cd({tsv}, query) as score, "
+                              f"{PgVectorTableSchemeEnums.CHUNK_ID.value} as chunk_id, {PgVectorTableSchemeEnums.METADATA.value} as metadata "
+                              f"FROM {collection_name}, "
+                              f"CAST(replace(CAST(plainto_tsquery(CAST(:config AS regconfig), :text) AS text), ' & ', ' | ') AS tsquery) AS query "
+                              f"WHERE {tsv} @@ query "
+                              f"{'AND ' + filter_sql + ' ' if filter_sql else ''}"
+                              f"ORDER BY score DESC "
+                              f"LIMIT :limit")
+
+        result = await session.execute(search_sql , {"config" : self.text_search_config , "text" : text , "limit" : int(limit) ,
+                                                     **filter_parameters})
+        return self.to_retrieved_documents(records = result.fetchall())
+
+    # A function to run one arm of the hybrid search in its own session , with a statement timeout if it's given
+    # An arm that fails or runs out of time returns None
+    async def run_hybrid_arm(self , collection_name : str , search , timeout_ms : int = None):
+
+        try:
+            # Setting our vector database client as our session
+            async with self.db_client() as session:
+
+                # Begin the session execute queries
+                async with session.begin():
+                    if timeout_ms:
+                        await session.execute(sql_text(f"SET LOCAL statement_timeout = {int(timeout_ms)}"))
+                    return await search(session)
+
+        except Exception as e:
+            self.logger.warning(f"A hybrid search arm failed on collection {collection_name} : {e}")
+            return None
+
+    # A function to search by the vector and by the text at the same time and fuse both rankings with reciprocal rank fusion
+    # Both arms run in parallel on their own connections , so the search takes as long as the slower arm
+    async def search_hybrid(self , collection_name : str , vector : list , text : str , limit : int , accuracy : str = None ,
+                            filters : dict = None):
+
+        # Validating if the collection exists or not first
+        if not await self.is_collection_existed(collection_name = collection_name):
+            self.logger.error(f"Can not search records in non-existed collection: {collection_name}")
+            return False
+
+        # Without the lexical column the collection is only searched by vector
+        if not await self.is_lexical_index_existed(collection_name = collection_name):
+            return await self.search_by_vector(collection_name = collection_name , vector = vector ,
+                                               limit = limit , accuracy = accuracy , filters = filters)
+
+        candidates = int(limit) * self.hybrid_candidates_factor
+        vector_literal = "[" + ",".join([str(v) for v in vector]) +"]"
+
+        # Both arms fetch more candidates than the limit so the fusion has enough documents from each
+        # Only the lexical arm is timed out , the exact and the filtered vector searches can take longer than its budget
+        vector_documents , text_documents = await asyncio.gather(
+            self.run_hybrid_arm(collection_name = collection_name , search = lambda session: self.query_by_vector(
+                session = session , collection_name = collection_name , vector = vector_literal ,
+                limit = candidates , accuracy = accuracy , filters = filters)),
+            self.run_hybrid_arm(collection_name = collection_name , search = lambda session: self.query_by_text(
+                session = session , collection_name = collection_name , text = text , limit = candidates ,
+                filters = filters) , timeout_ms = self.hybrid_lexical_timeout_ms)
+        )
+
+        # A failed vector arm falls back to the plain vector search , its errors are raised like in the vector mode
+        # so a hybrid search never returns the lexical results alone
+        if vector_documents is None:
+            return await self.search_by_vector(collection_name = collection_name , vector = vector ,
+                                               limit = limit , accuracy = accuracy , filters = filters)
+
+        # A lexical arm that failed or timed out is dropped , the vector results are fused alone
+        return reciprocal_rank_fusion(ranked_lists = [vector_documents , text_documents or []] , limit = limit , k = self.rrf_k)
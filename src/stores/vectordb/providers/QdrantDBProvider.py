@@ -2,7 +2,7 @@
 
 # Importing the VectorDBInterface to implement
 from ..VectorDBInterface import VectorDBinterface
-from ..VectorDBEnums import DistanceMethodEnums
+from ..VectorDBEnums import DistanceMethodEnums , SearchAccuracyEnums
 
 from qdrant_client import models, QdrantClient
 import logging
@@ -10,17 +10,27 @@ from typing import List
 from models.db_schemas import RetrievedDocument
 
 
+# The payload fields that get an index , the filters on them are applied while the HNSW graph is searched
+# The metadata is stored under the metadata key of the payload
+PAYLOAD_INDEXED_FIELDS = {
+    "metadata.asset_id" : "integer",
+    "metadata.page" : "integer",
+}
+
+
 # Creating the class QdrantDBProvider that implements the VectorDBInterface , with inheriting from it
 class QdrantDBProvider(VectorDBinterface):
     
     # Construct the class and give it all parameters needed
-    async def __init__(self,db_client : str ,default_vector_size : int = 786 , distance_method : str = None,index_threshold : int = 100):
+    def __init__(self,db_client : str ,default_vector_size : int = 786 , distance_method : str = None,index_threshold : int = 100,
+                 default_search_accuracy : str = SearchAccuracyEnums.BALANCED.value):
         
         # Setting the class parameters 
         self.client=None
         self.db_client = db_client
         self.distance_method=None
         self.default_vector_size = default_vector_size
+        self.default_search_accuracy = default_search_accuracy
 
         if distance_method == DistanceMethodEnums.COSINE.value:
             self.distance_method = models.Distance.COSINE
@@ -45,7 +55,7 @@ class QdrantDBProvider(VectorDBinterface):
 
     # A function to list all connections in the vector database
     async def list_all_collections(self) -> List:
-        return self.client.get_connections()
+        return self.client.get_collections()
     
     # A function to get all collection related info
     async def get_collection_info(self, collection_name : str) -> str:
@@ -55,7 +65,7 @@ class QdrantDBProvider(VectorDBinterface):
     async def delete_collection(self, collection_name):
         
         # Validating if the collection existed first then delete it
-        if self.is_collection_existed(collection_name):
+        if await self.is_collection_existed(collection_name):
             return self.client.delete_collection(collection_name = collection_name)
         return None
     
@@ -65,10 +75,10 @@ class QdrantDBProvider(VectorDBinterface):
         
         # Validating if the do_reset flag is up to delete the collection first
         if do_reset :
-            _ = self.delete_collection(collection_name=collection_name)
+            _ = await self.delete_collection(collection_name=collection_name)
         
         # Validating if the collection existed first and if not existed we process in creating the colelction
-        if not self.is_collection_existed(collection_name=collection_name):
+        if not await self.is_collection_existed(collection_name=collection_name):
             # Send a logging message that's the collection is being created
             self.logger.info(f"Creating new Qdrant collection : {collection_name}")
 
@@ -80,14 +90,27 @@ class QdrantDBProvider(VectorDBinterface):
                     distance = self.distance_method
                 )
             )
+
+            # Indexing the payload fields the searches are filtered on
+            self.create_payload_indexes(collection_name = collection_name)
             return True
         return False
+
+    # A function to index the payload fields of the filters , creating an index that exists already does nothing
+    def create_payload_indexes(self , collection_name : str):
+
+        for field_name , field_schema in PAYLOAD_INDEXED_FIELDS.items():
+            _ = self.client.create_payload_index(
+                collection_name = collection_name,
+                field_name = field_name,
+                field_schema = models.PayloadSchemaType(field_schema)
+            )
     
     # A function to insert one record into the database
     async def insert_one(self, collection_name, text, vector, metadata = None, record_id = None):
         
         # Validate first if the collection existed
-        if not self.is_collection_existed(collection_name=collection_name):
+        if not await self.is_collection_existed(collection_name=collection_name):
             
             # If the collection doesn't exist lof that the record can't be inserted
             self.logger.error(F"Can not insert new record to non existed collection {collection_name}")
@@ -99,7 +122,7 @@ class QdrantDBProvider(VectorDBinterface):
                 collection_name = collection_name,
                 records = [
                     models.Record(
-                        id = [record_id],
+                        id = record_id,
                         vector = vector,
                         payload = {
                             "text" : text,
@@ -117,7 +140,7 @@ class QdrantDBProvider(VectorDBinterface):
     async def insert_many(self, collection_name, texts, vectors, metadata = None, record_ids = None, batch_size = 50):
         
         # Validate if the collection existed first
-        if not self.is_collection_existed(collection_name=collection_name):
+        if not await self.is_collection_existed(collection_name=collection_name):
             
             # If the collection doesn't exist , log a message that you can insert in a non existed collection
             self.logger.error(F"Can not insert new record to non existed collection {collection_name}")
@@ -168,14 +191,98 @@ class QdrantDBProvider(VectorDBinterface):
 
         return True
         
+    # A function to delete the points of the given IDs from the collection
+    async def delete_by_record_ids(self , collection_name : str , record_ids : list):
+
+        # Nothing to delete if the collection doesn't exist yet
+        if not record_ids or not await self.is_collection_existed(collection_name = collection_name):
+            return 0
+
+        try:
+            _ = self.client.delete(
+                collection_name = collection_name,
+                points_selector = models.PointIdsList(points = list(record_ids))
+            )
+        except Exception as e:
+            self.logger.error(f"Error while deleting records from collection {collection_name} : {e}")
+            return False
+
+        return len(record_ids)
+
+    # A function to get the record IDs among the given ones that have a point in the collection
+    async def get_existing_record_ids(self , collection_name : str , record_ids : list):
+
+        # Nothing is stored if the collection doesn't exist yet
+        if not record_ids or not await self.is_collection_existed(collection_name = collection_name):
+            return set()
+
+        points = self.client.retrieve(collection_name = collection_name , ids = list(record_ids) ,
+                                      with_payload = False , with_vectors = False)
+
+        return { point.id for point in points }
+
+    # Qdrant maintains its HNSW index by itself while indexing , so there's nothing to schedule
+    # The payload indexes are added to the older collections once they're indexed again
+    async def schedule_index_build(self , collection_name : str , index_params : dict = None):
+
+        try:
+            self.create_payload_indexes(collection_name = collection_name)
+        except Exception as e:
+            self.logger.error(f"Error while adding the payload indexes to collection {collection_name} : {e}")
+
+        return False
+
+    # A function to turn the filters of a search into a qdrant payload filter , all its conditions have to match
+    def build_filter(self , filters : dict = None):
+
+        if not filters:
+            return None
+
+        conditions = []
+
+        if filters.get("asset_ids"):
+            conditions.append(models.FieldCondition(key = "metadata.asset_id" ,
+                                                    match = models.MatchAny(any = list(filters["asset_ids"]))))
+
+        if filters.get("chunk_ids"):
+            conditions.append(models.HasIdCondition(has_id = list(filters["chunk_ids"])))
+
+        # MatchValue only takes keywords , integers and booleans , a float is matched with a range on its value
+        for key , value in (filters.get("metadata") or {}).items():
+            if isinstance(value , float):
+                conditions.append(models.FieldCondition(key = f"metadata.{key}" , range = models.Range(gte = value , lte = value)))
+            else:
+                conditions.append(models.FieldCondition(key = f"metadata.{key}" , match = models.MatchValue(value = value)))
+
+        for key , bounds in (filters.get("ranges") or {}).items():
+            conditions.append(models.FieldCondition(key = f"metadata.{key}" , range = models.Range(**(bounds or {}))))
+
+        return models.Filter(must = conditions) if conditions else None
+
+    # A function to map the accuracy profile of a search to the qdrant search parameters
+    def get_search_params(self , limit : int , accuracy : str = None):
+
+        accuracy = accuracy or self.default_search_accuracy
+
+        if accuracy == SearchAccuracyEnums.EXACT.value:
+            return models.SearchParams(exact = True)
+
+        if accuracy == SearchAccuracyEnums.FAST.value:
+            return models.SearchParams(hnsw_ef = max(20 , limit))
+
+        return models.SearchParams(hnsw_ef = max(100 , limit))
+
     # A function to search by vector to get similar results of the vector
-    async def search_by_vector(self, collection_name, vector, limit : int = 5):
+    # The filters scope the search to some assets , chunks , metadata values or ranges of them
+    async def search_by_vector(self, collection_name, vector, limit : int = 5, accuracy : str = None , filters : dict = None):
         
         # Use the database client to search and give it the collection name and the vector and the limit of how many chunks he should return
         results = self.client.search(
             collection_name = collection_name,
             query_vector = vector,
-            limit = limit
+            query_filter = self.build_filter(filters = filters),
+            limit = limit,
+            search_params = self.get_search_params(limit = limit , accuracy = accuracy)
         )
 
 
@@ -188,7 +295,57 @@ class QdrantDBProvider(VectorDBinterface):
         return [
             RetrievedDocument(**{
                 "score" : result.score,
-                "text" : result.payload["text"]
+                "text" : result.payload["text"],
+                "chunk_id" : result.id,
+                "metadata" : result.payload.get("metadata")
             })
             for result in results 
-        ]       
\ No newline at end of file
+        ]
+
+    # A function to search by many vectors in a single request with the batch search of qdrant
+    async def search_by_vectors(self , collection_name : str , vectors : list , limit : int , accuracy : str = None ,
+                                filters : dict = None):
+
+        # Same as the pgvector batch search , the missing collection is refused rather than failing in the client
+        if not await self.is_collection_existed(collection_name = collection_name):
+            self.logger.error(f"Can not search records in non-existed collection: {collection_name}")
+            return False
+
+        if not vectors:
+            return []
+
+        search_params = self.get_search_params(limit = limit , accuracy = accuracy)
+        search_filter = self.build_filter(filters = filters)
+        batch_results = self.client.search_batch(
+            collection_name = collection_name,
+            requests = [
+                models.SearchRequest(vector = vector , filter = search_filter , limit = limit , params = search_params ,
+                                     with_payload = True)
+                for vector in vectors
+            ]
+        )
+
+        # Returning the retrieved documents of every vector in the order of the vectors
+        return [
+            [
+                RetrievedDocument(**{
+                    "score" : result.score,
+                    "text" : result.payload["text"],
+                    "chunk_id" : result.id,
+                    "metadata" : result.payload.get("metadata")
+                })
+                for result in results
+            ]
+            for results in batch_results
+        ]
+
+    # The collections have no full text index in qdrant , so there's no lexical search
+    async def search_by_text(self , collection_name : str , text : str , limit : int , filters : dict = None):
+        self.logger.warning(f"The lexical search isn't supported by qdrant , collection : {collection_name}")
+        return None
+
+    # Without the lexical search the hybrid search is the vector search
+    async def search_hybrid(self , collection_name : str , vector : list , text : str , limit : int , accuracy : str = None ,
+                            filters : dict = None):
+        return await self.search_by_vector(collection_name = collection_name , vector = vector ,
+                                           limit = limit , accuracy = accuracy , filters = filters)       
\ No newline at end of file
@@ -0,0 +1,24 @@
+# Fusing the ranked results of several retrievers with reciprocal rank fusion
+# Only the ranks are used , so the lexical rank scores and the vector similarities don't need to be comparable
+from models.db_schemas import RetrievedDocument
+from typing import List
+
+
+# Fusing ranked lists of documents , every document gets the sum of 1 / (k + rank) over the lists it's in
+# The documents are matched by their chunk ID , k dampens the weight of the top ranks , 60 is the usual value
+def reciprocal_rank_fusion(ranked_lists : List[List[RetrievedDocument]] , limit : int , k : int = 60):
+
+    scores , documents = {} , {}
+
+    for ranked_list in ranked_lists:
+        for rank , document in enumerate(ranked_list or [] , start = 1):
+            key = document.chunk_id if document.chunk_id is not None else document.text
+            scores[key] = scores.get(key , 0.0) + 1.0 / (k + rank)
+            documents.setdefault(key , document)
+
+    ranked_keys = sorted(scores , key = scores.get , reverse = True)[:limit]
+
+    return [
+        documents[key].model_copy(update = {"score" : scores[key]})
+        for key in ranked_keys
+    ]
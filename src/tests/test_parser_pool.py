@@ -0,0 +1,77 @@
+# Testing the parser pool recovers from the workers that die or get stuck
+# The parsing functions run in spawned workers so they're module level functions of this module
+import pytest
+
+pytest.importorskip("langchain_community")
+
+from helpers.parser_pool import ParserPool
+import asyncio
+import multiprocessing
+import os
+import time
+
+
+# Killing the worker the first time it's called , the marker file remembers it was called
+def exit_once(marker_path : str):
+
+    if not os.path.exists(marker_path):
+        with open(marker_path , "w") as f:
+            f.write(str(os.getpid()))
+        os._exit(1)
+
+    return "parsed"
+
+
+# Killing the worker every time it's called
+def exit_always(marker_path : str):
+    os._exit(1)
+
+
+# Writing the PID of the worker then never finishing
+def hang(marker_path : str):
+
+    with open(marker_path , "w") as f:
+        f.write(str(os.getpid()))
+
+    time.sleep(600)
+
+
+def test_broken_pool_is_retried_on_a_new_executor(tmp_path):
+
+    pool = ParserPool(workers = 1 , timeout_seconds = 60)
+    try:
+        first_executor = pool.get_executor()
+        result = asyncio.run(pool.run(exit_once , str(tmp_path / "marker")))
+
+        assert result == "parsed"
+        assert pool.executor is not None and pool.executor is not first_executor
+    finally:
+        pool.close()
+
+
+def test_broken_pool_is_retried_only_once(tmp_path):
+
+    pool = ParserPool(workers = 1 , timeout_seconds = 60)
+    try:
+        assert asyncio.run(pool.run(exit_always , str(tmp_path / "marker"))) is None
+    finally:
+        pool.close()
+
+
+def test_stuck_worker_is_terminated_on_timeout(tmp_path):
+
+    marker_path = tmp_path / "marker"
+    pool = ParserPool(workers = 1 , timeout_seconds = 2)
+    try:
+        assert asyncio.run(pool.run(hang , str(marker_path))) is None
+
+        # The stuck worker is gone once the pool restarted
+        worker_pid = int(marker_path.read_text())
+        deadline = time.monotonic() + 10
+        while worker_pid in [process.pid for process in multiprocessing.active_children()] and time.monotonic() < deadline:
+            time.sleep(0.1)
+
+        assert worker_pid not in [process.pid for process in multiprocessing.active_children()]
+        assert pool.executor is None
+    finally:
+        pool.close()
@@ -0,0 +1,43 @@
+# Testing the qdrant provider on a local qdrant database in a temporary directory
+import pytest
+
+pytest.importorskip("qdrant_client")
+
+from stores.vectordb.providers.QdrantDBProvider import QdrantDBProvider
+import asyncio
+
+
+# Creating a provider connected to a local database with a collection of three records
+async def create_provider(path : str):
+
+    provider = QdrantDBProvider(db_client = path , default_vector_size = 3 , distance_method = "cosine")
+    await provider.connect()
+
+    assert await provider.create_collection(collection_name = "collection_3_1" , embedding_size = 3)
+    assert await provider.insert_many(collection_name = "collection_3_1" , texts = ["first" , "second" , "third"] ,
+                                      vectors = [[1.0 , 0.0 , 0.0] , [0.0 , 1.0 , 0.0] , [0.0 , 0.0 , 1.0]] ,
+                                      metadata = [{"page" : 1} , {"page" : 2} , {"page" : 3}] ,
+                                      record_ids = [1 , 2 , 3])
+    return provider
+
+
+def test_batch_search_returns_the_documents_of_every_vector(tmp_path):
+
+    async def run():
+        provider = await create_provider(path = str(tmp_path))
+        return await provider.search_by_vectors(collection_name = "collection_3_1" ,
+                                                vectors = [[1.0 , 0.0 , 0.0] , [0.0 , 0.0 , 1.0]] , limit = 1)
+
+    results = asyncio.run(run())
+
+    assert [[document.text for document in documents] for documents in results] == [["first"] , ["third"]]
+
+
+def test_batch_search_refuses_a_missing_collection(tmp_path):
+
+    async def run():
+        provider = await create_provider(path = str(tmp_path))
+        return await provider.search_by_vectors(collection_name = "collection_3_2" , vectors = [[1.0 , 0.0 , 0.0]] , limit = 1)
+
+    assert asyncio.run(run()) is False
+
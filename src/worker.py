@@ -0,0 +1,48 @@
+# Running the job workers in their own process , so the files processing and the indexing can run on dedicated ingest nodes
+# Run it from the src directory with : python worker.py
+import asyncio
+import logging
+import signal
+from types import SimpleNamespace
+
+from helpers.config import get_settings , add_reload_signal_handler
+from helpers.resources import create_resources , close_resources
+from controllers import JobController
+from models.JobModel import JobModel
+
+logger = logging.getLogger('uvicorn.error')
+
+
+async def run_workers():
+
+    settings = get_settings()
+
+    # Creating the same clients the API uses
+    resources = SimpleNamespace()
+    await create_resources(resources , settings)
+
+    # Stopping on SIGINT and SIGTERM , every worker finishes its current job before exiting
+    stop_event = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT , signal.SIGTERM):
+        loop.add_signal_handler(sig , stop_event.set)
+
+    # Reloading the settings on SIGHUP , the next jobs read the new ones
+    add_reload_signal_handler(loop)
+
+    job_model = await JobModel.create_instance(db_client = resources.db_client)
+    workers_count = max(1 , settings.JOB_WORKERS_COUNT)
+    logger.info(f"Starting {workers_count} job workers")
+
+    try:
+        await asyncio.gather(*[
+            JobController(resources = resources , job_model = job_model).run_worker(stop_event = stop_event)
+            for _ in range(workers_count)
+        ])
+    finally:
+        await close_resources(resources)
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level = logging.INFO)
+    asyncio.run(run_workers())